@@ -25,8 +25,6 @@ import os
 import site
 import sys
 
-import pkg_resources
-
 from inputremapper.logger import logger
 
 logged = False
@@ -56,6 +54,9 @@ def _try_python_package_location():
     """Look for the data dir at the packages installation location."""
     source = None
     try:
+        # importing pkg_resources takes long, only do it when needed
+        import pkg_resources
+
         source = pkg_resources.require("input-remapper")[0].location
         # failed in some ubuntu installations
     except Exception:
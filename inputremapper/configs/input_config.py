@@ -20,6 +20,7 @@
 from __future__ import annotations
 
 import itertools
+from collections import Counter
 from typing import Tuple, Iterable, Union, List, Dict, Optional, Hashable, NewType
 
 from evdev import ecodes
@@ -427,6 +428,14 @@ class InputCombination(Tuple[InputConfig, ...]):
 
         return permutations
 
+    def get_permutation_key(self) -> Hashable:
+        """Get a hashable that is equal for all permutations of this combination.
+
+        Comparing those keys is much cheaper than comparing all permutations, see
+        get_permutations.
+        """
+        return frozenset(Counter(self[:-1]).items()), self[-1]
+
     def beautify(self) -> str:
         """Get a human-readable string representation."""
         if self == InputCombination.empty_combination():
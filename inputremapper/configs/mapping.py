@@ -20,10 +20,10 @@
 from __future__ import annotations
 
 import enum
+import re
 from collections import namedtuple
-from typing import Optional, Callable, Tuple, TypeVar, Union, Any, Dict
+from typing import Optional, Callable, Tuple, Type, TypeVar, Union, Any, Dict
 
-import pkg_resources
 from evdev.ecodes import (
     EV_KEY,
     EV_ABS,
@@ -84,9 +84,11 @@ from inputremapper.utils import get_evdev_constant_name
 # TODO: remove pydantic VERSION check as soon as we no longer support
 #  Ubuntu 20.04 and with it the ancient pydantic 1.2
 
-needs_workaround = pkg_resources.parse_version(
-    str(VERSION)
-) < pkg_resources.parse_version("1.7.1")
+needs_workaround = tuple(int(part) for part in re.findall(r"\d+", str(VERSION))[:3]) < (
+    1,
+    7,
+    1,
+)
 
 
 EMPTY_MAPPING_NAME: str = _("Empty Mapping")
@@ -122,6 +124,7 @@ class MappingType(str, enum.Enum):
 CombinationChangedCallback = Optional[
     Callable[[InputCombination, InputCombination], None]
 ]
+ValidityChangedCallback = Callable[["UIMapping"], None]
 MappingModel = TypeVar("MappingModel", bound="UIMapping")
 
 
@@ -146,7 +149,13 @@ class UIMapping(BaseModel):
     """
 
     if needs_workaround:
-        __slots__ = ("_combination_changed",)
+        __slots__ = (
+            "_combination_changed",
+            "_dirty",
+            "_validity_changed",
+            "_validated_version",
+            "_error",
+        )
 
     # Required attributes
     # The InputEvent or InputEvent combination which is mapped
@@ -194,6 +203,14 @@ class UIMapping(BaseModel):
     # callback which gets called if the input_combination is updated
     if not needs_workaround:
         _combination_changed: Optional[CombinationChangedCallback] = None
+        # if it has been modified since the preset has been saved or loaded
+        _dirty: bool = True
+        # callback which gets called if the cached validation result is outdated
+        _validity_changed: Optional[ValidityChangedCallback] = None
+        # the system_mapping.version that _error has been determined with, or None
+        # if _error is not the result of validating the current fields
+        _validated_version: Optional[int] = None
+        _error: Optional[ValidationError] = None
 
     # use type: ignore, looks like a mypy bug related to:
     # https://github.com/samuelcolvin/pydantic/issues/2949
@@ -201,6 +218,10 @@ class UIMapping(BaseModel):
         super().__init__(**kwargs)
         if needs_workaround:
             object.__setattr__(self, "_combination_changed", None)
+            object.__setattr__(self, "_dirty", True)
+            object.__setattr__(self, "_validity_changed", None)
+            object.__setattr__(self, "_validated_version", None)
+            object.__setattr__(self, "_error", None)
 
     def __setattr__(self, key: str, value: Any):
         """Call the combination changed callback
@@ -211,6 +232,9 @@ class UIMapping(BaseModel):
                 object.__setattr__(self, "_combination_changed", value)
                 return
             super().__setattr__(key, value)
+            if not key.startswith("_"):
+                object.__setattr__(self, "_dirty", True)
+                self._invalidate_validation()
             return
 
         # the new combination is not yet validated
@@ -227,6 +251,8 @@ class UIMapping(BaseModel):
         # raises a keyError if the combination or a permutation is already mapped
         self._combination_changed(new_combi, self.input_combination)
         super().__setattr__("input_combination", new_combi)
+        object.__setattr__(self, "_dirty", True)
+        self._invalidate_validation()
 
     def __str__(self):
         return str(
@@ -235,13 +261,50 @@ class UIMapping(BaseModel):
             )
         )
 
-    if needs_workaround:
-        # https://github.com/samuelcolvin/pydantic/issues/1383
-        def copy(self: MappingModel, *args, **kwargs) -> MappingModel:
+    def copy(self: MappingModel, *args, **kwargs) -> MappingModel:
+        if needs_workaround:
+            # https://github.com/samuelcolvin/pydantic/issues/1383
             kwargs["deep"] = True
-            copy = super().copy(*args, **kwargs)
+
+        copy = super().copy(*args, **kwargs)
+        if needs_workaround:
             object.__setattr__(copy, "_combination_changed", self._combination_changed)
-            return copy
+            object.__setattr__(copy, "_dirty", self._dirty)
+            object.__setattr__(copy, "_validated_version", self._validated_version)
+            object.__setattr__(copy, "_error", self._error)
+
+        if kwargs.get("update"):
+            object.__setattr__(copy, "_validated_version", None)
+
+        # the copy is not part of the preset that keeps track of the validity
+        object.__setattr__(copy, "_validity_changed", None)
+        return copy
+
+    @classmethod
+    def construct_trusted(
+        cls: Type[MappingModel],
+        mapping_dict: Dict[str, Any],
+    ) -> MappingModel:
+        """Create a mapping from a dict without validating it.
+
+        Only use this for dicts that passed the validation of this class before,
+        like the content of a preset file that was written by this process.
+        """
+        values = dict(mapping_dict)
+        if "input_combination" in values:
+            values["input_combination"] = InputCombination.validate(
+                values["input_combination"]
+            )
+
+        mapping = cls.construct(**values)
+        if needs_workaround:
+            object.__setattr__(mapping, "_combination_changed", None)
+            object.__setattr__(mapping, "_dirty", True)
+            object.__setattr__(mapping, "_validity_changed", None)
+            object.__setattr__(mapping, "_validated_version", None)
+            object.__setattr__(mapping, "_error", None)
+
+        return mapping
 
     def format_name(self) -> str:
         """Get the custom-name or a readable representation of the combination."""
@@ -287,6 +350,19 @@ class UIMapping(BaseModel):
     def remove_combination_changed_callback(self):
         self._combination_changed = None
 
+    def set_validity_changed_callback(self, callback: ValidityChangedCallback):
+        object.__setattr__(self, "_validity_changed", callback)
+
+    def remove_validity_changed_callback(self):
+        object.__setattr__(self, "_validity_changed", None)
+
+    def is_dirty(self) -> bool:
+        """If the mapping might have been modified since it was saved or loaded."""
+        return self._dirty
+
+    def set_dirty(self, dirty: bool) -> None:
+        object.__setattr__(self, "_dirty", dirty)
+
     def get_output_type_code(self) -> Optional[Tuple[int, int]]:
         """Returns the output_type and output_code if set,
         otherwise looks the output_symbol up in the system_mapping
@@ -307,12 +383,29 @@ class UIMapping(BaseModel):
         return not self.get_error()
 
     def get_error(self) -> Optional[ValidationError]:
-        """The validation error or None."""
+        """The validation error or None.
+
+        The result is cached until one of the fields is modified, or until the
+        system_mapping changes.
+        """
+        if self._validated_version == system_mapping.version:
+            return self._error
+
+        error = None
         try:
             Mapping(**self.dict())
         except ValidationError as exception:
-            return exception
-        return None
+            error = exception
+
+        object.__setattr__(self, "_error", error)
+        object.__setattr__(self, "_validated_version", system_mapping.version)
+        return error
+
+    def _invalidate_validation(self) -> None:
+        """Forget the cached validation result after a field has been modified."""
+        object.__setattr__(self, "_validated_version", None)
+        if self._validity_changed is not None:
+            self._validity_changed(self)
 
     def get_bus_message(self) -> MappingData:
         """Return an immutable copy for use in the message broker."""
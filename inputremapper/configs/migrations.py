@@ -26,13 +26,13 @@ from __future__ import annotations
 
 import copy
 import json
+import multiprocessing
 import os
 import re
 import shutil
 from pathlib import Path
-from typing import Iterator, Tuple, Dict, List
+from typing import Iterator, Dict, List, Callable
 
-import pkg_resources
 from evdev.ecodes import (
     EV_KEY,
     EV_ABS,
@@ -58,8 +58,15 @@ from inputremapper.logger import logger, VERSION
 from inputremapper.user import HOME
 
 
-def all_presets() -> Iterator[Tuple[os.PathLike, Dict | List]]:
-    """Get all presets for all groups as list."""
+# Modifies the structure of a preset < 1.6.0 in place, and returns if it changed
+PresetMigration = Callable[[os.PathLike, Dict], bool]
+
+# migrating only a few presets is faster without starting processes for it
+MIN_PRESETS_FOR_POOL = 8
+
+
+def all_presets() -> Iterator[os.PathLike]:
+    """Get the paths of all presets for all groups."""
     if not os.path.exists(get_preset_path()):
         return
 
@@ -72,17 +79,14 @@ def all_presets() -> Iterator[Tuple[os.PathLike, Dict | List]]:
             if preset.suffix != ".json":
                 continue
 
-            try:
-                with open(preset, "r") as f:
-                    preset_structure = json.load(f)
-                    yield preset, preset_structure
-            except json.decoder.JSONDecodeError:
-                logger.warning('Invalid json format in preset "%s"', preset)
-                continue
+            yield preset
 
 
 def config_version():
     """Get the version string in config.json as packaging.Version object."""
+    # importing pkg_resources takes long, only do it when needed
+    import pkg_resources
+
     config_path = os.path.join(CONFIG_PATH, "config.json")
 
     if not os.path.exists(config_path):
@@ -128,30 +132,25 @@ def _preset_path():
     logger.info("done")
 
 
-def _mapping_keys():
+def _mapping_keys(preset: os.PathLike, preset_structure: Dict) -> bool:
     """Update all preset mappings.
 
     Update all keys in preset to include value e.g.: '1,5'->'1,5,1'
     """
-    for preset, preset_structure in all_presets():
-        if isinstance(preset_structure, list):
-            continue  # the preset must be at least 1.6-beta version
-
-        changes = 0
-        if "mapping" in preset_structure.keys():
-            mapping = copy.deepcopy(preset_structure["mapping"])
-            for key in mapping.keys():
-                if key.count(",") == 1:
-                    preset_structure["mapping"][f"{key},1"] = preset_structure[
-                        "mapping"
-                    ].pop(key)
-                    changes += 1
-
-        if changes:
-            with open(preset, "w") as file:
-                logger.info('Updating mapping keys of "%s"', preset)
-                json.dump(preset_structure, file, indent=4)
-                file.write("\n")
+    changes = 0
+    if "mapping" in preset_structure.keys():
+        mapping = copy.deepcopy(preset_structure["mapping"])
+        for key in mapping.keys():
+            if key.count(",") == 1:
+                preset_structure["mapping"][f"{key},1"] = preset_structure[
+                    "mapping"
+                ].pop(key)
+                changes += 1
+
+    if changes:
+        logger.info('Updating mapping keys of "%s"', preset)
+
+    return changes > 0
 
 
 def _update_version():
@@ -199,86 +198,66 @@ def _find_target(symbol):
     return None
 
 
-def _add_target():
+def _add_target(preset: os.PathLike, preset_structure: Dict) -> bool:
     """Add the target field to each preset mapping."""
-    for preset, preset_structure in all_presets():
-        if isinstance(preset_structure, list):
-            continue
+    if "mapping" not in preset_structure.keys():
+        return False
 
-        if "mapping" not in preset_structure.keys():
+    changed = False
+    for key, symbol in preset_structure["mapping"].copy().items():
+        if isinstance(symbol, list):
             continue
 
-        changed = False
-        for key, symbol in preset_structure["mapping"].copy().items():
-            if isinstance(symbol, list):
-                continue
-
-            target = _find_target(symbol)
-            if target is None:
-                target = "keyboard"
-                symbol = (
-                    f"{symbol}\n"
-                    "# Broken mapping:\n"
-                    "# No target can handle all specified keycodes"
-                )
-
-            logger.info(
-                'Changing target of mapping for "%s" in preset "%s" to "%s"',
-                key,
-                preset,
-                target,
+        target = _find_target(symbol)
+        if target is None:
+            target = "keyboard"
+            symbol = (
+                f"{symbol}\n"
+                "# Broken mapping:\n"
+                "# No target can handle all specified keycodes"
             )
-            symbol = [symbol, target]
-            preset_structure["mapping"][key] = symbol
-            changed = True
 
-        if not changed:
-            continue
+        logger.info(
+            'Changing target of mapping for "%s" in preset "%s" to "%s"',
+            key,
+            preset,
+            target,
+        )
+        symbol = [symbol, target]
+        preset_structure["mapping"][key] = symbol
+        changed = True
 
-        with open(preset, "w") as file:
-            logger.info('Adding targets for "%s"', preset)
-            json.dump(preset_structure, file, indent=4)
-            file.write("\n")
+    return changed
 
 
-def _otherwise_to_else():
+def _otherwise_to_else(preset: os.PathLike, preset_structure: Dict) -> bool:
     """Conditional macros should use an "else" parameter instead of "otherwise"."""
-    for preset, preset_structure in all_presets():
-        if isinstance(preset_structure, list):
-            continue
+    if "mapping" not in preset_structure.keys():
+        return False
 
-        if "mapping" not in preset_structure.keys():
+    changed = False
+    for key, symbol in preset_structure["mapping"].copy().items():
+        if not is_this_a_macro(symbol[0]):
             continue
 
-        changed = False
-        for key, symbol in preset_structure["mapping"].copy().items():
-            if not is_this_a_macro(symbol[0]):
-                continue
-
-            symbol_before = symbol[0]
-            symbol[0] = re.sub(r"otherwise\s*=\s*", "else=", symbol[0])
+        symbol_before = symbol[0]
+        symbol[0] = re.sub(r"otherwise\s*=\s*", "else=", symbol[0])
 
-            if symbol_before == symbol[0]:
-                continue
+        if symbol_before == symbol[0]:
+            continue
 
-            changed = changed or symbol_before != symbol[0]
+        changed = changed or symbol_before != symbol[0]
 
-            logger.info(
-                'Changing mapping for "%s" in preset "%s" to "%s"',
-                key,
-                preset,
-                symbol[0],
-            )
+        logger.info(
+            'Changing mapping for "%s" in preset "%s" to "%s"',
+            key,
+            preset,
+            symbol[0],
+        )
 
-            preset_structure["mapping"][key] = symbol
+        preset_structure["mapping"][key] = symbol
 
-        if not changed:
-            continue
-
-        with open(preset, "w") as file:
-            logger.info('Changing otherwise to else for "%s"', preset)
-            json.dump(preset_structure, file, indent=4)
-            file.write("\n")
+    return changed
 
 
 def _input_combination_from_string(combination_string: str) -> InputCombination:
@@ -296,141 +275,133 @@ def _input_combination_from_string(combination_string: str) -> InputCombination:
     return InputCombination(configs)
 
 
-def _convert_to_individual_mappings():
+def _convert_to_individual_mappings(old_preset_path: os.PathLike, old_preset: Dict):
     """Convert preset.json
     from {key: [symbol, target]}
     to [{input_combination: ..., output_symbol: symbol, ...}]
     """
-
-    for old_preset_path, old_preset in all_presets():
-        if isinstance(old_preset, list):
-            continue
-
-        migrated_preset = Preset(old_preset_path, UIMapping)
-        if "mapping" in old_preset.keys():
-            for combination, symbol_target in old_preset["mapping"].items():
-                logger.info(
-                    'migrating from "%s: %s" to mapping dict',
+    migrated_preset = Preset(old_preset_path, UIMapping)
+    if "mapping" in old_preset.keys():
+        for combination, symbol_target in old_preset["mapping"].items():
+            logger.info(
+                'migrating from "%s: %s" to mapping dict',
+                combination,
+                symbol_target,
+            )
+            try:
+                combination = _input_combination_from_string(combination)
+            except ValueError:
+                logger.error(
+                    "unable to migrate mapping with invalid combination %s",
                     combination,
-                    symbol_target,
-                )
-                try:
-                    combination = _input_combination_from_string(combination)
-                except ValueError:
-                    logger.error(
-                        "unable to migrate mapping with invalid combination %s",
-                        combination,
-                    )
-                    continue
-
-                mapping = UIMapping(
-                    input_combination=combination,
-                    target_uinput=symbol_target[1],
-                    output_symbol=symbol_target[0],
                 )
-                migrated_preset.add(mapping)
-
-        if (
-            "gamepad" in old_preset.keys()
-            and "joystick" in old_preset["gamepad"].keys()
-        ):
-            joystick_dict = old_preset["gamepad"]["joystick"]
-            left_purpose = joystick_dict.get("left_purpose")
-            right_purpose = joystick_dict.get("right_purpose")
-            # TODO if pointer_speed is migrated, why is it in my config?
-            pointer_speed = joystick_dict.get("pointer_speed")
-            if pointer_speed:
-                pointer_speed /= 100
-            non_linearity = joystick_dict.get("non_linearity")  # Todo
-            x_scroll_speed = joystick_dict.get("x_scroll_speed")
-            y_scroll_speed = joystick_dict.get("y_scroll_speed")
-
-            cfg = {
-                "input_combination": None,
-                "target_uinput": "mouse",
-                "output_type": EV_REL,
-                "output_code": None,
-            }
+                continue
 
-            if left_purpose == "mouse":
-                x_config = cfg.copy()
-                y_config = cfg.copy()
-                x_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_X)]
-                )
-                y_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_Y)]
-                )
-                x_config["output_code"] = REL_X
-                y_config["output_code"] = REL_Y
-                mapping_x = Mapping(**x_config)
-                mapping_y = Mapping(**y_config)
-                if pointer_speed:
-                    mapping_x.gain = pointer_speed
-                    mapping_y.gain = pointer_speed
-                migrated_preset.add(mapping_x)
-                migrated_preset.add(mapping_y)
-
-            if right_purpose == "mouse":
-                x_config = cfg.copy()
-                y_config = cfg.copy()
-                x_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_RX)]
-                )
-                y_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_RY)]
-                )
-                x_config["output_code"] = REL_X
-                y_config["output_code"] = REL_Y
-                mapping_x = Mapping(**x_config)
-                mapping_y = Mapping(**y_config)
-                if pointer_speed:
-                    mapping_x.gain = pointer_speed
-                    mapping_y.gain = pointer_speed
-                migrated_preset.add(mapping_x)
-                migrated_preset.add(mapping_y)
-
-            if left_purpose == "wheel":
-                x_config = cfg.copy()
-                y_config = cfg.copy()
-                x_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_X)]
-                )
-                y_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_Y)]
-                )
-                x_config["output_code"] = REL_HWHEEL_HI_RES
-                y_config["output_code"] = REL_WHEEL_HI_RES
-                mapping_x = Mapping(**x_config)
-                mapping_y = Mapping(**y_config)
-                if x_scroll_speed:
-                    mapping_x.gain = x_scroll_speed
-                if y_scroll_speed:
-                    mapping_y.gain = y_scroll_speed
-                migrated_preset.add(mapping_x)
-                migrated_preset.add(mapping_y)
-
-            if right_purpose == "wheel":
-                x_config = cfg.copy()
-                y_config = cfg.copy()
-                x_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_RX)]
-                )
-                y_config["input_combination"] = InputCombination(
-                    [InputConfig(type=EV_ABS, code=ABS_RY)]
-                )
-                x_config["output_code"] = REL_HWHEEL_HI_RES
-                y_config["output_code"] = REL_WHEEL_HI_RES
-                mapping_x = Mapping(**x_config)
-                mapping_y = Mapping(**y_config)
-                if x_scroll_speed:
-                    mapping_x.gain = x_scroll_speed
-                if y_scroll_speed:
-                    mapping_y.gain = y_scroll_speed
-                migrated_preset.add(mapping_x)
-                migrated_preset.add(mapping_y)
+            mapping = UIMapping(
+                input_combination=combination,
+                target_uinput=symbol_target[1],
+                output_symbol=symbol_target[0],
+            )
+            migrated_preset.add(mapping)
+
+    if "gamepad" in old_preset.keys() and "joystick" in old_preset["gamepad"].keys():
+        joystick_dict = old_preset["gamepad"]["joystick"]
+        left_purpose = joystick_dict.get("left_purpose")
+        right_purpose = joystick_dict.get("right_purpose")
+        # TODO if pointer_speed is migrated, why is it in my config?
+        pointer_speed = joystick_dict.get("pointer_speed")
+        if pointer_speed:
+            pointer_speed /= 100
+        non_linearity = joystick_dict.get("non_linearity")  # Todo
+        x_scroll_speed = joystick_dict.get("x_scroll_speed")
+        y_scroll_speed = joystick_dict.get("y_scroll_speed")
+
+        cfg = {
+            "input_combination": None,
+            "target_uinput": "mouse",
+            "output_type": EV_REL,
+            "output_code": None,
+        }
+
+        if left_purpose == "mouse":
+            x_config = cfg.copy()
+            y_config = cfg.copy()
+            x_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_X)]
+            )
+            y_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_Y)]
+            )
+            x_config["output_code"] = REL_X
+            y_config["output_code"] = REL_Y
+            mapping_x = Mapping(**x_config)
+            mapping_y = Mapping(**y_config)
+            if pointer_speed:
+                mapping_x.gain = pointer_speed
+                mapping_y.gain = pointer_speed
+            migrated_preset.add(mapping_x)
+            migrated_preset.add(mapping_y)
+
+        if right_purpose == "mouse":
+            x_config = cfg.copy()
+            y_config = cfg.copy()
+            x_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_RX)]
+            )
+            y_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_RY)]
+            )
+            x_config["output_code"] = REL_X
+            y_config["output_code"] = REL_Y
+            mapping_x = Mapping(**x_config)
+            mapping_y = Mapping(**y_config)
+            if pointer_speed:
+                mapping_x.gain = pointer_speed
+                mapping_y.gain = pointer_speed
+            migrated_preset.add(mapping_x)
+            migrated_preset.add(mapping_y)
+
+        if left_purpose == "wheel":
+            x_config = cfg.copy()
+            y_config = cfg.copy()
+            x_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_X)]
+            )
+            y_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_Y)]
+            )
+            x_config["output_code"] = REL_HWHEEL_HI_RES
+            y_config["output_code"] = REL_WHEEL_HI_RES
+            mapping_x = Mapping(**x_config)
+            mapping_y = Mapping(**y_config)
+            if x_scroll_speed:
+                mapping_x.gain = x_scroll_speed
+            if y_scroll_speed:
+                mapping_y.gain = y_scroll_speed
+            migrated_preset.add(mapping_x)
+            migrated_preset.add(mapping_y)
+
+        if right_purpose == "wheel":
+            x_config = cfg.copy()
+            y_config = cfg.copy()
+            x_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_RX)]
+            )
+            y_config["input_combination"] = InputCombination(
+                [InputConfig(type=EV_ABS, code=ABS_RY)]
+            )
+            x_config["output_code"] = REL_HWHEEL_HI_RES
+            y_config["output_code"] = REL_WHEEL_HI_RES
+            mapping_x = Mapping(**x_config)
+            mapping_y = Mapping(**y_config)
+            if x_scroll_speed:
+                mapping_x.gain = x_scroll_speed
+            if y_scroll_speed:
+                mapping_y.gain = y_scroll_speed
+            migrated_preset.add(mapping_x)
+            migrated_preset.add(mapping_y)
 
-        migrated_preset.save()
+    migrated_preset.save()
 
 
 def _copy_to_v2():
@@ -472,8 +443,68 @@ def _remove_logs():
         pass
 
 
-def migrate():
-    """Migrate config files to the current release."""
+def _migrate_preset(
+    preset: os.PathLike,
+    migrations: List[PresetMigration],
+    convert: bool,
+):
+    """Read the preset once, apply all migrations to it, and write it once."""
+    try:
+        with open(preset, "r") as file:
+            preset_structure = json.load(file)
+    except json.decoder.JSONDecodeError:
+        logger.warning('Invalid json format in preset "%s"', preset)
+        return
+
+    if isinstance(preset_structure, list):
+        return  # the preset must be at least 1.6-beta version
+
+    changed = False
+    for migration in migrations:
+        changed = migration(preset, preset_structure) or changed
+
+    if convert:
+        _convert_to_individual_mappings(preset, preset_structure)
+        return
+
+    if changed:
+        with open(preset, "w") as file:
+            logger.info('Migrating "%s"', preset)
+            json.dump(preset_structure, file, indent=4)
+            file.write("\n")
+
+
+def _migrate_presets(
+    migrations: List[PresetMigration],
+    convert: bool,
+    parallel: bool,
+):
+    """Migrate all presets, in parallel if there are many of them."""
+    if len(migrations) == 0 and not convert:
+        return
+
+    args = [(preset, migrations, convert) for preset in all_presets()]
+    if not parallel or len(args) < MIN_PRESETS_FOR_POOL:
+        for arg in args:
+            _migrate_preset(*arg)
+        return
+
+    logger.info("Migrating %d presets", len(args))
+    # the processes are forked, so they inherit the global_uinputs for _add_target
+    with multiprocessing.Pool() as pool:
+        pool.starmap(_migrate_preset, args)
+
+
+def migrate(parallel: bool = True):
+    """Migrate config files to the current release.
+
+    Parameters
+    ----------
+    parallel
+        if many presets may be migrated in forked processes. Processes that
+        already initialized Gtk must not fork, and should pass False.
+    """
+    import pkg_resources
 
     _rename_to_input_remapper()
 
@@ -485,21 +516,27 @@ def migrate():
         _config_suffix()
         _preset_path()
 
+    if v < pkg_resources.parse_version("1.5.0"):
+        _remove_logs()
+
+    # all presets that are older than 1.6.0-beta are migrated in a single pass
+    preset_migrations: List[PresetMigration] = []
+
     if v < pkg_resources.parse_version("1.2.2"):
-        _mapping_keys()
+        preset_migrations.append(_mapping_keys)
 
     if v < pkg_resources.parse_version("1.4.0"):
         global_uinputs.prepare_all()
-        _add_target()
+        preset_migrations.append(_add_target)
 
     if v < pkg_resources.parse_version("1.4.1"):
-        _otherwise_to_else()
-
-    if v < pkg_resources.parse_version("1.5.0"):
-        _remove_logs()
+        preset_migrations.append(_otherwise_to_else)
 
-    if v < pkg_resources.parse_version("1.6.0-beta"):
-        _convert_to_individual_mappings()
+    _migrate_presets(
+        preset_migrations,
+        convert=v < pkg_resources.parse_version("1.6.0-beta"),
+        parallel=parallel,
+    )
 
     # add new migrations here
 
@@ -24,6 +24,7 @@
 
 import os
 import shutil
+import tempfile
 from typing import List, Union, Optional
 
 from inputremapper.logger import logger, VERSION
@@ -33,6 +34,9 @@ rel_path = ".config/input-remapper-2"
 
 CONFIG_PATH = os.path.join(HOME, rel_path)
 
+# owned by the service. Never put files there that users are able to modify.
+CACHE_PATH = "/var/cache/input-remapper"
+
 
 def chown(path):
     """Set the owner of a path to the user."""
@@ -80,6 +84,56 @@ def mkdir(path, log=True):
     chown(path)
 
 
+def write_atomically(path: Union[str, os.PathLike], content: str):
+    """Replace the content of the file, give it to the user.
+
+    The content is written to a temporary file that is then renamed, so the file
+    is never partially written, even if the process dies while writing.
+    """
+    directory = os.path.dirname(path)
+    mkdir(directory, log=False)
+
+    file_descriptor, tmp_path = tempfile.mkstemp(
+        dir=directory,
+        prefix=".",
+        suffix=".tmp",
+    )
+    try:
+        with os.fdopen(file_descriptor, "w") as file:
+            file.write(content)
+            # otherwise a power loss might leave an empty file behind the rename
+            file.flush()
+            os.fsync(file.fileno())
+
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+
+        chown(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove(tmp_path)
+        raise
+
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    """Make a rename within the directory persistent."""
+    try:
+        directory_descriptor = os.open(directory or ".", os.O_RDONLY)
+    except OSError as error:
+        logger.debug('Failed to open "%s": %s', directory, error)
+        return
+
+    try:
+        os.fsync(directory_descriptor)
+    except OSError as error:
+        # not supported by every filesystem
+        logger.debug('Failed to fsync "%s": %s', directory, error)
+    finally:
+        os.close(directory_descriptor)
+
+
 def split_all(path: Union[os.PathLike, str]) -> List[str]:
     """Split the path into its segments."""
     parts = []
@@ -22,14 +22,19 @@
 from __future__ import annotations
 from evdev import ecodes
 
+import hashlib
 import json
 import os
+import textwrap
+from collections import Counter
 from typing import (
+    Hashable,
     Tuple,
     Dict,
     List,
     Optional,
     Iterator,
+    Set,
     Type,
     TypeVar,
     Generic,
@@ -43,11 +48,18 @@ except ImportError:
 
 from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.configs.mapping import Mapping, UIMapping
-from inputremapper.configs.paths import touch
+from inputremapper.configs.paths import touch, write_atomically
+from inputremapper.configs.system_mapping import system_mapping
 from inputremapper.logger import logger
 
 MappingModel = TypeVar("MappingModel", bound=UIMapping)
 
+# The sha256 of preset files that were written or validated by this process, for
+# each mapping class and version of the system_mapping that symbols were validated
+# against. Unless they have been modified by someone else in the meantime, they
+# don't need to be validated again when loading them.
+_validated_checksums: Dict[Tuple[str, Type[UIMapping], int], str] = {}
+
 
 class Preset(Generic[MappingModel]):
     """Contains and manages mappings of a single preset."""
@@ -71,9 +83,30 @@ class Preset(Generic[MappingModel]):
         mapping_factory=Mapping,
     ) -> None:
         self._mappings: Dict[InputCombination, MappingModel] = {}
-        # a copy of mappings for keeping track of changes
+        # the combinations of self._mappings by their permutation key, to find them
+        # regardless of the order of their inputs
+        self._combinations: Dict[Hashable, InputCombination] = {}
+        # how many combinations of self._mappings share each permutation key
+        self._permutation_key_counts: Counter = Counter()
+        # a copy of mappings for keeping track of changes. Mappings that have not
+        # been modified since they were loaded are shared with self._mappings
         self._saved_mappings: Dict[InputCombination, MappingModel] = {}
+        # the dicts of the file that self._saved_mappings has been read from, to
+        # create the saved state of shared mappings once they are modified
+        self._loaded_dicts: Dict[InputCombination, Dict] = {}
+        # the json of the mappings as written by the most recent save, to not
+        # serialize unmodified mappings again
+        self._saved_json: Dict[InputCombination, str] = {}
+        # the sha256 of the file content that _saved_mappings represents
+        self._saved_checksum: Optional[str] = None
         self._path: Optional[os.PathLike] = path
+        # mappings that have been added or modified since is_valid() checked them,
+        # by their id
+        self._unchecked_mappings: Dict[int, MappingModel] = {}
+        # the ids of mappings that were invalid when is_valid() checked them
+        self._invalid_mappings: Set[int] = set()
+        # the system_mapping.version that is_valid() checked them with
+        self._checked_version: Optional[int] = None
 
         # the mapping class which is used by load()
         self._mapping_factory: Type[MappingModel] = mapping_factory
@@ -92,7 +125,28 @@ class Preset(Generic[MappingModel]):
 
     def has_unsaved_changes(self) -> bool:
         """Check if there are unsaved changed."""
-        return self._mappings != self._saved_mappings
+        if self._mappings.keys() != self._saved_mappings.keys():
+            return True
+
+        # only those that have been modified can be different from the saved ones
+        for combination, mapping in self._mappings.items():
+            if mapping.is_dirty() and mapping != self._get_saved_mapping(combination):
+                return True
+
+        return False
+
+    def _get_saved_mapping(self, combination: InputCombination) -> MappingModel:
+        """Get the saved state of the mapping."""
+        saved_mapping = self._saved_mappings[combination]
+        if (
+            saved_mapping is self._mappings.get(combination)
+            and saved_mapping.is_dirty()
+        ):
+            # it has been shared since it was loaded, and is modified now
+            saved_mapping = self._mapping_factory(**self._loaded_dicts[combination])
+            self._saved_mappings[combination] = saved_mapping
+
+        return saved_mapping
 
     def remove(self, combination: InputCombination) -> None:
         """Remove a mapping from the preset by providing the InputCombination."""
@@ -102,13 +156,16 @@ class Preset(Generic[MappingModel]):
                 f"combination must by of type InputCombination, got {type(combination)}"
             )
 
-        for permutation in combination.get_permutations():
-            if permutation in self._mappings.keys():
-                combination = permutation
-                break
+        key = combination.get_permutation_key()
+        combination = self._combinations.get(key, combination)
         try:
             mapping = self._mappings.pop(combination)
+            del self._combinations[key]
+            self._permutation_key_counts[key] -= 1
             mapping.remove_combination_changed_callback()
+            mapping.remove_validity_changed_callback()
+            self._unchecked_mappings.pop(id(mapping), None)
+            self._invalid_mappings.discard(id(mapping))
         except KeyError:
             logger.debug(
                 "unable to remove non-existing mapping with combination = %s",
@@ -118,15 +175,20 @@ class Preset(Generic[MappingModel]):
 
     def add(self, mapping: MappingModel) -> None:
         """Add a mapping to the preset."""
-        for permutation in mapping.input_combination.get_permutations():
-            if permutation in self._mappings:
-                raise KeyError(
-                    "A mapping with this input_combination: "
-                    f"{permutation} already exists",
-                )
+        key = mapping.input_combination.get_permutation_key()
+        if key in self._combinations:
+            raise KeyError(
+                "A mapping with this input_combination: "
+                f"{self._combinations[key]} already exists",
+            )
 
         mapping.set_combination_changed_callback(self._combination_changed_callback)
+        mapping.set_validity_changed_callback(self._validity_changed_callback)
+        mapping.set_dirty(True)
         self._mappings[mapping.input_combination] = mapping
+        self._combinations[key] = mapping.input_combination
+        self._permutation_key_counts[key] += 1
+        self._unchecked_mappings[id(mapping)] = mapping
 
     def empty(self) -> None:
         """Remove all mappings and custom configs without saving.
@@ -134,12 +196,19 @@ class Preset(Generic[MappingModel]):
         """
         for mapping in self._mappings.values():
             mapping.remove_combination_changed_callback()
+            mapping.remove_validity_changed_callback()
         self._mappings = {}
+        self._combinations = {}
+        self._permutation_key_counts = Counter()
+        self._unchecked_mappings = {}
+        self._invalid_mappings = set()
 
     def clear(self) -> None:
         """Remove all mappings and also self.path."""
         self.empty()
         self._saved_mappings = {}
+        self._loaded_dicts = {}
+        self._saved_checksum = None
         self.path = None
 
     def load(self) -> None:
@@ -150,19 +219,20 @@ class Preset(Generic[MappingModel]):
             raise FileNotFoundError(f'Tried to load non-existing preset "{self.path}"')
 
         self._saved_mappings = self._get_mappings_from_disc()
+        self._saved_json = {}
         self.empty()
         for mapping in self._saved_mappings.values():
             # use the public add method to make sure
-            # the _combination_changed_callback is attached
-            self.add(mapping.copy())
+            # the _combination_changed_callback is attached. The saved state is
+            # only copied off of it once it is modified.
+            self.add(mapping)
+            mapping.set_dirty(False)
 
     def _is_mapped_multiple_times(self, input_combination: InputCombination) -> bool:
         """Check if the event combination maps to multiple mappings."""
-        all_input_combinations = {mapping.input_combination for mapping in self}
-        permutations = set(input_combination.get_permutations())
-        union = permutations & all_input_combinations
+        key = input_combination.get_permutation_key()
         # if there are more than one matches, then there is a duplicate
-        return len(union) > 1
+        return self._permutation_key_counts[key] > 1
 
     def _has_valid_input_combination(self, mapping: UIMapping) -> bool:
         """Check if the mapping has a valid input event combination."""
@@ -184,9 +254,22 @@ class Preset(Generic[MappingModel]):
 
         logger.info("Saving preset to %s", self.path)
 
-        preset_list = []
+        json_list = []
         saved_mappings = {}
+        saved_json = {}
+        # loading the file may only skip the validation if all of them are valid
+        all_valid = self.is_valid()
         for mapping in self:
+            combination = mapping.input_combination
+
+            if not mapping.is_dirty() and combination in self._saved_json:
+                # unmodified since the previous save, no need to validate and
+                # serialize it again
+                json_list.append(self._saved_json[combination])
+                saved_json[combination] = self._saved_json[combination]
+                saved_mappings[combination] = self._get_saved_mapping(combination)
+                continue
+
             if not mapping.is_valid():
                 if not self._has_valid_input_combination(mapping):
                     # we save invalid mappings except for those with an invalid
@@ -204,21 +287,52 @@ class Preset(Generic[MappingModel]):
                     continue
 
             mapping_dict = mapping.dict(exclude_defaults=True)
-            mapping_dict["input_combination"] = mapping.input_combination.to_config()
-            combination = mapping.input_combination
-            preset_list.append(mapping_dict)
+            mapping_dict["input_combination"] = combination.to_config()
+            # indented like json.dumps indents the items of the whole list
+            mapping_json = textwrap.indent(json.dumps(mapping_dict, indent=4), " " * 4)
+            json_list.append(mapping_json)
+            saved_json[combination] = mapping_json
 
             saved_mappings[combination] = mapping.copy()
             saved_mappings[combination].remove_combination_changed_callback()
 
-        with open(self.path, "w") as file:
-            json.dump(preset_list, file, indent=4)
-            file.write("\n")
+        # the file stays indented, presets are edited by hand as well
+        content = ("[\n" + ",\n".join(json_list) + "\n]\n") if json_list else "[]\n"
+        write_atomically(self.path, content)
+
+        checksum = hashlib.sha256(content.encode()).hexdigest()
+        if all_valid:
+            _validated_checksums[self._get_validation_key()] = checksum
+        else:
+            _validated_checksums.pop(self._get_validation_key(), None)
 
+        self._saved_checksum = checksum
         self._saved_mappings = saved_mappings
+        self._saved_json = saved_json
+        self._loaded_dicts = {}
+        for combination in saved_mappings:
+            self._mappings[combination].set_dirty(False)
 
     def is_valid(self) -> bool:
-        return False not in [mapping.is_valid() for mapping in self]
+        """If all mappings are valid.
+
+        Only validates the mappings that changed since the previous call, unless
+        the system_mapping changed.
+        """
+        if self._checked_version != system_mapping.version:
+            self._unchecked_mappings = {
+                id(mapping): mapping for mapping in self._mappings.values()
+            }
+            self._checked_version = system_mapping.version
+
+        for mapping_id, mapping in self._unchecked_mappings.items():
+            if mapping.is_valid():
+                self._invalid_mappings.discard(mapping_id)
+            else:
+                self._invalid_mappings.add(mapping_id)
+
+        self._unchecked_mappings = {}
+        return len(self._invalid_mappings) == 0
 
     def get_mapping(
         self, combination: Optional[InputCombination]
@@ -232,11 +346,11 @@ class Preset(Generic[MappingModel]):
                 f"combination must by of type InputCombination, got {type(combination)}"
             )
 
-        for permutation in combination.get_permutations():
-            existing = self._mappings.get(permutation)
-            if existing is not None:
-                return existing
-        return None
+        existing = self._combinations.get(combination.get_permutation_key())
+        if existing is None:
+            return None
+
+        return self._mappings.get(existing)
 
     def dangerously_mapped_btn_left(self) -> bool:
         """Return True if this mapping disables BTN_Left."""
@@ -260,40 +374,83 @@ class Preset(Generic[MappingModel]):
     def _combination_changed_callback(
         self, new: InputCombination, old: InputCombination
     ) -> None:
-        for permutation in new.get_permutations():
-            if permutation in self._mappings.keys() and permutation != old:
-                raise KeyError("combination already exists in the preset")
+        new_key = new.get_permutation_key()
+        existing = self._combinations.get(new_key)
+        if existing is not None and existing != old:
+            raise KeyError("combination already exists in the preset")
+
+        old_key = old.get_permutation_key()
         self._mappings[new] = self._mappings.pop(old)
+        del self._combinations[old_key]
+        self._permutation_key_counts[old_key] -= 1
+        self._combinations[new_key] = new
+        self._permutation_key_counts[new_key] += 1
+
+    def _validity_changed_callback(self, mapping: MappingModel) -> None:
+        self._unchecked_mappings[id(mapping)] = mapping
 
     def _update_saved_mappings(self) -> None:
         if self.path is None:
             return
 
+        if self._saved_checksum is not None and os.path.exists(self.path):
+            with open(self.path, "rb") as file:
+                checksum = hashlib.sha256(file.read()).hexdigest()
+
+            if checksum == self._saved_checksum:
+                # for example the file has been renamed, the saved mappings are
+                # still known
+                return
+
         if not os.path.exists(self.path):
             self._saved_mappings = {}
-            return
-        self._saved_mappings = self._get_mappings_from_disc()
+            self._loaded_dicts = {}
+            self._saved_checksum = None
+        else:
+            self._saved_mappings = self._get_mappings_from_disc()
+
+        # compared to the new saved mappings, every mapping might be modified
+        self._saved_json = {}
+        for mapping in self._mappings.values():
+            mapping.set_dirty(True)
 
     def _get_mappings_from_disc(self) -> Dict[InputCombination, MappingModel]:
         mappings: Dict[InputCombination, MappingModel] = {}
+        self._loaded_dicts = {}
         if not self.path:
             logger.debug("unable to read preset without a path set Preset.path first")
             return mappings
 
-        if os.stat(self.path).st_size == 0:
+        with open(self.path, "rb") as file:
+            content = file.read()
+
+        checksum = hashlib.sha256(content).hexdigest()
+        self._saved_checksum = checksum
+
+        if len(content) == 0:
             logger.debug("got empty file")
             return mappings
 
-        with open(self.path, "r") as file:
-            try:
-                preset_list = json.load(file)
-            except json.JSONDecodeError:
-                logger.error("unable to decode json file: %s", self.path)
-                return mappings
+        try:
+            preset_list = json.loads(content)
+        except json.JSONDecodeError:
+            logger.error("unable to decode json file: %s", self.path)
+            return mappings
 
+        if _validated_checksums.get(self._get_validation_key()) == checksum:
+            logger.debug("Skipping the validation of the unchanged preset")
+            for mapping_dict in preset_list:
+                mapping = self._mapping_factory.construct_trusted(mapping_dict)
+                mappings[mapping.input_combination] = mapping
+                self._loaded_dicts[mapping.input_combination] = mapping_dict
+
+            return mappings
+
+        all_valid = True
         for mapping_dict in preset_list:
             if not isinstance(mapping_dict, dict):
                 logger.error("Expected mapping to be a dict: %s", mapping_dict)
+                all_valid = False
                 continue
 
             try:
@@ -304,11 +461,21 @@ class Preset(Generic[MappingModel]):
                     mapping_dict.get("input_combination"),
                     error,
                 )
+                all_valid = False
                 continue
 
             mappings[mapping.input_combination] = mapping
+            self._loaded_dicts[mapping.input_combination] = mapping_dict
+
+        if all_valid:
+            _validated_checksums[self._get_validation_key()] = checksum
+
         return mappings
 
+    def _get_validation_key(self) -> Tuple[str, Type[UIMapping], int]:
+        """Identify the file and how it has been validated in _validated_checksums."""
+        return os.fspath(self.path), self._mapping_factory, system_mapping.version
+
     @property
     def path(self) -> Optional[os.PathLike]:
         return self._path
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Stores validated presets of the service, to skip parsing them on startup."""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from inputremapper.configs.paths import CACHE_PATH
+from inputremapper.configs.preset import Preset
+from inputremapper.logger import logger, VERSION
+
+CacheKey = Tuple[str, int, int, str, str]
+
+
+class PresetCache:
+    """Pickles the validated mappings of presets.
+
+    An entry is only used if neither the preset file, nor the xmodmap of the
+    session, nor the version of input-remapper changed since it was written.
+    Each entry starts with the path of its preset, so that entries of presets
+    that don't exist anymore can be pruned without reading all of them.
+
+    The service runs as root and unpickles those files, so they are stored in a
+    directory that only root can write to, and never in the users config.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_PATH, "presets")
+
+    def load(self, preset: Preset, xmodmap: Optional[Dict[str, int]]) -> bool:
+        """Add the cached mappings to the empty preset.
+
+        Returns False if there is no valid cache entry, the preset then needs to
+        be loaded from its file.
+        """
+        key = self._get_key(preset, xmodmap)
+        if key is None:
+            return False
+
+        try:
+            with open(self._get_cache_path(preset), "rb") as file:
+                pickle.load(file)  # the path of the preset
+                cached_key, mappings = pickle.load(file)
+        except FileNotFoundError:
+            return False
+        except Exception as error:
+            logger.debug('Failed to read cached preset "%s": %s', preset.path, error)
+            return False
+
+        if cached_key != key:
+            logger.debug('Cached preset "%s" is outdated', preset.path)
+            return False
+
+        logger.info('Loading preset "%s" from cache', preset.path)
+        for mapping in mappings:
+            preset.add(mapping)
+
+        return True
+
+    def store(self, preset: Preset, xmodmap: Optional[Dict[str, int]]) -> None:
+        """Write the mappings of the loaded preset to the cache."""
+        key = self._get_key(preset, xmodmap)
+        if key is None:
+            return
+
+        mappings = []
+        for mapping in preset:
+            # the callback belongs to the preset object, don't pickle it
+            mapping = mapping.copy()
+            mapping.remove_combination_changed_callback()
+            mappings.append(mapping)
+
+        tmp_path = None
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            # write to a temporary file first, so that a crash or a concurrent
+            # load never sees a partially written entry
+            file_descriptor, tmp_path = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(file_descriptor, "wb") as file:
+                pickle.dump(str(preset.path), file)
+                pickle.dump((key, mappings), file)
+
+            os.replace(tmp_path, self._get_cache_path(preset))
+        except (OSError, pickle.PicklingError) as error:
+            logger.error('Failed to cache preset "%s": %s', preset.path, error)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self) -> None:
+        """Remove entries of presets that don't exist anymore.
+
+        Also removes leftovers of writes that were interrupted by a crash.
+        """
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return
+
+        for name in names:
+            path = os.path.join(self.path, name)
+            preset_path = self._read_preset_path(path)
+            if preset_path is not None and os.path.exists(preset_path):
+                continue
+
+            logger.debug('Removing outdated cache entry "%s"', path)
+            try:
+                os.remove(path)
+            except OSError as error:
+                logger.error('Failed to remove "%s": %s', path, error)
+
+    @staticmethod
+    def _read_preset_path(path: str) -> Optional[str]:
+        """Get the path of the preset that the entry belongs to."""
+        if not path.endswith(".pickle"):
+            return None
+
+        try:
+            with open(path, "rb") as file:
+                preset_path = pickle.load(file)
+        except Exception as error:
+            logger.debug('Failed to read cache entry "%s": %s', path, error)
+            return None
+
+        return preset_path if isinstance(preset_path, str) else None
+
+    def _get_cache_path(self, preset: Preset) -> str:
+        name = hashlib.sha256(str(preset.path).encode()).hexdigest()
+        return os.path.join(self.path, f"{name}.pickle")
+
+    @staticmethod
+    def _get_key(
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]],
+    ) -> Optional[CacheKey]:
+        """Identify the inputs that the validated mappings depend on."""
+        if preset.path is None:
+            return None
+
+        try:
+            with open(preset.path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                content_hash = hashlib.sha256(file.read()).hexdigest()
+        except OSError:
+            return None
+
+        # symbols are validated against the keyboard layout of the session
+        xmodmap_hash = hashlib.sha256(
+            json.dumps(xmodmap, sort_keys=True).encode()
+        ).hexdigest()
+
+        return VERSION, stat.st_mtime_ns, stat.st_size, content_hash, xmodmap_hash
@@ -19,14 +19,16 @@
 """Make the systems/environments mapping of keys and codes accessible."""
 
 import json
+import os
 import re
 import subprocess
-from typing import Optional, List, Iterable, Tuple
+from typing import Optional, List, Iterable, Tuple, Dict
 
 import evdev
 
-from inputremapper.configs.paths import get_config_path, touch
+from inputremapper.configs.paths import get_config_path, touch, write_atomically
 from inputremapper.logger import logger
+from inputremapper.user import HOME
 from inputremapper.utils import is_service
 
 DISABLE_NAME = "disable"
@@ -38,6 +40,15 @@ XKB_KEYCODE_OFFSET = 8
 
 XMODMAP_FILENAME = "xmodmap.json"
 
+XMODMAP_SNAPSHOT_FILENAME = "xmodmap_snapshot.json"
+
+# The X server loads the keyboard layout from those when it starts
+KEYBOARD_CONFIG_FILES = [
+    "/etc/default/keyboard",
+    "/etc/X11/xorg.conf.d/00-keyboard.conf",
+    os.path.join(HOME, ".Xmodmap"),
+]
+
 LAZY_LOAD = None
 
 
@@ -48,6 +59,13 @@ class SystemMapping:
     _xmodmap: Optional[List[Tuple[str, str]]] = LAZY_LOAD
     _case_insensitive_mapping: Optional[dict] = LAZY_LOAD
 
+    # reverse indexes, built on demand and dropped whenever the mapping changes
+    _names_by_code: Optional[Dict[int, List[str]]] = None
+    _xmodmap_names_by_code: Optional[Dict[int, str]] = None
+
+    # incremented whenever names or codes change, to invalidate what depends on them
+    version: int = 0
+
     def __getattribute__(self, wanted: str):
         """To lazy load system_mapping info only when needed.
 
@@ -63,7 +81,11 @@ class SystemMapping:
                 # initialize _mapping and such with an empty dict, for populate
                 # to write into
                 object.__setattr__(self, lazy_loaded_attribute, {})
+                version = object.__getattribute__(self, "version")
                 object.__getattribute__(self, "populate")()
+                # nothing can depend on the mapping before it is loaded, so this
+                # is not a change
+                object.__setattr__(self, "version", version)
 
         return object.__getattribute__(self, wanted)
 
@@ -77,7 +99,37 @@ class SystemMapping:
         if not codes:
             return self._mapping.keys()
 
-        return [name for name, code in self._mapping.items() if code in codes]
+        names_by_code = self._get_names_by_code()
+        names = []
+        for code in dict.fromkeys(codes):
+            names += names_by_code.get(code, [])
+
+        return names
+
+    def _get_names_by_code(self) -> Dict[int, List[str]]:
+        """Index all names of the mapping by their code."""
+        if self._names_by_code is None:
+            names_by_code: Dict[int, List[str]] = {}
+            for name, code in self._mapping.items():
+                names_by_code.setdefault(code, []).append(name)
+
+            self._names_by_code = names_by_code
+
+        return self._names_by_code
+
+    def _get_xmodmap_names_by_code(self) -> Dict[int, str]:
+        """Index the first xmodmap symbol of each code."""
+        if self._xmodmap_names_by_code is None:
+            xmodmap_names_by_code: Dict[int, str] = {}
+            for keycode, names in self._xmodmap:
+                xmodmap_names_by_code.setdefault(
+                    int(keycode) - XKB_KEYCODE_OFFSET,
+                    names.split()[0],
+                )
+
+            self._xmodmap_names_by_code = xmodmap_names_by_code
+
+        return self._xmodmap_names_by_code
 
     def correct_case(self, symbol: str):
         """Return the correct casing for a symbol."""
@@ -88,6 +140,22 @@ class SystemMapping:
 
     def _use_xmodmap_symbols(self):
         """Look up xmodmap -pke, write xmodmap.json, and get the symbols."""
+        fingerprint = _get_keymap_fingerprint()
+        if self._load_xmodmap_snapshot(fingerprint):
+            logger.debug("Keyboard layout is unchanged, not calling `xmodmap -pke`")
+            xmodmap_dict = self._find_legit_mappings()
+        else:
+            xmodmap_dict = self._read_xmodmap()
+            if xmodmap_dict is None:
+                return
+
+            self._write_xmodmap(xmodmap_dict, fingerprint)
+
+        for name, code in xmodmap_dict.items():
+            self._set(name, code)
+
+    def _read_xmodmap(self) -> Optional[Dict[str, int]]:
+        """Call xmodmap -pke and get the symbols from its output."""
         try:
             xmodmap = subprocess.check_output(
                 ["xmodmap", "-pke"],
@@ -95,17 +163,22 @@ class SystemMapping:
             ).decode()
         except FileNotFoundError:
             logger.info("Optional `xmodmap` command not found. This is not critical.")
-            return
+            return None
         except subprocess.CalledProcessError as e:
             logger.error('Call to `xmodmap -pke` failed with "%s"', e)
-            return
+            return None
 
         self._xmodmap = re.findall(r"(\d+) = (.+)\n", xmodmap + "\n")
+        self._xmodmap_names_by_code = None
         xmodmap_dict = self._find_legit_mappings()
         if len(xmodmap_dict) == 0:
             logger.info("`xmodmap -pke` did not yield any symbol")
-            return
+            return None
+
+        return xmodmap_dict
 
+    def _write_xmodmap(self, xmodmap_dict: Dict[str, int], fingerprint: Optional[dict]):
+        """Write xmodmap.json, and remember the output for the next start."""
         # Write this stuff into the input-remapper config directory, because
         # the systemd service won't know the user sessions xmodmap.
         path = get_config_path(XMODMAP_FILENAME)
@@ -114,8 +187,47 @@ class SystemMapping:
             logger.debug('Writing "%s"', path)
             json.dump(xmodmap_dict, file, indent=4)
 
-        for name, code in xmodmap_dict.items():
-            self._set(name, code)
+        if fingerprint is None:
+            return
+
+        snapshot = {
+            "fingerprint": fingerprint,
+            "xmodmap_file": _get_file_signature(path),
+            "xmodmap": self._xmodmap,
+        }
+        try:
+            write_atomically(
+                get_config_path(XMODMAP_SNAPSHOT_FILENAME),
+                json.dumps(snapshot),
+            )
+        except OSError as error:
+            logger.error("Failed to write the xmodmap snapshot: %s", error)
+
+    def _load_xmodmap_snapshot(self, fingerprint: Optional[dict]) -> bool:
+        """Use the xmodmap output of a previous start, if the layout is the same."""
+        if fingerprint is None:
+            return False
+
+        try:
+            with open(get_config_path(XMODMAP_SNAPSHOT_FILENAME), "r") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as error:
+            logger.debug("Failed to read the xmodmap snapshot: %s", error)
+            return False
+
+        if not isinstance(snapshot, dict) or snapshot.get("fingerprint") != fingerprint:
+            return False
+
+        # the service needs an unchanged xmodmap.json as well
+        xmodmap_file = _get_file_signature(get_config_path(XMODMAP_FILENAME))
+        if xmodmap_file is None or snapshot.get("xmodmap_file") != xmodmap_file:
+            return False
+
+        self._xmodmap = [(keycode, names) for keycode, names in snapshot["xmodmap"]]
+        self._xmodmap_names_by_code = None
+        return True
 
     def _use_linux_evdev_symbols(self):
         """Look up the evdev constant names and use them."""
@@ -136,6 +248,7 @@ class SystemMapping:
         self._use_linux_evdev_symbols()
 
         self._set(DISABLE_NAME, DISABLE_CODE)
+        self.version += 1
 
     def update(self, mapping: dict):
         """Update this with new keys.
@@ -146,8 +259,14 @@ class SystemMapping:
             maps from name to code. Make sure your keys are lowercase.
         """
         len_before = len(self._mapping)
+        changed = False
         for name, code in mapping.items():
-            self._set(name, code)
+            if self._mapping.get(str(name)) != code:
+                self._set(name, code)
+                changed = True
+
+        if changed:
+            self.version += 1
 
         logger.debug(
             "Updated keycodes with %d new ones", len(self._mapping) - len_before
@@ -157,6 +276,7 @@ class SystemMapping:
         """Map name to code."""
         self._mapping[str(name)] = code
         self._case_insensitive_mapping[str(name).lower()] = name
+        self._names_by_code = None
 
     def get(self, name: str) -> int:
         """Return the code mapped to the key."""
@@ -174,24 +294,28 @@ class SystemMapping:
         for key in keys:
             del self._mapping[key]
 
+        self._case_insensitive_mapping.clear()
+        self._names_by_code = None
+        self.version += 1
+
     def get_name(self, code: int):
         """Get the first matching name for the code."""
-        for entry in self._xmodmap:
-            if int(entry[0]) - XKB_KEYCODE_OFFSET == code:
-                return entry[1].split()[0]
+        xmodmap_name = self._get_xmodmap_names_by_code().get(code)
+        if xmodmap_name is not None:
+            return xmodmap_name
 
         # Fall back to the linux constants
         # This is especially important for BTN_LEFT and such
         btn_name = evdev.ecodes.BTN.get(code, None)
         if btn_name is not None:
-            if type(btn_name) == list:
+            if isinstance(btn_name, (list, tuple)):
                 return btn_name[0]
             else:
                 return btn_name
 
         key_name = evdev.ecodes.KEY.get(code, None)
         if key_name is not None:
-            if type(key_name) == list:
+            if isinstance(key_name, (list, tuple)):
                 return key_name[0]
             else:
                 return key_name
@@ -214,5 +338,53 @@ class SystemMapping:
         return xmodmap_dict
 
 
+def _get_file_signature(path: str) -> Optional[List[int]]:
+    """Get something that changes when the file is replaced or modified."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def _get_keymap_fingerprint() -> Optional[dict]:
+    """Identify the running X server and its keyboard configuration.
+
+    This is cheap compared to calling `xmodmap -pke`. Switching the layout with
+    setxkbmap or the desktop environment is noticed, changing single keys by calling
+    xmodmap is not. Removing xmodmap.json makes input-remapper read it again.
+    """
+    display = os.environ.get("DISPLAY", "")
+    match = re.match(r"^(unix)?:(\d+)(\.\d+)?$", display)
+    if match is None:
+        # not a local X server, there is no way to tell when it restarted
+        return None
+
+    # the socket is created when the X server starts
+    x_socket = _get_file_signature(f"/tmp/.X11-unix/X{match[2]}")
+    if x_socket is None:
+        return None
+
+    return {
+        "display": display,
+        "x_socket": x_socket,
+        "config_files": [_get_file_signature(path) for path in KEYBOARD_CONFIG_FILES],
+        "xkb": _get_xkb_state(),
+    }
+
+
+def _get_xkb_state() -> Optional[str]:
+    """Get the rules, model, layout and variant that the X server currently uses."""
+    try:
+        return subprocess.check_output(
+            ["setxkbmap", "-query"],
+            stderr=subprocess.DEVNULL,
+        ).decode()
+    except (FileNotFoundError, subprocess.CalledProcessError) as error:
+        logger.debug("Failed to query the keyboard layout: %s", error)
+        return None
+
+
 # this mapping represents the xmodmap output, which stays constant
 system_mapping = SystemMapping()
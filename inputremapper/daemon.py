@@ -30,20 +30,27 @@ import os
 import sys
 import time
 from pathlib import PurePath
-from typing import Protocol, Dict, Optional
+from typing import Protocol, Dict, List, Optional, Union
 
 import gi
 from pydbus import SystemBus
+from pydbus.generic import signal
 
 gi.require_version("GLib", "2.0")
 from gi.repository import GLib
 
 from inputremapper.logger import logger, is_debug
 from inputremapper.injection.injector import Injector, InjectorState
+from inputremapper.injection.injector_pool import InjectorPool
+from inputremapper.injection.multiplexed_injector import (
+    MultiplexedInjector,
+    MultiplexedInjection,
+)
 from inputremapper.configs.preset import Preset
+from inputremapper.configs.preset_cache import PresetCache
 from inputremapper.configs.global_config import global_config
 from inputremapper.configs.system_mapping import system_mapping
-from inputremapper.groups import groups
+from inputremapper.groups import groups, _Group
 from inputremapper.configs.paths import get_config_path, sanitize_path_component, USER
 from inputremapper.injection.macros.macro import macro_variables
 from inputremapper.injection.global_uinputs import global_uinputs
@@ -54,6 +61,9 @@ BUS_NAME = "inputremapper.Control"
 # https://github.com/LEW21/pydbus/blob/cc407c8b1d25b7e28a6d661a29f9e661b1c9b964/pydbus/proxy.py
 BUS_TIMEOUT = 10
 
+# seconds between checks if the warm injectors need to be replaced
+INJECTOR_POOL_INTERVAL = 2
+
 
 class AutoloadHistory:
     """Contains the autoloading history and constraints."""
@@ -121,15 +131,31 @@ def remove_timeout(func):
 class DaemonProxy(Protocol):  # pragma: no cover
     """The interface provided over the dbus."""
 
+    # emitted with the group_key and the new state, connect to it with
+    # `InjectorStateChanged.connect(callback)`
+    InjectorStateChanged: signal
+
     def stop_injecting(self, group_key: str) -> None:
         ...
 
     def get_state(self, group_key: str) -> InjectorState:
         ...
 
+    def get_scheduling(self, group_key: str) -> str:
+        ...
+
     def start_injecting(self, group_key: str, preset: str) -> bool:
         ...
 
+    def start_many(self, presets: Dict[str, str]) -> Dict[str, bool]:
+        ...
+
+    def stop_many(self, group_keys: List[str]) -> None:
+        ...
+
+    def get_states(self) -> Dict[str, str]:
+        ...
+
     def stop_all(self) -> None:
         ...
 
@@ -168,11 +194,25 @@ class Daemon:
                     <arg type='s' name='group_key' direction='in'/>
                     <arg type='s' name='response' direction='out'/>
                 </method>
+                <method name='get_scheduling'>
+                    <arg type='s' name='group_key' direction='in'/>
+                    <arg type='s' name='response' direction='out'/>
+                </method>
                 <method name='start_injecting'>
                     <arg type='s' name='group_key' direction='in'/>
                     <arg type='s' name='preset' direction='in'/>
                     <arg type='b' name='response' direction='out'/>
                 </method>
+                <method name='start_many'>
+                    <arg type='a{{ss}}' name='presets' direction='in'/>
+                    <arg type='a{{sb}}' name='response' direction='out'/>
+                </method>
+                <method name='stop_many'>
+                    <arg type='as' name='group_keys' direction='in'/>
+                </method>
+                <method name='get_states'>
+                    <arg type='a{{ss}}' name='response' direction='out'/>
+                </method>
                 <method name='stop_all'>
                 </method>
                 <method name='set_config_dir'>
@@ -187,14 +227,26 @@ class Daemon:
                     <arg type='s' name='out' direction='in'/>
                     <arg type='s' name='response' direction='out'/>
                 </method>
+                <signal name='InjectorStateChanged'>
+                    <arg type='s' name='group_key'/>
+                    <arg type='s' name='state'/>
+                </signal>
             </interface>
         </node>
     """
 
+    InjectorStateChanged = signal()
+
     def __init__(self):
         """Constructs the daemon."""
         logger.debug("Creating daemon")
-        self.injectors: Dict[str, Injector] = {}
+        self.injectors: Dict[str, Union[Injector, MultiplexedInjection]] = {}
+
+        # the last state that was emitted with InjectorStateChanged, by group_key
+        self._published_states: Dict[str, InjectorState] = {}
+
+        # only created if "injector.multiplex" is enabled in the config
+        self.multiplexed_injector: Optional[MultiplexedInjector] = None
 
         self.config_dir = None
 
@@ -208,7 +260,15 @@ class Daemon:
         self.autoload_history = AutoloadHistory()
         self.refreshed_devices_at = 0
 
+        # filled in the background once the daemon runs, see `run`
+        self.injector_pool = InjectorPool()
+
+        # validated presets of previous starts of the service
+        self.preset_cache = PresetCache()
+
         atexit.register(self.stop_all)
+        atexit.register(self.injector_pool.stop)
+        atexit.register(self._stop_multiplexed_injector)
 
         # initialize stuff that is needed alongside the daemon process
         macro_variables.start()
@@ -279,15 +339,17 @@ class Daemon:
         """Start the daemons loop. Blocks until the daemon stops."""
         loop = GLib.MainLoop()
         logger.debug("Running daemon")
+        self.preset_cache.prune()
+        GLib.timeout_add_seconds(INJECTOR_POOL_INTERVAL, self.injector_pool.fill)
         loop.run()
 
-    def refresh(self, group_key: Optional[str] = None):
-        """Refresh groups if the specified group is unknown.
+    def refresh(self, *group_keys: str):
+        """Refresh groups if one of the specified groups is unknown.
 
         Parameters
         ----------
-        group_key
-            unique identifier used by the groups object
+        group_keys
+            unique identifiers used by the groups object
         """
         now = time.time()
         if now - 10 > self.refreshed_devices_at:
@@ -298,8 +360,11 @@ class Daemon:
             self.refreshed_devices_at = now
             return
 
-        if not groups.find(key=group_key):
-            logger.debug('Refreshing because "%s" is unknown', group_key)
+        unknown = [
+            group_key for group_key in group_keys if not groups.find(key=group_key)
+        ]
+        if unknown:
+            logger.debug('Refreshing because "%s" is unknown', unknown[0])
             time.sleep(0.1)
             groups.refresh()
             self.refreshed_devices_at = now
@@ -316,10 +381,91 @@ class Daemon:
         self.injectors[group_key].stop_injecting()
         self.autoload_history.forget(group_key)
 
+    @remove_timeout
+    def stop_many(self, group_keys: List[str]):
+        """Stop injecting for each of the groups."""
+        for group_key in group_keys:
+            self.stop_injecting(group_key)
+
     def get_state(self, group_key: str) -> InjectorState:
         """Get the injectors state."""
         injector = self.injectors.get(group_key)
-        return injector.get_state() if injector else InjectorState.UNKNOWN
+        if injector is None:
+            return InjectorState.UNKNOWN
+
+        # this might receive the new state before the watch of the injector does
+        state = injector.get_state()
+        self._publish_state(group_key, state)
+        return state
+
+    @remove_timeout
+    def get_states(self) -> Dict[str, str]:
+        """Get the state of each injector, by group_key."""
+        return {
+            group_key: self.get_state(group_key).value
+            for group_key in list(self.injectors.keys())
+        }
+
+    def _publish_state(self, group_key: str, state: InjectorState) -> None:
+        """Emit InjectorStateChanged if the state of the group changed."""
+        if self._published_states.get(group_key) == state:
+            return
+
+        self._published_states[group_key] = state
+        self.InjectorStateChanged(group_key, state.value)
+
+    def _add_injector(
+        self,
+        group_key: str,
+        injector: Union[Injector, MultiplexedInjection],
+    ) -> None:
+        """Use the started injector for the group, and watch its state."""
+        self.injectors[group_key] = injector
+        source_ids: List[int] = []
+
+        def on_state_fd(*_) -> bool:
+            state = injector.get_state()
+            if self.injectors.get(group_key) is injector:
+                self._publish_state(group_key, state)
+
+            if state in (InjectorState.STARTING, InjectorState.RUNNING):
+                return True
+
+            # nothing is reported anymore once the injection ended
+            for source_id in source_ids:
+                GLib.source_remove(source_id)
+
+            source_ids.clear()
+            return False
+
+        # readable once the injector reports something, or its process ended
+        for fd in injector.get_state_fds():
+            source_ids.append(
+                GLib.io_add_watch(
+                    fd,
+                    GLib.PRIORITY_DEFAULT,
+                    GLib.IO_IN | GLib.IO_HUP,
+                    on_state_fd,
+                )
+            )
+
+        on_state_fd()
+
+    def get_scheduling(self, group_key: str) -> str:
+        """Describe the scheduling policy the injector process actually got.
+
+        Empty if it is unknown, for example because the injection didn't start yet.
+        """
+        injector = self.injectors.get(group_key)
+        if injector is None:
+            return ""
+
+        # receives the latest reports of the process
+        injector.get_state()
+        if injector.effective_scheduling is None:
+            return ""
+
+        return str(injector.effective_scheduling)
 
     @remove_timeout
     def set_config_dir(self, config_dir: str):
@@ -352,22 +498,31 @@ class Daemon:
         """
         self.refresh(group_key)
 
+        preset = self._get_autoload_preset(group_key)
+        if preset is None:
+            return
+
+        self.start_injecting(group_key, preset)
+        self.autoload_history.remember(group_key, preset)
+
+    def _get_autoload_preset(self, group_key: str) -> Optional[str]:
+        """Get the name of the preset that should be autoloaded now, if any."""
         group = groups.find(key=group_key)
         if group is None:
             # even after groups.refresh, the device is unknown, so it's
             # either not relevant for input-remapper, or not connected yet
-            return
+            return None
 
         preset = global_config.get(["autoload", group.key], log_unknown=False)
 
         if preset is None:
             # no autoloading is configured for this device
-            return
+            return None
 
         if not isinstance(preset, str):
             # maybe another dict or something, who knows. Broken config
             logger.error("Expected a string for autoload, but got %s", preset)
-            return
+            return None
 
         logger.info('Autoloading for "%s"', group.key)
 
@@ -377,10 +532,9 @@ class Daemon:
                 preset,
                 group.key,
             )
-            return
+            return None
 
-        self.start_injecting(group.key, preset)
-        self.autoload_history.remember(group.key, preset)
+        return preset
 
     @remove_timeout
     def autoload_single(self, group_key: str):
@@ -430,8 +584,18 @@ class Daemon:
             logger.error("No presets configured to autoload")
             return
 
+        # refresh the groups only once for all of them
+        self.refresh(*[group_key for group_key, _ in autoload_presets])
+
+        presets = {}
         for group_key, _ in autoload_presets:
-            self._autoload(group_key)
+            preset = self._get_autoload_preset(group_key)
+            if preset is not None:
+                presets[group_key] = preset
+
+        self.start_many(presets)
+        for group_key, preset in presets.items():
+            self.autoload_history.remember(group_key, preset)
 
     def start_injecting(self, group_key: str, preset_name: str) -> bool:
         """Start injecting the preset for the device.
@@ -457,12 +621,81 @@ class Daemon:
             )
             return False
 
+        return self._start_injecting(group_key, preset_name, self._load_xmodmap())
+
+    @remove_timeout
+    def start_many(self, presets: Dict[str, str]) -> Dict[str, bool]:
+        """Start injecting a preset for each of the groups.
+
+        Like start_injecting, but devices are refreshed and the xmodmap is read only
+        once for all of them. Returns if it succeeded for each group_key.
+
+        Parameters
+        ----------
+        presets
+            The name of the preset for each group_key
+        """
+        logger.info("Request to start injecting for %d groups", len(presets))
+
+        self.refresh(*presets.keys())
+
+        if self.config_dir is None:
+            logger.error(
+                "Request to start injections before a user told the service about "
+                "their session using set_config_dir",
+            )
+            return {group_key: False for group_key in presets}
+
+        xmodmap = self._load_xmodmap()
+
+        results = {}
+        for group_key, preset_name in presets.items():
+            group = groups.find(key=group_key)
+            if group is None:
+                logger.error('Could not find group "%s"', group_key)
+                results[group_key] = False
+                continue
+
+            try:
+                preset = self._load_preset(group, preset_name, xmodmap)
+                results[group_key] = preset is not None and self._inject(
+                    group,
+                    preset,
+                    xmodmap,
+                )
+            except Exception as error:
+                # don't keep the other groups from being injected
+                logger.error('Failed to start injecting for "%s": %s', group_key, error)
+                results[group_key] = False
+
+        return results
+
+    def _start_injecting(
+        self,
+        group_key: str,
+        preset_name: str,
+        xmodmap: Optional[Dict[str, int]],
+    ) -> bool:
+        """Start injecting without refreshing the groups first."""
         group = groups.find(key=group_key)
 
         if group is None:
             logger.error('Could not find group "%s"', group_key)
             return False
 
+        preset = self._load_preset(group, preset_name, xmodmap)
+        if preset is None:
+            return False
+
+        return self._inject(group, preset, xmodmap)
+
+    def _load_preset(
+        self,
+        group: _Group,
+        preset_name: str,
+        xmodmap: Optional[Dict[str, int]],
+    ) -> Optional[Preset]:
+        """Load the validated preset of the group, from the cache if possible."""
         preset_path = PurePath(
             self.config_dir,
             "presets",
@@ -470,38 +703,26 @@ class Daemon:
             f"{preset_name}.json",
         )
 
-        # Path to a dump of the xkb mappings, to provide more human
-        # readable keys in the correct keyboard layout to the service.
-        # The service cannot use `xmodmap -pke` because it's running via
-        # systemd.
-        xmodmap_path = os.path.join(self.config_dir, "xmodmap.json")
-        try:
-            with open(xmodmap_path, "r") as file:
-                # do this for each injection to make sure it is up to
-                # date when the system layout changes.
-                xmodmap = json.load(file)
-                logger.debug('Using keycodes from "%s"', xmodmap_path)
+        preset = Preset(preset_path)
 
-                # this creates the system_mapping._xmodmap, which we need to do now
-                # otherwise it might be created later which will override the changes
-                # we do here.
-                # Do we really need to lazyload in the system_mapping?
-                # this kind of bug is stupid to track down
-                system_mapping.get_name(0)
-                system_mapping.update(xmodmap)
-                # the service now has process wide knowledge of xmodmap
-                # keys of the users session
-        except FileNotFoundError:
-            logger.error('Could not find "%s"', xmodmap_path)
+        if not self.preset_cache.load(preset, xmodmap):
+            try:
+                preset.load()
+            except FileNotFoundError as error:
+                logger.error(str(error))
+                return None
 
-        preset = Preset(preset_path)
+            self.preset_cache.store(preset, xmodmap)
 
-        try:
-            preset.load()
-        except FileNotFoundError as error:
-            logger.error(str(error))
-            return False
+        return preset
 
+    def _inject(
+        self,
+        group: _Group,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]],
+    ) -> bool:
+        """Inject the loaded preset, by reloading the running injector if possible."""
         for mapping in preset:
             # only create those uinputs that are required to avoid
             # confusing the system. Seems to be especially important with
@@ -509,13 +730,45 @@ class Daemon:
             # as the only gamepad they'll ever care about.
             global_uinputs.prepare_single(mapping.target_uinput)
 
-        if self.injectors.get(group_key) is not None:
-            self.stop_injecting(group_key)
+        injector = self.injectors.get(group.key)
+        if injector is not None and injector.can_reload(preset):
+            # keeps the devices grabbed, and doesn't need a new process
+            injector.reload_preset(preset, xmodmap)
+            self.autoload_history.forget(group.key)
+            return True
+
+        if injector is not None:
+            self.stop_injecting(group.key)
+
+        if global_config.get(["injector", "multiplex"], log_unknown=False):
+            if self.multiplexed_injector is None:
+                self.multiplexed_injector = MultiplexedInjector()
+            elif self.multiplexed_injector.exitcode is not None:
+                logger.error("The multiplexed injector stopped, starting a new one")
+                self.multiplexed_injector = MultiplexedInjector()
+
+            if self.multiplexed_injector.can_inject(preset):
+                self._add_injector(
+                    group.key,
+                    self.multiplexed_injector.start_injecting(group, preset, xmodmap),
+                )
+                return True
+
+            logger.info(
+                'Using a separate injector for "%s", because it needs uinputs that '
+                "did not exist when the multiplexed injector started",
+                group.key,
+            )
+
+        injector = self.injector_pool.take(group, preset, xmodmap)
+        if injector is not None:
+            self._add_injector(group.key, injector)
+            return True
 
         try:
             injector = Injector(group, preset)
             injector.start()
-            self.injectors[group.key] = injector
+            self._add_injector(group.key, injector)
         except OSError:
             # I think this will never happen, probably leftover from
             # some earlier version
@@ -523,12 +776,45 @@ class Daemon:
 
         return True
 
+    def _load_xmodmap(self) -> Optional[Dict[str, int]]:
+        """Read the xmodmap.json of the users session into the system_mapping.
+
+        It is a dump of the xkb mappings, to provide more human readable keys in
+        the correct keyboard layout to the service. The service cannot use
+        `xmodmap -pke` because it's running via systemd.
+        """
+        xmodmap_path = os.path.join(self.config_dir, "xmodmap.json")
+        try:
+            with open(xmodmap_path, "r") as file:
+                # do this for each injection to make sure it is up to
+                # date when the system layout changes.
+                xmodmap = json.load(file)
+                logger.debug('Using keycodes from "%s"', xmodmap_path)
+
+                # this creates the system_mapping._xmodmap, which we need to do now
+                # otherwise it might be created later which will override the changes
+                # we do here.
+                # Do we really need to lazyload in the system_mapping?
+                # this kind of bug is stupid to track down
+                system_mapping.get_name(0)
+                system_mapping.update(xmodmap)
+                # the service now has process wide knowledge of xmodmap
+                # keys of the users session
+                return xmodmap
+        except FileNotFoundError:
+            logger.error('Could not find "%s"', xmodmap_path)
+            return None
+
     def stop_all(self):
         """Stop all injections."""
         logger.info("Stopping all injections")
         for group_key in list(self.injectors.keys()):
             self.stop_injecting(group_key)
 
+    def _stop_multiplexed_injector(self) -> None:
+        if self.multiplexed_injector is not None:
+            self.multiplexed_injector.stop()
+
     def hello(self, out: str):
         """Used for tests."""
         logger.info('Received "%s" from client', out)
@@ -21,8 +21,10 @@
 """Autocompletion for the editor."""
 
 
+import functools
+import heapq
 import re
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Set, Tuple
 
 from evdev.ecodes import EV_KEY
 from gi.repository import Gdk, Gtk, GLib, GObject
@@ -48,6 +50,9 @@ FUNCTION_NAMES.remove("ifeq")
 
 Capabilities = Dict[int, List]
 
+# more can't be navigated through anyway
+MAX_SUGGESTIONS = 50
+
 
 def _get_left_text(iter_: Gtk.TextIter) -> str:
     buffer = iter_.get_buffer()
@@ -101,6 +106,67 @@ def get_incomplete_parameter(iter_: Gtk.TextIter) -> Optional[str]:
     return match[1]
 
 
+class SymbolIndex:
+    """Finds the names that contain a text, without looking at each of them.
+
+    Each name is indexed by the pairs of consecutive characters it contains.
+    Only names that contain all pairs of the text can contain the text.
+    """
+
+    def __init__(self, names: Tuple[str, ...]):
+        self._names = names
+        self._lowercase_names = [name.lower() for name in names]
+        self._names_by_bigram: Dict[str, Set[int]] = {}
+        for index, name in enumerate(self._lowercase_names):
+            for bigram in _get_bigrams(name):
+                self._names_by_bigram.setdefault(bigram, set()).add(index)
+
+    def search(self, text: str, limit: int = MAX_SUGGESTIONS) -> List[str]:
+        """Get names that contain the text, but are not the text.
+
+        Names that start with the text, or contain it close to their beginning,
+        come first. Shorter names come before longer ones.
+        """
+        text = text.lower()
+        candidate_sets = sorted(
+            (self._names_by_bigram.get(bigram, set()) for bigram in _get_bigrams(text)),
+            key=len,
+        )
+        if len(candidate_sets) == 0:
+            return []
+
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+
+        ranked = []
+        for index in candidates:
+            lowercase_name = self._lowercase_names[index]
+            position = lowercase_name.find(text)
+            if position == -1 or lowercase_name == text:
+                continue
+
+            ranked.append((position, len(lowercase_name), index))
+
+        return [self._names[index] for _, _, index in heapq.nsmallest(limit, ranked)]
+
+
+def _get_bigrams(text: str) -> Set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+@functools.lru_cache(maxsize=4)
+def _get_symbol_index(
+    codes: Optional[Tuple[int, ...]],
+    system_mapping_version: int,
+) -> SymbolIndex:
+    """Get the index of the names of the codes, or of all names.
+
+    Each target_uinput has codes of its own. The index is built again once the
+    version of the system_mapping changed.
+    """
+    names = tuple(system_mapping.list_names(codes=codes)) + (DISABLE_NAME,)
+    return SymbolIndex(names)
+
+
 def propose_symbols(text_iter: Gtk.TextIter, codes: List[int]) -> List[Tuple[str, str]]:
     """Find key names that match the input at the cursor and are mapped to the codes."""
     incomplete_name = get_incomplete_parameter(text_iter)
@@ -108,15 +174,12 @@ def propose_symbols(text_iter: Gtk.TextIter, codes: List[int]) -> List[Tuple[str
     if incomplete_name is None or len(incomplete_name) <= 1:
         return []
 
-    incomplete_name = incomplete_name.lower()
+    symbol_index = _get_symbol_index(
+        tuple(codes) if codes else None,
+        system_mapping.version,
+    )
 
-    names = list(system_mapping.list_names(codes=codes)) + [DISABLE_NAME]
-
-    return [
-        (name, name)
-        for name in names
-        if incomplete_name in name.lower() and incomplete_name != name.lower()
-    ]
+    return [(name, name) for name in symbol_index.search(incomplete_name)]
 
 
 def propose_function_names(text_iter: Gtk.TextIter) -> List[Tuple[str, str]]:
@@ -144,6 +207,11 @@ class SuggestionLabel(Gtk.Label):
         super().__init__(label=display_name)
         self.suggestion = suggestion
 
+    def set_suggestion(self, display_name: str, suggestion: str):
+        """Reuse the label for a different suggestion."""
+        self.set_label(display_name)
+        self.suggestion = suggestion
+
 
 class Autocompletion(Gtk.Popover):
     """Provide keyboard-controllable beautiful autocompletions.
@@ -365,8 +433,6 @@ class Autocompletion(Gtk.Popover):
             self.popdown()
             return
 
-        self.list_box.forall(self.list_box.remove)
-
         # move the autocompletion to the text cursor
         cursor = self.code_editor.gui.get_cursor_locations()[0]
         # convert it to window coords, because the cursor values will be very large
@@ -394,12 +460,23 @@ class Autocompletion(Gtk.Popover):
 
         self.popup()  # ffs was this hard to find
 
-        # add visible autocompletion entries
-        for suggestion, display_name in suggested_names:
+        # reuse the existing rows, creating widgets is slow
+        self.list_box.select_row(None)
+        rows = self.list_box.get_children()
+        for row in rows[len(suggested_names) :]:
+            self.list_box.remove(row)
+
+        for index, (suggestion, display_name) in enumerate(suggested_names):
+            if index < len(rows):
+                rows[index].get_children()[0].set_suggestion(display_name, suggestion)
+                continue
+
             label = SuggestionLabel(display_name, suggestion)
             self.list_box.insert(label, -1)
             label.show_all()
 
+        self.scrolled_window.get_vadjustment().set_value(0)
+
     def _update_capabilities(self):
         if self._target_uinput and self._uinputs:
             self._target_key_capabilities = self._uinputs[self._target_uinput][EV_KEY]
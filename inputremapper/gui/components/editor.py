@@ -154,32 +154,45 @@ class MappingListBox:
 
     @staticmethod
     def _sort_func(row1: MappingSelectionLabel, row2: MappingSelectionLabel) -> int:
-        """Sort alphanumerical by name."""
-        if row1.combination == InputCombination.empty_combination():
-            return 1
-        if row2.combination == InputCombination.empty_combination():
+        """Sort alphanumerical by name, and the empty mapping to the bottom."""
+        empty_combination = InputCombination.empty_combination()
+        key1 = (row1.combination == empty_combination, row1.name)
+        key2 = (row2.combination == empty_combination, row2.name)
+        if key1 == key2:
             return 0
 
-        return 0 if row1.name < row2.name else 1
+        return -1 if key1 < key2 else 1
 
     def _on_preset_changed(self, data: PresetData):
-        selection_labels = self._gui.get_children()
-        for selection_label in selection_labels:
-            selection_label.cleanup()
-            self._gui.remove(selection_label)
-
-        if not data.mappings:
-            return
-
-        for mapping in data.mappings:
+        """Update the rows that changed, and reuse those of unchanged mappings."""
+        mappings = {
+            mapping.input_combination: mapping for mapping in data.mappings or ()
+        }
+
+        changed = False
+        for selection_label in self._gui.get_children():
+            mapping = mappings.pop(selection_label.combination, None)
+            if mapping is None:
+                selection_label.cleanup()
+                self._gui.remove(selection_label)
+                changed = True
+                continue
+
+            if selection_label.set_mapping_name(mapping.format_name()):
+                changed = True
+
+        for combination, mapping in mappings.items():
             selection_label = MappingSelectionLabel(
                 self._message_broker,
                 self._controller,
                 mapping.format_name(),
-                mapping.input_combination,
+                combination,
             )
             self._gui.insert(selection_label, -1)
-        self._gui.invalidate_sort()
+            changed = True
+
+        if changed:
+            self._gui.invalidate_sort()
 
     def _on_mapping_changed(self, mapping: MappingData):
         with HandlerDisabled(self._gui, self._on_gtk_mapping_selected):
@@ -285,6 +298,18 @@ class MappingSelectionLabel(Gtk.ListBoxRow):
         self.name_input.show()
         self._controller.set_focus(self.name_input)
 
+    def set_mapping_name(self, name: Optional[str]) -> bool:
+        """Show a different name for the mapping. Returns False if it is the same."""
+        if not name:
+            name = self.combination.beautify()
+
+        if name == self.name:
+            return False
+
+        self.name = name
+        self.label.set_label(name)
+        return True
+
     def _on_mapping_changed(self, mapping: MappingData):
         if mapping.input_combination != self.combination:
             self._set_not_selected()
@@ -21,7 +21,7 @@ import glob
 import os
 import re
 import time
-from typing import Optional, List, Tuple, Set
+from typing import Callable, Optional, List, Tuple, Set
 
 import gi
 from gi.repository import GLib
@@ -90,6 +90,17 @@ class DataManager:
         self._active_mapping: Optional[UIMapping] = None
         self._active_input_config: Optional[InputConfig] = None
 
+        # callbacks that wait for an injector state, see do_when_injector_state
+        self._injector_state_callbacks: List[
+            Tuple[str, Set[InjectorState], Callable[[], None]]
+        ] = []
+        try:
+            daemon.InjectorStateChanged.connect(self._on_injector_state_changed)
+            self._injector_state_signal = True
+        except AttributeError:
+            # the service is older than the signal, ask it for the state instead
+            self._injector_state_signal = False
+
     def publish_group(self):
         """Send active group to the MessageBroker.
 
@@ -583,6 +594,10 @@ class DataManager:
 
     def do_when_injector_state(self, states: Set[InjectorState], callback):
         """Run callback once the injector state is one of states."""
+        if self._injector_state_signal:
+            self._wait_for_injector_state(states, callback)
+            return
+
         start = time.time()
 
         def do():
@@ -599,3 +614,30 @@ class DataManager:
             return True
 
         GLib.timeout_add(100, do)
+
+    def _wait_for_injector_state(self, states: Set[InjectorState], callback):
+        """Run callback once the service emits one of the states."""
+        if self.get_state() in states:
+            callback()
+            return
+
+        waiting = (self.active_group.key, states, callback)
+        self._injector_state_callbacks.append(waiting)
+
+        def give_up():
+            # something went wrong, there should have been a state long ago
+            if waiting in self._injector_state_callbacks:
+                logger.error("Timed out while waiting for injector state %s", states)
+                self._injector_state_callbacks.remove(waiting)
+
+            return False
+
+        GLib.timeout_add(3000, give_up)
+
+    def _on_injector_state_changed(self, group_key: str, state: str) -> None:
+        """Run the callbacks that wait for this state."""
+        for waiting in list(self._injector_state_callbacks):
+            waiting_group_key, states, callback = waiting
+            if waiting_group_key == group_key and InjectorState(state) in states:
+                self._injector_state_callbacks.remove(waiting)
+                callback()
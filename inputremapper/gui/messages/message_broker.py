@@ -17,9 +17,10 @@
 # You should have received a copy of the GNU General Public License
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
+import logging
 import os.path
 import re
-import traceback
+import sys
 from collections import defaultdict, deque
 from typing import (
     Callable,
@@ -29,9 +30,11 @@ from typing import (
     Tuple,
     Deque,
     Any,
+    Optional,
     TYPE_CHECKING,
 )
 
+from inputremapper.gui.messages.message_data import CombinationUpdate, StatusData
 from inputremapper.gui.messages.message_types import MessageType
 from inputremapper.logger import logger
 
@@ -49,6 +52,36 @@ class Message(Protocol):
 
 # useful type aliases
 MessageListener = Callable[[Any], None]
+MessageMerger = Callable[[Any, Any], Optional[Any]]
+
+
+def _merge_combination_updates(
+    pending: CombinationUpdate,
+    data: CombinationUpdate,
+) -> Optional[CombinationUpdate]:
+    if pending.new_combination != data.old_combination:
+        return None
+
+    return CombinationUpdate(pending.old_combination, data.new_combination)
+
+
+def _merge_status_messages(
+    pending: StatusData,
+    data: StatusData,
+) -> Optional[StatusData]:
+    if pending.ctx_id != data.ctx_id:
+        return None
+
+    # the status bar only shows the latest message anyway
+    return data
+
+
+# How to combine a message with an identical type that is still waiting to be sent,
+# for messages that are frequently published. None if they can't be combined.
+MESSAGE_MERGERS: Dict[MessageType, MessageMerger] = {
+    MessageType.combination_update: _merge_combination_updates,
+    MessageType.status_msg: _merge_status_messages,
+}
 
 
 class MessageBroker:
@@ -56,27 +89,54 @@ class MessageBroker:
 
     def __init__(self):
         self._listeners: Dict[MessageType, Set[MessageListener]] = defaultdict(set)
+        # immutable copies of self._listeners, so that listeners can unsubscribe
+        # while a message is being sent. Dropped when the listeners change.
+        self._listener_snapshots: Dict[MessageType, Tuple[MessageListener, ...]] = {}
         self._messages: Deque[Tuple[Message, str, int]] = deque()
         self._publishing = False
 
     def publish(self, data: Message):
         """Schedule a massage to be sent.
         The message will be sent after all currently pending messages are sent."""
-        self._messages.append((data, *self.get_caller()))
+        self._schedule(data)
         self._publish_all()
 
     def signal(self, signal: MessageType):
         """Send a signal without any data payload."""
-        # This is different from calling self.publish because self.get_caller()
-        # looks back at the current stack 3 frames
-        self._messages.append((Signal(signal), *self.get_caller()))
+        self._schedule(Signal(signal))
         self._publish_all()
 
+    def _schedule(self, data: Message):
+        """Add the message to the queue, or merge it with the latest pending one."""
+        if logger.isEnabledFor(logging.DEBUG):
+            # the caller of publish or signal
+            file, line = self.get_caller(4)
+        else:
+            file, line = "", 0
+
+        if self._messages:
+            pending, *_ = self._messages[-1]
+            merge = MESSAGE_MERGERS.get(data.message_type)
+            if merge is not None and pending.message_type == data.message_type:
+                merged = merge(pending, data)
+                if merged is not None:
+                    self._messages[-1] = (merged, file, line)
+                    return
+
+        self._messages.append((data, file, line))
+
     def _publish(self, data: Message, file: str, line: int):
-        logger.debug(
-            "from %s:%d: Signal=%s: %s", file, line, data.message_type.name, data
-        )
-        for listener in self._listeners[data.message_type].copy():
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "from %s:%d: Signal=%s: %s", file, line, data.message_type.name, data
+            )
+
+        listeners = self._listener_snapshots.get(data.message_type)
+        if listeners is None:
+            listeners = tuple(self._listeners[data.message_type])
+            self._listener_snapshots[data.message_type] = listeners
+
+        for listener in listeners:
             listener(data)
 
     def _publish_all(self):
@@ -96,18 +156,20 @@ class MessageBroker:
         """Attach a listener to an event."""
         logger.debug("adding new Listener for %s: %s", massage_type, listener)
         self._listeners[massage_type].add(listener)
+        self._listener_snapshots.pop(massage_type, None)
         return self
 
     @staticmethod
     def get_caller(position: int = 3) -> Tuple[str, int]:
         """Extract a file and line from current stack and format for logging."""
-        tb = traceback.extract_stack(limit=position)[0]
-        return os.path.basename(tb.filename), tb.lineno or 0
+        frame = sys._getframe(position - 1)
+        return os.path.basename(frame.f_code.co_filename), frame.f_lineno or 0
 
     def unsubscribe(self, listener: MessageListener) -> None:
-        for listeners in self._listeners.values():
+        for message_type, listeners in self._listeners.items():
             try:
                 listeners.remove(listener)
+                self._listener_snapshots.pop(message_type, None)
             except KeyError:
                 pass
 
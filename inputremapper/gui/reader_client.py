@@ -34,7 +34,6 @@ from gi.repository import GLib
 from inputremapper.configs.input_config import InputCombination
 from inputremapper.groups import _Groups, _Group
 from inputremapper.gui.reader_service import (
-    MSG_EVENT,
     MSG_GROUPS,
     CMD_TERMINATE,
     CMD_REFRESH_GROUPS,
@@ -140,17 +139,11 @@ class ReaderClient:
 
             logger.debug("received %s", message)
 
-            message_type = message["type"]
-            message_body = message["message"]
-
-            if message_type == MSG_GROUPS:
-                self._update_groups(message_body)
-
-            if message_type == MSG_EVENT:
+            if isinstance(message, InputEvent):
                 # update the generator
                 try:
                     if self._recording_generator is not None:
-                        self._recording_generator.send(InputEvent(**message_body))
+                        self._recording_generator.send(message)
                     else:
                         # the ReaderService should only send events while the gui
                         # is recording, so this is unexpected.
@@ -161,6 +154,11 @@ class ReaderClient:
                     self.stop_recorder()
                     break
 
+                continue
+
+            if message["type"] == MSG_GROUPS:
+                self._update_groups(message["message"])
+
         return True
 
     def start_recorder(self) -> None:
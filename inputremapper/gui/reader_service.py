@@ -46,12 +46,13 @@ import subprocess
 import sys
 import time
 from collections import defaultdict
-from typing import Set, List
+from typing import Set, List, Dict, Hashable, Optional
 
 import evdev
 from evdev.ecodes import EV_KEY, EV_ABS, EV_REL, REL_HWHEEL, REL_WHEEL
 from inputremapper.utils import get_device_hash
 
+from inputremapper.configs.global_config import global_config
 from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.configs.mapping import Mapping
 from inputremapper.groups import _Groups, _Group
@@ -73,9 +74,8 @@ CMD_TERMINATE = "terminate"
 CMD_STOP_READING = "stop-reading"
 CMD_REFRESH_GROUPS = "refresh_groups"
 
-# sent by the reader-service to the reader
+# sent by the reader-service to the reader. Events are sent as InputEvents.
 MSG_GROUPS = "groups"
-MSG_EVENT = "event"
 MSG_STATUS = "status"
 
 
@@ -113,6 +113,12 @@ class ReaderService:
     _maximum_lifetime: int = 60 * 15
     _timeout_tolerance: int = 60
 
+    # Events for the frontend are collected for this many milliseconds and then sent
+    # together, unless configured otherwise in the global config. The frontend only
+    # reads every 30ms anyway. Moving a joystick won't flood the frontend with
+    # events this way.
+    _default_event_batch_window_ms: float = 30
+
     def __init__(self, groups: _Groups):
         """Construct the reader-service and initialize its communication pipes."""
         self._start_time = time.time()
@@ -121,11 +127,41 @@ class ReaderService:
         self._commands_pipe = Pipe(get_pipe_paths()[1])
         self._pipe = multiprocessing.Pipe()
 
+        self._event_batch = UIEventBatch(
+            self._results_pipe,
+            self._get_event_batch_window(),
+        )
+
         self._tasks: Set[asyncio.Task] = set()
         self._stop_event = asyncio.Event()
 
         self._results_pipe.send({"type": MSG_STATUS, "message": "ready"})
 
+    @classmethod
+    def _get_event_batch_window(cls) -> float:
+        """Read how many seconds events are collected from the global config."""
+        window_ms = global_config.get(
+            ["reader", "event_batch_window_ms"],
+            log_unknown=False,
+        )
+        if window_ms is None:
+            window_ms = cls._default_event_batch_window_ms
+
+        try:
+            window = float(window_ms) / 1000
+        except (TypeError, ValueError):
+            window = -1
+
+        if window < 0:
+            logger.error(
+                'Invalid event_batch_window_ms "%s", using %sms',
+                window_ms,
+                cls._default_event_batch_window_ms,
+            )
+            window = cls._default_event_batch_window_ms / 1000
+
+        return window
+
     @staticmethod
     def is_running():
         """Check if the reader-service is running."""
@@ -257,6 +293,8 @@ class ReaderService:
             await asyncio.gather(*self._tasks)
         self._tasks = set()
         self._stop_event.clear()
+        # the frontend isn't interested in those anymore
+        self._event_batch.clear()
 
     def _create_event_pipeline(self, sources: List[evdev.InputDevice]) -> ContextDummy:
         """Create a custom event pipeline for each event code in the capabilities.
@@ -274,7 +312,7 @@ class ReaderService:
                     type=EV_KEY, code=ev_code, origin_hash=device_hash
                 )
                 context_dummy.add_handler(
-                    input_config, ForwardToUIHandler(self._results_pipe)
+                    input_config, ForwardToUIHandler(self._event_batch)
                 )
 
             for ev_code in capabilities.get(EV_ABS) or ():
@@ -293,7 +331,7 @@ class ReaderService:
                 handler: MappingHandler = AbsToBtnHandler(
                     InputCombination([input_config]), mapping
                 )
-                handler.set_sub_handler(ForwardToUIHandler(self._results_pipe))
+                handler.set_sub_handler(ForwardToUIHandler(self._event_batch))
                 context_dummy.add_handler(input_config, handler)
 
                 # negative direction
@@ -304,7 +342,7 @@ class ReaderService:
                     output_symbol="KEY_A",
                 )
                 handler = AbsToBtnHandler(InputCombination([input_config]), mapping)
-                handler.set_sub_handler(ForwardToUIHandler(self._results_pipe))
+                handler.set_sub_handler(ForwardToUIHandler(self._event_batch))
                 context_dummy.add_handler(input_config, handler)
 
             for ev_code in capabilities.get(EV_REL) or ():
@@ -323,7 +361,7 @@ class ReaderService:
                     force_release_timeout=True,
                 )
                 handler = RelToBtnHandler(InputCombination([input_config]), mapping)
-                handler.set_sub_handler(ForwardToUIHandler(self._results_pipe))
+                handler.set_sub_handler(ForwardToUIHandler(self._event_batch))
                 context_dummy.add_handler(input_config, handler)
 
                 # negative direction
@@ -338,7 +376,7 @@ class ReaderService:
                     force_release_timeout=True,
                 )
                 handler = RelToBtnHandler(InputCombination([input_config]), mapping)
-                handler.set_sub_handler(ForwardToUIHandler(self._results_pipe))
+                handler.set_sub_handler(ForwardToUIHandler(self._event_batch))
                 context_dummy.add_handler(input_config, handler)
 
         return context_dummy
@@ -372,11 +410,67 @@ class ContextDummy:
         return self.forward_dummy
 
 
+class UIEventBatch:
+    """Collects events for the frontend, and sends them together into the pipe.
+
+    An event is sent right away, unless the previous batch was sent less than a
+    window ago. Until the window passed, repeated events of each input are only
+    sent once. Events of the same input with a different value are never merged,
+    like a press and a release, or an axis that moved to the other side.
+    """
+
+    def __init__(self, pipe: Pipe, window: float):
+        self._pipe = pipe
+        self._window = window
+        self._pending: Dict[Hashable, InputEvent] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._last_sent = 0.0
+
+    def add(self, event: InputEvent):
+        """Send the event with the next batch."""
+        pending = self._pending.get(event.input_match_hash)
+        if pending is not None and pending.value != event.value:
+            # send the previous state first, to keep the order of events
+            self.send()
+
+        self._pending[event.input_match_hash] = event
+
+        if self._timer is not None:
+            # will be sent when the window passed
+            return
+
+        delay = self._last_sent + self._window - time.monotonic()
+        if delay <= 0:
+            self.send()
+            return
+
+        self._timer = asyncio.get_running_loop().call_later(delay, self.send)
+
+    def send(self):
+        """Send all collected events."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if len(self._pending) > 0:
+            self._pipe.send_events(self._pending.values())
+            self._pending.clear()
+            self._last_sent = time.monotonic()
+
+    def clear(self):
+        """Forget the collected events without sending them."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._pending.clear()
+
+
 class ForwardToUIHandler:
-    """Implements the InputEventHandler protocol. Sends all events into the pipe."""
+    """Implements the InputEventHandler protocol. Sends all events to the frontend."""
 
-    def __init__(self, pipe: Pipe):
-        self.pipe = pipe
+    def __init__(self, event_batch: UIEventBatch):
+        self.event_batch = event_batch
         self._last_event = InputEvent.from_tuple((99, 99, 99))
 
     def notify(
@@ -392,19 +486,7 @@ class ForwardToUIHandler:
                 event = event.modify(value=-1)
 
             logger.debug("Sending to %s frontend", event)
-            self.pipe.send(
-                {
-                    "type": MSG_EVENT,
-                    "message": {
-                        "sec": event.sec,
-                        "usec": event.usec,
-                        "type": event.type,
-                        "code": event.code,
-                        "value": event.value,
-                        "origin_hash": event.origin_hash,
-                    },
-                }
-            )
+            self.event_batch.add(event)
         return True
 
     def reset(self):
@@ -23,7 +23,7 @@
 import asyncio
 import os
 import traceback
-from typing import AsyncIterator, Protocol, Set, List
+from typing import AsyncIterator, Awaitable, Callable, Protocol, Set, List, Optional
 
 import evdev
 
@@ -49,6 +49,10 @@ class Context(Protocol):
         ...
 
 
+# waits for the unplugged device to appear again, and returns it grabbed
+ReplugCallback = Callable[[DeviceHash], Awaitable[Optional[evdev.InputDevice]]]
+
+
 class EventReader:
     """Reads input events from a single device and distributes them.
 
@@ -65,6 +69,7 @@ class EventReader:
         context: Context,
         source: evdev.InputDevice,
         stop_event: asyncio.Event,
+        replug_callback: Optional[ReplugCallback] = None,
     ) -> None:
         """Initialize all mapping_handlers
 
@@ -72,9 +77,13 @@ class EventReader:
         ----------
         source
             where to read keycodes from
+        replug_callback
+            if the source is unplugged, continue reading from the device it returns
         """
         self._device_hash = get_device_hash(source)
         self._source = source
+        self._replug_callback = replug_callback
+        self._unplugged = False
         self.context = context
         self.stop_event = stop_event
 
@@ -100,6 +109,7 @@ class EventReader:
                 # usage because events_ready.set is called repeatedly forever,
                 # while read_loop will hang at self._source.read_one().
                 logger.error("fd broke, was the device unplugged?")
+                self._unplugged = True
 
             if stop_task.done() or fd_broken:
                 for task in pending:
@@ -188,20 +198,34 @@ class EventReader:
         Can be stopped by stopping the asyncio loop or by setting the stop_event.
         This loop reads events from a single device only.
         """
-        logger.debug(
-            "Starting to listen for events from %s, fd %s",
-            self._source.path,
-            self._source.fd,
-        )
-
-        async for event in self.read_loop():
-            try:
-                await self.handle(
-                    InputEvent.from_event(event, origin_hash=self._device_hash)
-                )
-            except Exception as e:
-                logger.error("Handling event %s failed: %s", event, e)
-                traceback.print_exception(e)
-
-        self.context.reset()
+        while True:
+            logger.debug(
+                "Starting to listen for events from %s, fd %s",
+                self._source.path,
+                self._source.fd,
+            )
+
+            async for event in self.read_loop():
+                try:
+                    await self.handle(
+                        InputEvent.from_event(event, origin_hash=self._device_hash)
+                    )
+                except Exception as e:
+                    logger.error("Handling event %s failed: %s", event, e)
+                    traceback.print_exception(e)
+
+            # release everything that is held down, while the device is gone
+            self.context.reset()
+
+            if not self._unplugged or self._replug_callback is None:
+                break
+
+            self._unplugged = False
+            source = await self._replug_callback(self._device_hash)
+            if source is None or self.stop_event.is_set():
+                break
+
+            logger.info("Resuming to read from %s", source.path)
+            self._source = source
+
         logger.info("read loop for %s stopped", self._source.path)
@@ -17,7 +17,7 @@
 # You should have received a copy of the GNU General Public License
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
-from typing import Dict, Union, Tuple, Optional, List
+from typing import Dict, Union, Tuple, Optional, List, FrozenSet
 
 import evdev
 
@@ -59,19 +59,45 @@ DEFAULT_UINPUTS["keyboard + mouse"] = {
 }
 
 
+# maps uinput names to the codes of each event type they are capable of
+DefaultUInputCodes = Dict[str, Dict[int, FrozenSet[int]]]
+
+# maps (type, code) to the names of the uinputs that can emit it
+DefaultUInputsByEvent = Dict[Tuple[int, int], Tuple[str, ...]]
+
+
+def _index_default_uinputs() -> Tuple[DefaultUInputCodes, DefaultUInputsByEvent]:
+    """Index the codes of each default uinput, and the uinputs of each event."""
+    codes_by_uinput: DefaultUInputCodes = {}
+    uinputs_by_event: DefaultUInputsByEvent = {}
+    for name, capabilities in DEFAULT_UINPUTS.items():
+        codes_by_uinput[name] = {}
+        for type_, entries in capabilities.items():
+            # EV_ABS capabilities are (code, AbsInfo) tuples
+            codes = frozenset(
+                entry[0] if isinstance(entry, tuple) else entry for entry in entries
+            )
+            codes_by_uinput[name][type_] = codes
+            for code in codes:
+                event = (type_, code)
+                uinputs_by_event[event] = (*uinputs_by_event.get(event, ()), name)
+
+    return codes_by_uinput, uinputs_by_event
+
+
+# the lists in DEFAULT_UINPUTS are long, look events up in those indexes instead
+_default_uinput_codes, _default_uinputs_by_event = _index_default_uinputs()
+
+
 def can_default_uinput_emit(target: str, type_: int, code: int) -> bool:
     """Check if the uinput with the target name is capable of the event."""
-    capabilities = DEFAULT_UINPUTS.get(target, {}).get(type_)
-    return capabilities is not None and code in capabilities
+    codes = _default_uinput_codes.get(target, {}).get(type_)
+    return codes is not None and code in codes
 
 
 def find_fitting_default_uinputs(type_: int, code: int) -> List[str]:
     """Find the names of default uinputs that are able to emit this event."""
-    return [
-        uinput
-        for uinput in DEFAULT_UINPUTS
-        if code in DEFAULT_UINPUTS[uinput].get(type_, [])
-    ]
+    return list(_default_uinputs_by_event.get((type_, code), ()))
 
 
 class UInput(evdev.UInput):
@@ -81,15 +107,18 @@ class UInput(evdev.UInput):
         super().__init__(*args, **kwargs)
 
         # this will never change, so we cache it since evdev runs an expensive loop to
-        # gather the capabilities. (can_emit is called regularly)
-        self._capabilities_cache = self.capabilities(absinfo=False)
+        # gather the capabilities. (can_emit is called for each written event)
+        self._capabilities_cache = {
+            type_: frozenset(codes)
+            for type_, codes in self.capabilities(absinfo=False).items()
+        }
 
     def can_emit(self, event: Tuple[int, int, int]):
         """Check if an event can be emitted by the UIinput.
 
         Wrong events might be injected if the group mappings are wrong,
         """
-        return event[1] in self._capabilities_cache.get(event[0], [])
+        return event[1] in self._capabilities_cache.get(event[0], ())
 
 
 class FrontendUInput:
@@ -29,12 +29,15 @@ import time
 from collections import defaultdict
 from dataclasses import dataclass
 from multiprocessing.connection import Connection
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Coroutine, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 
 import evdev
 
+from inputremapper.configs.global_config import global_config
 from inputremapper.configs.input_config import InputCombination, InputConfig, DeviceHash
+from inputremapper.configs.mapping import Mapping
 from inputremapper.configs.preset import Preset
+from inputremapper.configs.system_mapping import system_mapping
 from inputremapper.groups import (
     _Group,
     classify,
@@ -43,7 +46,9 @@ from inputremapper.groups import (
 from inputremapper.gui.messages.message_broker import MessageType
 from inputremapper.injection.context import Context
 from inputremapper.injection.event_reader import EventReader
-from inputremapper.injection.numlock import set_numlock, is_numlock_on, ensure_numlock
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.injection.scheduling import SchedulingPolicy, apply_scheduling
+from inputremapper.injection.numlock import get_numlock_led, restore_numlock
 from inputremapper.logger import logger
 from inputremapper.utils import get_device_hash
 
@@ -51,10 +56,20 @@ CapabilitiesDict = Dict[int, List[int]]
 
 DEV_NAME = "input-remapper"
 
+# how long to wait for an unplugged device to appear again, by default
+DEFAULT_REPLUG_TIMEOUT = 5
+REPLUG_POLL_INTERVAL = 0.1
+# If the device is unplugged again within this time after it reappeared, it is not
+# waited for anymore. Unplugging a device twice stops its injection, in case the
+# preset makes it unusable. Like AutoloadHistory, which then doesn't autoload again.
+REPLUG_ESCAPE_TIME = 15
+
 
 # messages sent to the injector process
 class InjectorCommand(str, enum.Enum):
     CLOSE = "CLOSE"
+    START = "START"
+    RELOAD_PRESET = "RELOAD_PRESET"
 
 
 # messages the injector process reports back to the service
@@ -100,49 +115,147 @@ class InjectorStateMessage:
         return self.state in [InjectorState.STOPPED, InjectorState.NO_GRAB]
 
 
+@dataclass(frozen=True)
+class GrabResult:
+    """How grabbing a device of the group went, reported to the service."""
+
+    path: str
+    grabbed: bool
+    attempts: int
+    duration: float
+
+
+@dataclass(frozen=True)
+class InjectorPresetMessage:
+    """Tells a running injector process what to inject.
+
+    The mappings are pickled as they are, so the injector process doesn't need to
+    read and validate the preset again.
+    """
+
+    command: InjectorCommand
+    group: str
+    preset_path: Optional[str]
+    mappings: List[Mapping]
+    xmodmap: Optional[Dict[str, int]] = None
+    scheduling: Optional[SchedulingPolicy] = None
+
+    @classmethod
+    def create(
+        cls,
+        command: InjectorCommand,
+        group: _Group,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+        scheduling: Optional[SchedulingPolicy] = None,
+    ) -> InjectorPresetMessage:
+        mappings = []
+        for mapping in preset:
+            # the callback belongs to the preset of this process, don't pickle it
+            mapping = mapping.copy()
+            mapping.remove_combination_changed_callback()
+            mappings.append(mapping)
+
+        path = str(preset.path) if preset.path is not None else None
+        return cls(command, group.dumps(), path, mappings, xmodmap, scheduling)
+
+    def get_group(self) -> _Group:
+        return _Group.loads(self.group)
+
+    def get_preset(self) -> Preset:
+        preset = Preset(self.preset_path)
+        for mapping in self.mappings:
+            preset.add(mapping)
+
+        return preset
+
+
 class Injector(multiprocessing.Process):
     """Initializes, starts and stops injections.
 
     Is a process to make it non-blocking for the rest of the code and to
     make running multiple injector easier. There is one process per
     hardware-device that is being mapped.
+
+    If constructed without group and preset, the process can be started in
+    advance. It then waits until `assign` tells it what to inject.
     """
 
-    group: _Group
-    preset: Preset
+    group: Optional[_Group]
+    preset: Optional[Preset]
     context: Optional[Context]
+    known_uinputs: FrozenSet[str]
+    scheduling: SchedulingPolicy
+    effective_scheduling: Optional[SchedulingPolicy]
     _devices: List[evdev.InputDevice]
+    _sources: Dict[DeviceHash, evdev.InputDevice]
+    _forward_devices: Dict[DeviceHash, evdev.UInput]
     _state: InjectorState
     _msg_pipe: Tuple[Connection, Connection]
     _event_readers: List[EventReader]
     _stop_event: asyncio.Event
+    _replugged_at: Dict[DeviceHash, float]
+    grab_results: Dict[str, GrabResult]
 
+    # Failed grabs are retried after regrab_timeout / 4 seconds, waiting twice as
+    # long before each further attempt, until regrab_timeout * 10 seconds passed.
     regrab_timeout = 0.2
 
-    def __init__(self, group: _Group, preset: Preset) -> None:
+    def __init__(
+        self,
+        group: Optional[_Group] = None,
+        preset: Optional[Preset] = None,
+        msg_pipe: Optional[Tuple[Connection, Connection]] = None,
+    ) -> None:
         """
 
         Parameters
         ----------
         group
-            the device group
+            the device group, or None for a warm injector
+        preset
+            the preset to inject, or None for a warm injector
+        msg_pipe
+            an existing pipe to report to, instead of creating a new one
         """
         self.group = group
         self._state = InjectorState.UNKNOWN
 
         # used to interact with the parts of this class that are running within
         # the new process
-        self._msg_pipe = multiprocessing.Pipe()
+        self._msg_pipe = msg_pipe if msg_pipe is not None else multiprocessing.Pipe()
 
         self.preset = preset
         self.context = None  # only needed inside the injection process
 
+        # the global uinputs the process inherited when it was started
+        self.known_uinputs = frozenset()
+
+        # what the config asks for, and what the process actually got
+        self.scheduling = (
+            SchedulingPolicy.from_config(group.key)
+            if group is not None
+            else SchedulingPolicy()
+        )
+        self.effective_scheduling = None
+
+        # how grabbing each device went, by path
+        self.grab_results = {}
+
+        self._sources = {}
+        self._forward_devices = {}
         self._event_readers = []
+        self._replugged_at = {}
 
-        super().__init__(name=group.key)
+        super().__init__(name=group.key if group is not None else None)
 
     """Functions to interact with the running process."""
 
+    def start(self) -> None:
+        """Start the process, which inherits all existing global uinputs."""
+        self.known_uinputs = frozenset(global_uinputs.devices.keys())
+        super().start()
+
     def get_state(self) -> InjectorState:
         """Get the state of the injection.
 
@@ -151,7 +264,16 @@ class Injector(multiprocessing.Process):
         # before we try to we try to guess anything lets check if there is a message
         state = self._state
         while self._msg_pipe[1].poll():
-            state = self._msg_pipe[1].recv()
+            msg = self._msg_pipe[1].recv()
+            if isinstance(msg, SchedulingPolicy):
+                self.effective_scheduling = msg
+                continue
+
+            if isinstance(msg, GrabResult):
+                self.grab_results[msg.path] = msg
+                continue
+
+            state = msg
 
         # figure out what is going on step by step
         alive = self.is_alive()
@@ -179,7 +301,69 @@ class Injector(multiprocessing.Process):
         self._state = state
         return self._state
 
-    @ensure_numlock
+    def assign(
+        self,
+        group: _Group,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Tell a warm injector what to inject.
+
+        Can be safely called from the main process.
+
+        Parameters
+        ----------
+        xmodmap
+            The process has been forked before the service knew about the current
+            keyboard layout, so it is sent along with the preset.
+        """
+        self.group = group
+        self.preset = preset
+        self.name = group.key
+        self.scheduling = SchedulingPolicy.from_config(group.key)
+        self._msg_pipe[1].send(
+            InjectorPresetMessage.create(
+                InjectorCommand.START,
+                group,
+                preset,
+                xmodmap,
+                self.scheduling,
+            )
+        )
+
+    def can_reload(self, preset: Preset) -> bool:
+        """Check if the preset can be injected by the running process.
+
+        Can be safely called from the main process.
+        """
+        if self.get_state() != InjectorState.RUNNING:
+            return False
+
+        # uinputs that were created after the process started are unknown to it
+        required_uinputs = {mapping.target_uinput for mapping in preset}
+        return required_uinputs.issubset(self.known_uinputs)
+
+    def reload_preset(
+        self,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Replace the injected preset without releasing the grabbed devices.
+
+        Can be safely called from the main process. Make sure to check
+        `can_reload` first.
+        """
+        logger.info('Reloading the preset for group "%s"', self.group.key)
+        self.preset = preset
+        self._msg_pipe[1].send(
+            InjectorPresetMessage.create(
+                InjectorCommand.RELOAD_PRESET,
+                self.group,
+                preset,
+                xmodmap,
+            )
+        )
+
     def stop_injecting(self) -> None:
         """Stop injecting keycodes.
 
@@ -190,6 +374,23 @@ class Injector(multiprocessing.Process):
 
     """Process internal stuff."""
 
+    def _receive_preset(self) -> bool:
+        """Block until the group and preset arrive. Return False to stop instead."""
+        msg = self._msg_pipe[0].recv()
+        if not isinstance(msg, InjectorPresetMessage):
+            logger.debug("Warm injector received %s before a preset, stopping", msg)
+            return False
+
+        if msg.xmodmap is not None:
+            system_mapping.update(msg.xmodmap)
+
+        if msg.scheduling is not None:
+            self.scheduling = msg.scheduling
+
+        self.group = msg.get_group()
+        self.preset = msg.get_preset()
+        return True
+
     def _find_input_device(
         self, input_config: InputConfig
     ) -> Optional[evdev.InputDevice]:
@@ -236,8 +437,17 @@ class Injector(multiprocessing.Process):
         logger.error(f"Could not find input for {input_config}")
         return None
 
-    def _grab_devices(self) -> Dict[DeviceHash, evdev.InputDevice]:
+    async def _grab_devices(self) -> Dict[DeviceHash, evdev.InputDevice]:
         """Grab all InputDevices that match a mappings' origin_hash."""
+        devices = await asyncio.gather(
+            *[self._grab_device(device) for device in self._find_needed_devices()]
+        )
+        return {
+            get_device_hash(device): device for device in devices if device is not None
+        }
+
+    def _find_needed_devices(self) -> List[evdev.InputDevice]:
+        """Find all InputDevices that match a mappings' origin_hash."""
         # use a dict because the InputDevice is not directly hashable
         needed_devices = {}
         input_configs = set()
@@ -255,12 +465,7 @@ class Injector(multiprocessing.Process):
                 continue
             needed_devices[device.path] = device
 
-        grabbed_devices = {}
-        for device in needed_devices.values():
-            if device := self._grab_device(device):
-                grabbed_devices[get_device_hash(device)] = device
-
-        return grabbed_devices
+        return list(needed_devices.values())
 
     def _update_preset(self):
         """Update all InputConfigs in the preset to include correct origin_hash
@@ -285,27 +490,59 @@ class Injector(multiprocessing.Process):
                 combination[idx] = combination[idx].modify(origin_hash=device_hash)
                 mapping.input_combination = combination
 
-    def _grab_device(self, device: evdev.InputDevice) -> Optional[evdev.InputDevice]:
+    async def _grab_device(
+        self,
+        device: evdev.InputDevice,
+    ) -> Optional[evdev.InputDevice]:
         """Try to grab the device, return None if not possible.
 
         Without grab, original events from it would reach the display server
         even though they are mapped.
         """
+        start = time.time()
+        deadline = start + self.regrab_timeout * 10
+        delay = self.regrab_timeout / 4
+        attempts = 0
         error = None
-        for attempt in range(10):
+        while not self._stop_event.is_set():
+            attempts += 1
             try:
                 device.grab()
                 logger.debug("Grab %s", device.path)
+                self._report_grab_result(
+                    GrabResult(device.path, True, attempts, time.time() - start)
+                )
                 return device
             except IOError as err:
                 # it might take a little time until the device is free if
                 # it was previously grabbed.
                 error = err
-                logger.debug("Failed attempts to grab %s: %d", device.path, attempt + 1)
-                time.sleep(self.regrab_timeout)
+                logger.debug("Failed attempts to grab %s: %d", device.path, attempts)
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+
+            try:
+                # don't keep on trying if the injection is stopped meanwhile
+                await asyncio.wait_for(
+                    self._stop_event.wait(),
+                    timeout=min(delay, remaining),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            delay *= 2
+
+        if self._stop_event.is_set():
+            logger.debug("Stopped trying to grab %s", device.path)
+            return None
 
         logger.error("Cannot grab %s, it is possibly in use", device.path)
         logger.error(str(error))
+        self._report_grab_result(
+            GrabResult(device.path, False, attempts, time.time() - start)
+        )
         return None
 
     @staticmethod
@@ -340,19 +577,203 @@ class Injector(multiprocessing.Process):
             await frame_available.wait()
             frame_available.clear()
             msg = self._msg_pipe[0].recv()
+            if isinstance(msg, InjectorPresetMessage):
+                if msg.command == InjectorCommand.RELOAD_PRESET:
+                    if not await self._reload_preset(msg):
+                        # don't keep injecting a preset that the main process
+                        # doesn't know about anymore
+                        await self._stop_loop(InjectorState.FAILED)
+                        return
+                continue
+
             if msg == InjectorCommand.CLOSE:
                 logger.debug("Received close signal")
-                self._stop_event.set()
-                # give the event pipeline some time to reset devices
-                # before shutting the loop down
-                await asyncio.sleep(0.1)
-
-                # stop the event loop and cause the process to reach its end
-                # cleanly. Using .terminate prevents coverage from working.
-                loop.stop()
-                self._msg_pipe[0].send(InjectorState.STOPPED)
+                await self._stop_loop(InjectorState.STOPPED)
                 return
 
+    async def _stop_loop(self, state: InjectorState) -> None:
+        """Stop the injection and report the final state."""
+        self._stop_event.set()
+        # give the event pipeline some time to reset devices
+        # before shutting the loop down
+        await asyncio.sleep(0.1)
+
+        # stop the event loop and cause the process to reach its end
+        # cleanly. Using .terminate prevents coverage from working.
+        asyncio.get_event_loop().stop()
+        self._report_state(state)
+
+    def get_state_fds(self) -> List[int]:
+        """File descriptors that become readable when the state might have changed.
+
+        Can be safely called from the main process once the process started.
+        """
+        return [self._msg_pipe[1].fileno(), self.sentinel]
+
+    def _report_state(self, state: InjectorState) -> None:
+        """Tell the main process about the state of the injection."""
+        self._msg_pipe[0].send(state)
+
+    def _report_grab_result(self, grab_result: GrabResult) -> None:
+        """Tell the main process how grabbing a device went."""
+        self._msg_pipe[0].send(grab_result)
+
+    async def _reload_preset(self, msg: InjectorPresetMessage) -> bool:
+        """Swap the context for one of the new preset, while the grab stays active.
+
+        Once the devices that only the new preset needs are grabbed, nothing awaits
+        anymore, so no event is processed while the event readers switch over to the
+        new context. Returns False if the new preset can't be injected, in which case
+        everything that was acquired for it is released again.
+        """
+        logger.info('Reloading the preset for "%s"', self.group.key)
+        if msg.xmodmap is not None:
+            system_mapping.update(msg.xmodmap)
+
+        previous_preset = self.preset
+        self.preset = msg.get_preset()
+        self._update_preset()
+
+        # the previous preset didn't need those devices
+        grabbed_devices = await asyncio.gather(
+            *[
+                self._grab_device(device)
+                for device in self._find_needed_devices()
+                if get_device_hash(device) not in self._sources
+            ]
+        )
+        new_sources = {
+            get_device_hash(device): device
+            for device in grabbed_devices
+            if device is not None
+        }
+
+        try:
+            for device_hash, device in new_sources.items():
+                self._forward_devices[device_hash] = self._create_forwarding_device(
+                    device
+                )
+
+            # the dicts are shared with the context and the event readers
+            self._sources.update(new_sources)
+            context = Context(self.preset, self._sources, self._forward_devices)
+        except Exception as error:
+            logger.error("Failed to reload the preset: %s", error)
+            self.preset = previous_preset
+            self._release_new_devices(new_sources)
+            return False
+
+        new_readers = [
+            EventReader(context, device, self._stop_event, self._wait_for_replug)
+            for device in new_sources.values()
+        ]
+
+        previous_context = self.context
+        self.context = context
+        for event_reader in self._event_readers:
+            event_reader.context = context
+
+        # release everything that the previous preset is still holding down
+        previous_context.reset()
+
+        for event_reader in new_readers:
+            self._event_readers.append(event_reader)
+            asyncio.ensure_future(event_reader.run())
+
+        self._report_state(InjectorState.RUNNING)
+        return True
+
+    def _release_new_devices(
+        self,
+        new_sources: Dict[DeviceHash, evdev.InputDevice],
+    ) -> None:
+        """Undo grabbing and forwarding the devices of a preset that failed."""
+        for device_hash, device in new_sources.items():
+            self._sources.pop(device_hash, None)
+            forward_device = self._forward_devices.pop(device_hash, None)
+            if forward_device is not None:
+                forward_device.close()
+
+            try:
+                device.ungrab()
+            except OSError as error:
+                logger.debug("Failed to ungrab %s: %s", device.path, error)
+
+            device.close()
+
+    async def _wait_for_replug(
+        self,
+        device_hash: DeviceHash,
+    ) -> Optional[evdev.InputDevice]:
+        """Wait for the unplugged device to appear again, and grab it.
+
+        The context and the uinputs stay as they are, so the injection continues
+        without starting over. Returns None if the device doesn't appear in time.
+        """
+        timeout = global_config.get(["injector", "replug_timeout"], log_unknown=False)
+        if timeout is None:
+            timeout = DEFAULT_REPLUG_TIMEOUT
+
+        if not timeout:
+            return None
+
+        if time.time() - self._replugged_at.get(device_hash, 0) < REPLUG_ESCAPE_TIME:
+            logger.info("The device was unplugged again, not waiting for it")
+            return None
+
+        logger.info("Waiting %ss for the device to be plugged in again", timeout)
+
+        unplugged_device = self._sources.get(device_hash)
+        if unplugged_device is not None:
+            try:
+                unplugged_device.close()
+            except OSError as error:
+                logger.debug("Failed to close %s: %s", unplugged_device.path, error)
+
+        # It might show up at the same or a new path, so each path is checked until
+        # it turned out to belong to a different device.
+        other_paths: Set[str] = set()
+        deadline = time.time() + timeout
+        while time.time() < deadline and not self._stop_event.is_set():
+            await asyncio.sleep(REPLUG_POLL_INTERVAL)
+
+            paths = set(evdev.list_devices())
+            # paths that disappeared might be used by the device once it is back
+            other_paths &= paths
+            for path in paths - other_paths:
+                try:
+                    device = evdev.InputDevice(path)
+                except OSError:
+                    # udev might not be done with it yet, try again later
+                    continue
+
+                if get_device_hash(device) != device_hash:
+                    other_paths.add(path)
+                    device.close()
+                    continue
+
+                numlock_state = get_numlock_led([device])
+                try:
+                    device.grab()
+                except OSError as error:
+                    logger.error("Cannot grab %s: %s", device.path, error)
+                    device.close()
+                    return None
+
+                asyncio.ensure_future(restore_numlock([device], numlock_state))
+
+                # the context reads from the same dict of sources
+                self._sources[device_hash] = device
+                self._devices = [
+                    device if get_device_hash(previous) == device_hash else previous
+                    for previous in self._devices
+                ]
+                self._replugged_at[device_hash] = time.time()
+                return device
+
+        logger.error("The device did not appear again")
+        return None
+
     def _create_forwarding_device(self, source: evdev.InputDevice) -> evdev.UInput:
         # copy as much information as possible, because libinput uses the extra
         # information to enable certain features like "Disable touchpad while
@@ -376,7 +797,7 @@ class Injector(multiprocessing.Process):
                 # UInput constructor doesn't support input_props and
                 # source.input_props doesn't exist with old python-evdev versions.
                 logger.error("Please upgrade your python-evdev version. Exiting")
-                self._msg_pipe[0].send(InjectorState.UPGRADE_EVDEV)
+                self._report_state(InjectorState.UPGRADE_EVDEV)
                 sys.exit(12)
 
             raise e
@@ -391,40 +812,95 @@ class Injector(multiprocessing.Process):
         Use this function as starting point in a process. It creates
         the loops needed to read and map events and keeps running them.
         """
+        if self.group is None and not self._receive_preset():
+            return
+
         logger.info('Starting injecting the preset for "%s"', self.group.key)
 
+        # degrades gracefully if the service lacks the privileges for it
+        self._msg_pipe[0].send(apply_scheduling(self.scheduling))
+
         # create a new event loop, because somehow running an infinite loop
         # that sleeps on iterations (joystick_to_mouse) in one process causes
         # another injection process to screw up reading from the grabbed
         # device.
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
+        self._stop_event = asyncio.Event()
+
+        coroutines = loop.run_until_complete(self._start_injection())
+        if coroutines is None:
+            return
+
+        coroutines.append(self._msg_listener())
+
+        self._report_state(InjectorState.RUNNING)
+
+        try:
+            loop.run_until_complete(asyncio.gather(*coroutines))
+        except RuntimeError as error:
+            # the loop might have been stopped via a `CLOSE` message,
+            # which causes the error message below. This is expected behavior
+            if str(error) != "Event loop stopped before Future completed.":
+                raise error
+        except OSError as error:
+            logger.error("Failed to run injector coroutines: %s", str(error))
+
+        if len(coroutines) > 0:
+            # expected when stop_injecting is called,
+            # during normal operation as well as tests this point is not
+            # reached otherwise.
+            logger.debug("Injector coroutines ended")
+
+        loop.run_until_complete(self._release_devices())
 
+    async def _start_injection(self) -> Optional[List[Coroutine]]:
+        """Grab the devices and create the event readers.
+
+        Needs to run within the event loop that the injection will use, after
+        _stop_event was created for it. Returns the coroutines of the event
+        readers, or None if nothing could be grabbed or if the injection was
+        stopped while grabbing.
+        """
         self._devices = self.group.get_devices()
 
+        # for some reason, grabbing a device can modify the num lock state.
+        # remember it and apply back later
+        numlock_state = get_numlock_led(self._devices)
+
         # InputConfigs may not contain the origin_hash information, this will try to make a
         # good guess if the origin_hash information is missing or invalid.
         self._update_preset()
 
         # grab devices as early as possible. If events appear that won't get
         # released anymore before the grab they appear to be held down forever
-        sources = self._grab_devices()
+        sources = await self._grab_devices()
+        if self._stop_event.is_set():
+            logger.debug("Stopped while grabbing devices")
+            self._sources = sources
+            self._ungrab_devices()
+            self._sources = {}
+            self._report_state(InjectorState.STOPPED)
+            return None
+
         forward_devices = {}
         for device_hash, device in sources.items():
             forward_devices[device_hash] = self._create_forwarding_device(device)
 
+        # keep them around in case the preset is reloaded
+        self._sources = sources
+        self._forward_devices = forward_devices
+
         # create this within the process after the event loop creation,
         # so that the macros use the correct loop
         self.context = Context(self.preset, sources, forward_devices)
-        self._stop_event = asyncio.Event()
 
         if len(sources) == 0:
             # maybe the preset was empty or something
             logger.error("Did not grab any device")
-            self._msg_pipe[0].send(InjectorState.NO_GRAB)
-            return
+            self._report_state(InjectorState.NO_GRAB)
+            return None
 
-        numlock_state = is_numlock_on()
         coroutines = []
 
         for device_hash in sources:
@@ -433,35 +909,23 @@ class Injector(multiprocessing.Process):
                 self.context,
                 sources[device_hash],
                 self._stop_event,
+                self._wait_for_replug,
             )
             coroutines.append(event_reader.run())
             self._event_readers.append(event_reader)
 
-        coroutines.append(self._msg_listener())
-
-        # set the numlock state to what it was before injecting, because
-        # grabbing devices screws this up
-        set_numlock(numlock_state)
+        coroutines.append(restore_numlock(sources.values(), numlock_state))
 
-        self._msg_pipe[0].send(InjectorState.RUNNING)
-
-        try:
-            loop.run_until_complete(asyncio.gather(*coroutines))
-        except RuntimeError as error:
-            # the loop might have been stopped via a `CLOSE` message,
-            # which causes the error message below. This is expected behavior
-            if str(error) != "Event loop stopped before Future completed.":
-                raise error
-        except OSError as error:
-            logger.error("Failed to run injector coroutines: %s", str(error))
+        return coroutines
 
-        if len(coroutines) > 0:
-            # expected when stop_injecting is called,
-            # during normal operation as well as tests this point is not
-            # reached otherwise.
-            logger.debug("Injector coroutines ended")
+    async def _release_devices(self) -> None:
+        """Ungrab the devices, and undo the change of the numlock this might cause."""
+        numlock_state = get_numlock_led(self._sources.values())
+        self._ungrab_devices()
+        await restore_numlock(self._sources.values(), numlock_state)
 
-        for source in sources.values():
+    def _ungrab_devices(self) -> None:
+        for source in self._sources.values():
             # ungrab at the end to make the next injection process not fail
             # its grabs
             try:
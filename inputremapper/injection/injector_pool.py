@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Keeps injector processes forked in advance, to start injections quicker."""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from inputremapper.configs.preset import Preset
+from inputremapper.groups import _Group
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.injection.injector import Injector, InjectorCommand
+from inputremapper.logger import logger
+
+
+class InjectorPool:
+    """Contains idle injector processes that wait for a preset.
+
+    Forking the process happens before the preset is known. Starting an injection
+    then only needs to send the preset over the pipe of an idle injector.
+
+    Injectors inherit the global uinputs of the service when they are forked.
+    Idle injectors that don't know about uinputs which have been created
+    afterwards are replaced by fill().
+    """
+
+    def __init__(self, size: int = 1):
+        """
+        Parameters
+        ----------
+        size
+            How many idle injectors to keep around
+        """
+        self.size = size
+        self._idle: List[Injector] = []
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def fill(self) -> bool:
+        """Replace crashed or outdated injectors and start new ones if needed.
+
+        Returns True, so that it can be used as a GLib timeout callback.
+        """
+        uinputs = frozenset(global_uinputs.devices.keys())
+
+        for injector in self._idle.copy():
+            if not injector.is_alive():
+                logger.info("Replacing a warm injector that stopped unexpectedly")
+                self._idle.remove(injector)
+                continue
+
+            if injector.known_uinputs != uinputs:
+                logger.debug("Replacing a warm injector with outdated uinputs")
+                self._idle.remove(injector)
+                self._close(injector)
+
+        while len(self._idle) < self.size:
+            injector = Injector()
+            injector.start()
+            self._idle.append(injector)
+
+        return True
+
+    def take(
+        self,
+        group: _Group,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+    ) -> Optional[Injector]:
+        """Start injecting the preset in one of the idle injectors.
+
+        Returns None if none of them is able to inject the preset.
+        """
+        required_uinputs = {mapping.target_uinput for mapping in preset}
+
+        for injector in self._idle.copy():
+            if not injector.is_alive():
+                logger.info("Discarding a warm injector that stopped unexpectedly")
+                self._idle.remove(injector)
+                continue
+
+            if not required_uinputs.issubset(injector.known_uinputs):
+                continue
+
+            self._idle.remove(injector)
+            injector.assign(group, preset, xmodmap)
+            logger.debug('Using a warm injector for "%s"', group.key)
+            return injector
+
+        return None
+
+    def stop(self) -> None:
+        """Stop all idle injectors."""
+        for injector in self._idle:
+            self._close(injector)
+
+        self._idle = []
+
+    @staticmethod
+    def _close(injector: Injector) -> None:
+        """Make an injector that didn't receive a preset yet reach its end."""
+        if injector.is_alive():
+            injector._msg_pipe[1].send(InjectorCommand.CLOSE)
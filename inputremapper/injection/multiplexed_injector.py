@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Injects the presets of many groups within a single process."""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from inputremapper.configs.preset import Preset
+from inputremapper.configs.system_mapping import system_mapping
+from inputremapper.groups import _Group
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.injection.injector import (
+    GrabResult,
+    Injector,
+    InjectorCommand,
+    InjectorPresetMessage,
+    InjectorState,
+)
+from inputremapper.injection.macros.macro import macro_variables
+from inputremapper.injection.scheduling import SchedulingPolicy
+from inputremapper.logger import logger
+
+
+class _GroupInjector(Injector):
+    """Injects a single group within the process of the MultiplexedInjector.
+
+    It is never started as a process of its own.
+    """
+
+    def __init__(
+        self,
+        group: _Group,
+        preset: Preset,
+        msg_pipe: Tuple[Connection, Connection],
+    ) -> None:
+        # all groups report through the pipe of the MultiplexedInjector
+        super().__init__(group, preset, msg_pipe)
+        # created within the running loop of the process, so that the group can
+        # be stopped while it is still grabbing its devices
+        self._stop_event = asyncio.Event()
+
+    def _report_state(self, state: InjectorState) -> None:
+        self._msg_pipe[0].send((self.group.key, state))
+
+    def _report_grab_result(self, grab_result: GrabResult) -> None:
+        self._msg_pipe[0].send((self.group.key, grab_result))
+
+
+class MultiplexedInjection:
+    """Interacts with a single group of the MultiplexedInjector.
+
+    Provides the same interface to the daemon as the Injector does.
+    """
+
+    def __init__(self, multiplexed_injector: MultiplexedInjector, group: _Group):
+        self.group = group
+        self.preset: Optional[Preset] = None
+        # all groups share the scheduling of the process
+        self.effective_scheduling: Optional[SchedulingPolicy] = None
+        self._multiplexed_injector = multiplexed_injector
+
+    def get_state(self) -> InjectorState:
+        return self._multiplexed_injector.get_state(self.group.key)
+
+    def get_state_fds(self) -> List[int]:
+        return self._multiplexed_injector.get_state_fds()
+
+    @property
+    def grab_results(self) -> Dict[str, GrabResult]:
+        """How grabbing each device of the group went, by path."""
+        self.get_state()
+        return self._multiplexed_injector.grab_results.get(self.group.key, {})
+
+    def can_reload(self, preset: Preset) -> bool:
+        if self.get_state() != InjectorState.RUNNING:
+            return False
+
+        return self._multiplexed_injector.can_inject(preset)
+
+    def reload_preset(
+        self,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+    ) -> None:
+        logger.info('Reloading the preset for group "%s"', self.group.key)
+        self.preset = preset
+        self._multiplexed_injector.send(
+            InjectorPresetMessage.create(
+                InjectorCommand.RELOAD_PRESET,
+                self.group,
+                preset,
+                xmodmap,
+            )
+        )
+
+    def stop_injecting(self) -> None:
+        logger.info('Stopping injecting keycodes for group "%s"', self.group.key)
+        self._multiplexed_injector.send((InjectorCommand.CLOSE, self.group.key))
+
+
+class MultiplexedInjector(multiprocessing.Process):
+    """Injects presets for multiple groups with a single event loop.
+
+    Each group has its own Context and EventReaders, but all of them share this
+    process. This uses much less memory than one process per group.
+
+    Macro variables are stored within this process, so they are not shared with
+    injections that run in a separate process.
+    """
+
+    known_uinputs: FrozenSet[str]
+    _injectors: Dict[str, _GroupInjector]
+    _tasks: Dict[str, asyncio.Task]
+
+    def __init__(self) -> None:
+        self._msg_pipe = multiprocessing.Pipe()
+
+        # the main process keeps track of the state of each group
+        self._states: Dict[str, InjectorState] = {}
+        self.grab_results: Dict[str, Dict[str, GrabResult]] = {}
+
+        # the global uinputs the process inherited when it was started
+        self.known_uinputs = frozenset()
+
+        # only needed inside the injection process
+        self._injectors = {}
+        self._tasks = {}
+
+        super().__init__(name="multiplexed-injector")
+
+    """Functions to interact with the running process."""
+
+    def start(self) -> None:
+        """Start the process, which inherits all existing global uinputs."""
+        self.known_uinputs = frozenset(global_uinputs.devices.keys())
+        super().start()
+
+    def can_inject(self, preset: Preset) -> bool:
+        """Check if the process knows all uinputs that the preset needs."""
+        if self.pid is None:
+            # it will inherit all of them once it starts
+            return True
+
+        if not self.is_alive():
+            return False
+
+        required_uinputs = {mapping.target_uinput for mapping in preset}
+        return required_uinputs.issubset(self.known_uinputs)
+
+    def start_injecting(
+        self,
+        group: _Group,
+        preset: Preset,
+        xmodmap: Optional[Dict[str, int]] = None,
+    ) -> MultiplexedInjection:
+        """Inject the preset for the group, and start the process if needed."""
+        if self.pid is None:
+            self.start()
+
+        self._states[group.key] = InjectorState.STARTING
+        self.send(
+            InjectorPresetMessage.create(InjectorCommand.START, group, preset, xmodmap)
+        )
+
+        injection = MultiplexedInjection(self, group)
+        injection.preset = preset
+        return injection
+
+    def get_state(self, group_key: str) -> InjectorState:
+        """Get the state of the injection of the group."""
+        while self._msg_pipe[1].poll():
+            key, msg = self._msg_pipe[1].recv()
+            if isinstance(msg, GrabResult):
+                self.grab_results.setdefault(key, {})[msg.path] = msg
+                continue
+
+            self._states[key] = msg
+
+        state = self._states.get(group_key, InjectorState.UNKNOWN)
+        if (
+            state in (InjectorState.STARTING, InjectorState.RUNNING)
+            and not self.is_alive()
+        ):
+            # the process is gone, so the injection of all groups failed
+            state = InjectorState.FAILED
+            logger.error("Multiplexed injector was unexpectedly found stopped")
+            self._states[group_key] = state
+
+        logger.debug('Injector state of "%s": %s', group_key, state)
+        return state
+
+    def get_state_fds(self) -> List[int]:
+        """File descriptors that become readable when a state might have changed."""
+        return [self._msg_pipe[1].fileno(), self.sentinel]
+
+    def send(self, msg: InjectorPresetMessage | Tuple[InjectorCommand, str]):
+        """Send a message to the injection process."""
+        self._msg_pipe[1].send(msg)
+
+    def stop(self) -> None:
+        """Stop all injections and make the process reach its end."""
+        if self.is_alive():
+            self.send((InjectorCommand.CLOSE, None))
+
+    """Process internal stuff."""
+
+    async def _inject(self, injector: _GroupInjector) -> None:
+        """Keep injecting for the group until its readers stop."""
+        try:
+            coroutines = await injector._start_injection()
+        except Exception as error:
+            # don't take the injections of the other groups down with it
+            logger.error('Failed to inject for "%s": %s', injector.group.key, error)
+            injector._report_state(InjectorState.FAILED)
+            return
+
+        if coroutines is None:
+            return
+
+        injector._report_state(InjectorState.RUNNING)
+        try:
+            await asyncio.gather(*coroutines)
+        except OSError as error:
+            logger.error("Failed to run injector coroutines: %s", str(error))
+
+        await injector._release_devices()
+        injector._report_state(InjectorState.STOPPED)
+
+    async def _stop_group(self, group_key: str) -> None:
+        """Stop the injection of the group and wait until it is ungrabbed."""
+        injector = self._injectors.pop(group_key, None)
+        task = self._tasks.pop(group_key, None)
+        if injector is None or task is None:
+            return
+
+        logger.info('Stopping injecting keycodes for group "%s"', group_key)
+        if not task.done():
+            injector._stop_event.set()
+            await task
+
+    async def _msg_listener(self) -> None:
+        """Wait for messages from the main process."""
+        loop = asyncio.get_event_loop()
+        pipe = self._msg_pipe[0]
+        while True:
+            frame_available = asyncio.Event()
+            loop.add_reader(pipe.fileno(), frame_available.set)
+            await frame_available.wait()
+            frame_available.clear()
+            msg = pipe.recv()
+
+            if isinstance(msg, InjectorPresetMessage):
+                group_key = msg.get_group().key
+
+                if msg.command == InjectorCommand.RELOAD_PRESET:
+                    injector = self._injectors.get(group_key)
+                    if injector is not None and not await injector._reload_preset(msg):
+                        await self._stop_group(group_key)
+                        injector._report_state(InjectorState.FAILED)
+                    continue
+
+                # replaces a previous injection of the same group
+                await self._stop_group(group_key)
+                if msg.xmodmap is not None:
+                    system_mapping.update(msg.xmodmap)
+
+                injector = _GroupInjector(
+                    msg.get_group(),
+                    msg.get_preset(),
+                    self._msg_pipe,
+                )
+                logger.info('Starting injecting the preset for "%s"', group_key)
+                self._injectors[group_key] = injector
+                self._tasks[group_key] = asyncio.ensure_future(self._inject(injector))
+                continue
+
+            command, group_key = msg
+            if command != InjectorCommand.CLOSE:
+                continue
+
+            if group_key is not None:
+                await self._stop_group(group_key)
+                continue
+
+            logger.debug("Received close signal")
+            for group_key in list(self._injectors.keys()):
+                await self._stop_group(group_key)
+
+            return
+
+    def run(self) -> None:
+        """Inject for all groups until the process is told to stop."""
+        logger.info("Starting the multiplexed injector")
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+        # all macros run within this process, no need to ask another process
+        macro_variables.use_local_dict()
+
+        loop.run_until_complete(self._msg_listener())
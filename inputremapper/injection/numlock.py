@@ -25,59 +25,81 @@ which is why these functions exist.
 """
 
 
-import re
-import subprocess
+import asyncio
+from typing import Iterable, Optional
 
-from inputremapper.logger import logger
+import evdev
+from evdev.ecodes import EV_KEY, EV_LED, KEY_NUMLOCK, LED_NUML
 
+from inputremapper.exceptions import EventNotHandled, UinputNotAvailable
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.logger import logger
 
-def is_numlock_on():
-    """Get the current state of the numlock."""
-    try:
-        xset_q = subprocess.check_output(
-            ["xset", "q"],
-            stderr=subprocess.STDOUT,
-        ).decode()
-        num_lock_status = re.search(r"Num Lock:\s+(.+?)\s", xset_q)
+# the display server updates the leds on its own time after a grab
+NUMLOCK_SETTLE_TIME = 0.1
 
-        if num_lock_status is not None:
-            return num_lock_status[1] == "on"
+# if the led still disagrees after toggling, an earlier reading might have been
+# outdated, and the toggle inverted the numlock
+NUMLOCK_RESTORE_ATTEMPTS = 2
 
-        return False
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        # tty
-        return None
 
+def get_numlock_led(devices: Iterable[evdev.InputDevice]) -> Optional[bool]:
+    """Get the numlock state from the led of the first device that has one.
 
-def set_numlock(state):
-    """Set the numlock to a given state of True or False."""
-    if state is None:
-        return
+    The display server keeps the leds of all keyboards in sync with its numlock,
+    and reading them doesn't need to start xset.
+    """
+    for device in devices:
+        try:
+            if LED_NUML not in device.capabilities().get(EV_LED, []):
+                continue
 
-    value = {True: "on", False: "off"}[state]
+            return LED_NUML in device.leds()
+        except OSError:
+            # it might have disappeared
+            continue
 
-    try:
-        subprocess.check_output(["numlockx", value])
-    except subprocess.CalledProcessError:
-        # might be in a tty
-        pass
-    except FileNotFoundError:
-        # doesn't seem to be installed everywhere
-        logger.debug("numlockx not found")
+    return None
 
 
-def ensure_numlock(func):
-    """Decorator to reset the numlock to its initial state afterwards."""
+async def _numlock_led_differs(
+    devices: Iterable[evdev.InputDevice],
+    state: bool,
+) -> bool:
+    """Wait for the led to settle, and check if it disagrees with the state."""
+    for _ in range(2):
+        # only trust it if it disagrees twice in a row
+        await asyncio.sleep(NUMLOCK_SETTLE_TIME)
+        if get_numlock_led(devices) in (None, state):
+            return False
 
-    def wrapped(*args, **kwargs):
-        # for some reason, grabbing a device can modify the num lock state.
-        # remember it and apply back later
-        numlock_before = is_numlock_on()
+    return True
 
-        result = func(*args, **kwargs)
 
-        set_numlock(numlock_before)
+async def restore_numlock(
+    devices: Iterable[evdev.InputDevice],
+    state: Optional[bool],
+) -> None:
+    """Toggle the numlock back to the state, if grabbing the devices changed it."""
+    if state is None:
+        return
 
-        return result
+    if "keyboard" not in global_uinputs.devices:
+        logger.debug('Cannot restore the numlock without the "keyboard" uinput')
+        return
 
-    return wrapped
+    devices = list(devices)
+    for _ in range(NUMLOCK_RESTORE_ATTEMPTS):
+        if not await _numlock_led_differs(devices, state):
+            return
+
+        logger.debug("Restoring the numlock state %s", state)
+        try:
+            global_uinputs.write((EV_KEY, KEY_NUMLOCK, 1), "keyboard")
+            global_uinputs.write((EV_KEY, KEY_NUMLOCK, 0), "keyboard")
+        except (UinputNotAvailable, EventNotHandled) as error:
+            logger.error("Failed to restore the numlock: %s", error)
+            return
+
+    if await _numlock_led_differs(devices, state):
+        logger.error("Failed to restore the numlock state %s", state)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""Scheduling policy, CPU affinity and memory locking of injector processes.
+
+Configured per group in the global config, for example:
+
+    "injector": {
+        "scheduling": {
+            "Foo Device": {"policy": "fifo", "priority": 50, "cpus": [2], "mlock": true}
+        }
+    }
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+from inputremapper.configs.global_config import global_config
+from inputremapper.logger import logger
+
+# from sys/mman.h
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+POLICIES = {
+    "other": getattr(os, "SCHED_OTHER", None),
+    "fifo": getattr(os, "SCHED_FIFO", None),
+    "rr": getattr(os, "SCHED_RR", None),
+}
+
+
+@dataclass(frozen=True)
+class SchedulingPolicy:
+    """How the injector process is scheduled by the kernel."""
+
+    policy: str = "other"
+    priority: int = 0
+    cpus: Optional[Tuple[int, ...]] = None
+    mlock: bool = False
+
+    @classmethod
+    def from_config(cls, group_key: str) -> SchedulingPolicy:
+        """Read the configured policy of the group from the global config."""
+        config = global_config.get(
+            ["injector", "scheduling", group_key],
+            log_unknown=False,
+        )
+        if not isinstance(config, dict):
+            return cls()
+
+        policy = str(config.get("policy", "other")).lower()
+        if policy not in POLICIES:
+            logger.error('Unknown scheduling policy "%s", using "other"', policy)
+            policy = "other"
+
+        cpus = config.get("cpus")
+        try:
+            return cls(
+                policy=policy,
+                priority=int(config.get("priority", 0)) if policy != "other" else 0,
+                cpus=tuple(int(cpu) for cpu in cpus) if cpus else None,
+                mlock=bool(config.get("mlock", False)),
+            )
+        except (TypeError, ValueError) as error:
+            logger.error(
+                'Invalid scheduling config for "%s", using the default: %s',
+                group_key,
+                error,
+            )
+            return cls()
+
+    def __str__(self) -> str:
+        description = self.policy
+        if self.policy != "other":
+            description += f" {self.priority}"
+
+        if self.cpus is not None:
+            description += f", cpus {','.join(str(cpu) for cpu in self.cpus)}"
+
+        if self.mlock:
+            description += ", mlock"
+
+        return description
+
+
+def apply_scheduling(scheduling: SchedulingPolicy) -> SchedulingPolicy:
+    """Apply the policy to the current process as far as the privileges allow.
+
+    Returns the policy that is actually in effect afterwards.
+    """
+    effective = SchedulingPolicy()
+
+    if scheduling.cpus is not None:
+        try:
+            os.sched_setaffinity(0, scheduling.cpus)
+            effective = replace(effective, cpus=scheduling.cpus)
+        except (OSError, AttributeError) as error:
+            logger.error("Failed to set the CPU affinity: %s", error)
+
+    if scheduling.policy != "other":
+        try:
+            os.sched_setscheduler(
+                0,
+                POLICIES[scheduling.policy],
+                os.sched_param(scheduling.priority),
+            )
+            effective = replace(
+                effective,
+                policy=scheduling.policy,
+                priority=scheduling.priority,
+            )
+        except (OSError, AttributeError, TypeError) as error:
+            # not permitted without CAP_SYS_NICE, or not supported on this system
+            logger.error(
+                'Failed to set the scheduling policy to "%s": %s',
+                scheduling.policy,
+                error,
+            )
+
+    if scheduling.mlock:
+        if _mlockall():
+            effective = replace(effective, mlock=True)
+
+    logger.debug("Effective scheduling: %s", effective)
+    return effective
+
+
+def _mlockall() -> bool:
+    """Prevent the memory of this process from being swapped out."""
+    library = ctypes.util.find_library("c")
+    if library is None:
+        logger.error("Failed to lock memory: libc not found")
+        return False
+
+    libc = ctypes.CDLL(library, use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        error = ctypes.get_errno()
+        logger.error("Failed to lock memory: %s", os.strerror(error))
+        return False
+
+    return True
@@ -33,17 +33,39 @@
 
 Beware that pipes read any available messages,
 even those written by themselves.
+
+Messages are written as frames, which consist of a header and a payload. The
+header contains the time of sending, the kind of the payload and its length.
 """
 
 import asyncio
 import json
 import os
+import select
+import struct
 import time
-from typing import Optional, AsyncIterator, Union
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Union
 
 from inputremapper.configs.paths import mkdir, chown
+from inputremapper.input_event import InputEvent
 from inputremapper.logger import logger
 
+# timestamp, kind, length of the payload
+FRAME_HEADER = struct.Struct("<dBI")
+
+# the payload is a json-serializable object
+FRAME_JSON = 0
+
+# the payload is any number of InputEvents, packed as EVENT_RECORDs
+FRAME_EVENTS = 1
+
+# sec, usec, type, code, value, origin_hash
+EVENT_RECORD = struct.Struct("<qiHHi32s")
+
+# how many bytes to read from the pipe at once
+READ_SIZE = 2**16
+
 
 class Pipe:
     """Pipe object.
@@ -56,11 +78,14 @@ class Pipe:
     def __init__(self, path):
         """Create a pipe, or open it if it already exists."""
         self._path = path
-        self._unread = []
+        self._unread: Deque = deque()
         self._created_at = time.time()
 
-        self._transport: Optional[asyncio.ReadTransport] = None
-        self._async_iterator: Optional[AsyncIterator] = None
+        # bytes that don't form a complete frame yet
+        self._read_buffer = bytearray()
+        # frames that didn't fit into the pipe yet
+        self._write_buffer = bytearray()
+        self._writer_loop: Optional[asyncio.AbstractEventLoop] = None
 
         paths = (f"{path}r", f"{path}w")
 
@@ -86,15 +111,13 @@ class Pipe:
         else:
             logger.debug('Using existing pipe for "%s"', path)
 
-        # thanks to os.O_NONBLOCK, readline will return b'' when there
-        # is nothing to read
+        # thanks to os.O_NONBLOCK, reading and writing raise BlockingIOError instead
+        # of waiting
         self._fds = (
             os.open(paths[0], os.O_RDONLY | os.O_NONBLOCK),
             os.open(paths[1], os.O_WRONLY | os.O_NONBLOCK),
         )
 
-        self._handles = (open(self._fds[0], "r"), open(self._fds[1], "w"))
-
         # clear the pipe of any contents, to avoid leftover messages from breaking
         # the reader-client or reader-service
         while self.poll():
@@ -102,82 +125,182 @@ class Pipe:
             logger.debug('Cleared leftover message "%s"', leftover)
 
     def __del__(self):
-        if self._transport:
-            logger.debug("closing transport")
-            self._transport.close()
-        for file in self._handles:
-            file.close()
+        if self._writer_loop is not None and not self._writer_loop.is_closed():
+            self._writer_loop.remove_writer(self._fds[1])
+
+        for fd in self._fds:
+            os.close(fd)
 
     def recv(self):
         """Read an object from the pipe or None if nothing available.
 
         Doesn't transmit pickles, to avoid injection attacks on the
-        privileged reader-service. Only messages that can be converted to json
-        are allowed.
+        privileged reader-service. Only messages that can be converted to json,
+        and InputEvents are allowed.
         """
-        if len(self._unread) > 0:
-            return self._unread.pop(0)
+        if len(self._unread) == 0:
+            self._read_frames()
 
-        line = self._handles[0].readline()
-        if len(line) == 0:
+        if len(self._unread) == 0:
             return None
 
-        return self._get_msg(line)
-
-    def _get_msg(self, line: str):
-        parsed = json.loads(line)
-        if parsed[0] < self._created_at and os.environ.get("UNITTEST"):
-            # important to avoid race conditions between multiple unittests,
-            # for example old terminate messages reaching a new instance of
-            # the reader-service.
-            logger.debug("Ignoring old message %s", parsed)
-            return None
-
-        return parsed[1]
+        return self._unread.popleft()
+
+    def _read_frames(self):
+        """Read everything that is available, and parse all complete frames."""
+        while True:
+            try:
+                chunk = os.read(self._fds[0], READ_SIZE)
+            except BlockingIOError:
+                break
+
+            self._read_buffer += chunk
+            if len(chunk) < READ_SIZE:
+                break
+
+        with memoryview(self._read_buffer) as buffer:
+            offset = 0
+            while len(buffer) - offset >= FRAME_HEADER.size:
+                timestamp, kind, length = FRAME_HEADER.unpack_from(buffer, offset)
+                start = offset + FRAME_HEADER.size
+                if len(buffer) < start + length:
+                    # the rest of the frame has not been written yet
+                    break
+
+                offset = start + length
+
+                if timestamp < self._created_at and os.environ.get("UNITTEST"):
+                    # important to avoid race conditions between multiple unittests,
+                    # for example old terminate messages reaching a new instance of
+                    # the reader-service.
+                    logger.debug("Ignoring old message")
+                    continue
+
+                with buffer[start:offset] as payload:
+                    self._unread.extend(self._get_msgs(kind, payload))
+
+        del self._read_buffer[:offset]
+
+    def _get_msgs(self, kind: int, payload: memoryview) -> List:
+        try:
+            if kind == FRAME_JSON:
+                return [json.loads(bytes(payload))]
+
+            if kind == FRAME_EVENTS:
+                return [
+                    InputEvent(
+                        sec,
+                        usec,
+                        type_,
+                        code,
+                        value,
+                        origin_hash=origin_hash.rstrip(b"\0").decode() or None,
+                    )
+                    for sec, usec, type_, code, value, origin_hash in (
+                        EVENT_RECORD.iter_unpack(payload)
+                    )
+                ]
+        except (ValueError, struct.error) as error:
+            logger.error("Failed to parse message: %s", error)
+            return []
+
+        logger.error("Unknown kind of message %s", kind)
+        return []
 
     def send(self, message: Union[str, int, float, dict, list, tuple]):
         """Write a serializable object to the pipe."""
-        dump = json.dumps((time.time(), message))
-        # there aren't any newlines supposed to be,
-        # but if there are it breaks readline().
-        self._handles[1].write(dump.replace("\n", ""))
-        self._handles[1].write("\n")
-        self._handles[1].flush()
+        self._write_frame(FRAME_JSON, json.dumps(message).encode())
+
+    def send_events(self, events: Iterable[InputEvent]):
+        """Write InputEvents to the pipe. The other end receives them one by one."""
+        payload = b"".join(
+            EVENT_RECORD.pack(
+                # the timestamp of events that were not read from a device may
+                # have been constructed from a float
+                int(event.sec),
+                int(event.usec),
+                event.type,
+                event.code,
+                event.value,
+                (event.origin_hash or "").encode(),
+            )
+            for event in events
+        )
+        self._write_frame(FRAME_EVENTS, payload)
+
+    def _write_frame(self, kind: int, payload: bytes):
+        self._write_buffer += FRAME_HEADER.pack(time.time(), kind, len(payload))
+        self._write_buffer += payload
+
+        if self.flush() or self._writer_loop is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # the rest is written with the next message
+            return
+
+        # don't block the loop until the other end reads, instead continue writing
+        # as soon as there is space again
+        self._writer_loop = loop
+        loop.add_writer(self._fds[1], self._flush_when_writable)
+
+    def _flush_when_writable(self):
+        if self.flush():
+            self._writer_loop.remove_writer(self._fds[1])
+            self._writer_loop = None
+
+    def flush(self) -> bool:
+        """Write as much of the pending frames into the pipe as it can take.
+
+        Returns True if everything has been written.
+        """
+        while len(self._write_buffer) > 0:
+            try:
+                written = os.write(self._fds[1], self._write_buffer)
+            except BlockingIOError:
+                # The other end doesn't keep up reading. Frames are kept complete
+                # and in order, the remaining part is written later.
+                return False
+
+            del self._write_buffer[:written]
+
+        return True
 
     def poll(self):
         """Check if there is anything that can be read."""
         if len(self._unread) > 0:
             return True
 
-        # using select.select apparently won't mark the pipe as ready
-        # anymore when there are multiple lines to read but only a single
-        # line is retreived. Using read instead.
-        msg = self.recv()
-        if msg is not None:
-            self._unread.append(msg)
+        readable, _, _ = select.select([self._fds[0]], [], [], 0)
+        if len(readable) > 0:
+            self._read_frames()
 
         return len(self._unread) > 0
 
     def fileno(self):
         """Compatibility to select.select."""
-        return self._handles[0].fileno()
+        return self._fds[0]
 
     def __aiter__(self):
         return self
 
     async def __anext__(self):
-        if not self._async_iterator:
-            loop = asyncio.get_running_loop()
-            reader = asyncio.StreamReader()
+        loop = asyncio.get_running_loop()
+        while len(self._unread) == 0:
+            frame_available = asyncio.Event()
+            loop.add_reader(self._fds[0], frame_available.set)
+            try:
+                await frame_available.wait()
+            finally:
+                loop.remove_reader(self._fds[0])
 
-            self._transport, _ = await loop.connect_read_pipe(
-                lambda: asyncio.StreamReaderProtocol(reader), self._handles[0]
-            )
-            self._async_iterator = reader.__aiter__()
+            self._read_frames()
 
-        return self._get_msg(await self._async_iterator.__anext__())
+        return self._unread.popleft()
 
     async def recv_async(self):
-        """Read the next line with async. Do not use this when using
+        """Read the next message with async. Do not use this when using
         the async for loop."""
         return await self.__aiter__().__anext__()
@@ -44,8 +44,18 @@ class SharedDict:
 
         self.pipe = multiprocessing.Pipe()
         self.process = None
+        # if set, values are only shared within the current process
+        self._local: Optional[dict] = None
         atexit.register(self._stop)
 
+    def use_local_dict(self):
+        """Stop asking the managing process, and keep values in this process.
+
+        Only useful if all readers and writers run within the current process.
+        """
+        logger.debug("SharedDict uses a process-local dictionary")
+        self._local = {}
+
     def start(self):
         """Ensure the process to manage the dictionary is running."""
         if self.process is not None and self.process.is_alive():
@@ -106,9 +116,16 @@ class SharedDict:
         return False
 
     def __setitem__(self, key: str, value: Any):
+        if self._local is not None:
+            self._local[key] = value
+            return
+
         self.pipe[1].send(("set", key, value))
 
     def __getitem__(self, key: str):
+        if self._local is not None:
+            return self._local.get(key)
+
         self.pipe[1].send(("get", key))
 
         select.select([self.pipe[1]], [], [], self._timeout)
@@ -19,12 +19,13 @@
 
 """Logging setup for input-remapper."""
 
+import functools
 import logging
 import os
 import sys
 import time
 from datetime import datetime
-from typing import cast
+from typing import cast, Optional
 
 try:
     from inputremapper.commit_hash import COMMIT_HASH
@@ -243,18 +244,43 @@ logging.getLogger("asyncio").setLevel(logging.WARNING)
 # using pkg_resources to figure out the version fails in many cases,
 # so we hardcode it instead
 VERSION = "2.0.1"
-EVDEV_VERSION = None
-try:
-    # pkg_resources very commonly fails/breaks
-    import pkg_resources
 
-    EVDEV_VERSION = pkg_resources.require("evdev")[0].version
-except Exception as error:
-    # there have been pkg_resources.DistributionNotFound and
-    # pkg_resources.ContextualVersionConflict errors so far.
-    # We can safely ignore all Exceptions here
-    logger.info("Could not figure out the version")
-    logger.debug(error)
+
+@functools.lru_cache(maxsize=None)
+def get_evdev_version() -> Optional[str]:
+    """Get the version of python-evdev, if it can be figured out."""
+    # Only looked up when needed, because it takes long to import
+    # importlib.metadata, and even longer to import pkg_resources.
+    try:
+        try:
+            from importlib.metadata import version
+        except ImportError:
+            # python 3.7
+            from importlib_metadata import version
+
+        return version("evdev")
+    except ImportError:
+        pass
+    except Exception as error:
+        # metadata is missing in some installations.
+        # We can safely ignore all Exceptions here
+        logger.info("Could not figure out the version")
+        logger.debug(error)
+        return None
+
+    try:
+        # pkg_resources very commonly fails/breaks
+        import pkg_resources
+
+        return pkg_resources.require("evdev")[0].version
+    except Exception as error:
+        # there have been pkg_resources.DistributionNotFound and
+        # pkg_resources.ContextualVersionConflict errors so far.
+        # We can safely ignore all Exceptions here
+        logger.info("Could not figure out the version")
+        logger.debug(error)
+        return None
+
 
 # check if the version is something like 1.5.0-beta or 1.5.0-beta.5
 IS_BETA = "beta" in VERSION
@@ -269,8 +295,9 @@ def log_info(name="input-remapper"):
         COMMIT_HASH,
     )
 
-    if EVDEV_VERSION:
-        logger.info("python-evdev %s", EVDEV_VERSION)
+    evdev_version = get_evdev_version()
+    if evdev_version:
+        logger.info("python-evdev %s", evdev_version)
 
     if is_debug():
         logger.warning(
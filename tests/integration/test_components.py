@@ -409,6 +409,43 @@ class TestMappingListbox(ComponentBaseTest):
         labels = [row.name for row in self.gui.get_children()]
         self.assertEqual(labels, ["a + b", "mapping1", "mapping2"])
 
+    def test_reuses_rows_of_unchanged_mappings(self):
+        rows = {row.combination: row for row in self.gui.get_children()}
+        self.message_broker.publish(
+            PresetData(
+                "preset2",
+                (
+                    MappingData(
+                        name="mapping1",
+                        input_combination=InputCombination(
+                            [InputConfig(type=1, code=KEY_C)]
+                        ),
+                    ),
+                    MappingData(
+                        name="renamed",
+                        input_combination=InputCombination(
+                            [InputConfig(type=1, code=KEY_B)]
+                        ),
+                    ),
+                    MappingData(
+                        name="mapping3",
+                        input_combination=InputCombination(
+                            [InputConfig(type=1, code=KEY_A)]
+                        ),
+                    ),
+                ),
+            )
+        )
+
+        labels = [row.name for row in self.gui.get_children()]
+        self.assertEqual(labels, ["mapping1", "mapping3", "renamed"])
+
+        key_c = InputCombination([InputConfig(type=1, code=KEY_C)])
+        key_b = InputCombination([InputConfig(type=1, code=KEY_B)])
+        self.assertIs(self.gui.get_row_at_index(0), rows[key_c])
+        self.assertIs(self.gui.get_row_at_index(2), rows[key_b])
+        self.assertEqual(rows[key_b].label.get_label(), "renamed")
+
     def test_activates_correct_row(self):
         self.message_broker.publish(
             MappingData(
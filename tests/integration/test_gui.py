@@ -24,7 +24,11 @@ import asyncio
 from contextlib import contextmanager
 from typing import Tuple, List, Optional, Iterable
 
-from inputremapper.gui.autocompletion import get_incomplete_parameter, _get_left_text
+from inputremapper.gui.autocompletion import (
+    get_incomplete_parameter,
+    _get_left_text,
+    SymbolIndex,
+)
 
 from inputremapper.injection.global_uinputs import global_uinputs
 from tests.lib.global_uinputs import reset_global_uinputs_for_service
@@ -2041,6 +2045,19 @@ class TestAutocompletion(GuiTestBase):
         test("foo", "foo")
         test("bar + foo", "foo")
 
+    def test_symbol_index(self):
+        symbol_index = SymbolIndex(
+            ("KEY_KPENTER", "KEY_ENTER", "disable", "ENTER", "Enter_2", "KEY_A")
+        )
+        self.assertEqual(
+            symbol_index.search("enter"),
+            ["Enter_2", "KEY_ENTER", "KEY_KPENTER"],
+        )
+        self.assertEqual(symbol_index.search("enter", limit=1), ["Enter_2"])
+        self.assertEqual(symbol_index.search("DISA"), ["disable"])
+        self.assertEqual(symbol_index.search("disablex"), [])
+        self.assertEqual(symbol_index.search("ek"), [])
+
     def test_autocomplete_names(self):
         autocompletion = self.user_interface.autocompletion
 
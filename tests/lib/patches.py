@@ -49,6 +49,10 @@ def patch_paths():
 
     user.HOME = tmp
 
+    from inputremapper.configs import paths
+
+    paths.CACHE_PATH = os.path.join(tmp, "cache")
+
 
 class InputDevice:
     # expose as existing attribute, otherwise the patch for
@@ -104,6 +108,9 @@ class InputDevice:
     def ungrab(self):
         logger.info("ungrab %s %s", self.name, self.path)
 
+    def close(self):
+        logger.info("close %s %s", self.name, self.path)
+
     async def async_read_loop(self):
         logger.info("starting read loop for %s", self.path)
         new_frame = asyncio.Event()
@@ -236,6 +243,9 @@ class UInput:
     def syn(self):
         pass
 
+    def close(self):
+        pass
+
 
 def patch_evdev():
     def list_devices():
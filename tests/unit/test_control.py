@@ -100,6 +100,10 @@ class TestControl(unittest.TestCase):
             daemon.injectors[device] = Injector()
 
         daemon.start_injecting = start_injecting
+        daemon.start_many = lambda presets: {
+            device: start_injecting(device, preset)
+            for device, preset in presets.items()
+        }
 
         global_config.set_autoload_preset(groups_[0].key, presets[0])
         global_config.set_autoload_preset(groups_[1].key, presets[1])
@@ -213,7 +217,7 @@ class TestControl(unittest.TestCase):
         daemon = Daemon()
 
         start_history = []
-        daemon.start_injecting = lambda *args: start_history.append(args)
+        daemon.start_many = lambda presets: start_history.extend(presets.items())
 
         global_config.path = os.path.join(config_dir, "config.json")
         global_config.load_config()
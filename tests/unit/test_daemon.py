@@ -30,12 +30,14 @@ from tests.lib.fixtures import fixtures
 
 import os
 import unittest
+from unittest.mock import patch
 import time
 import subprocess
 import json
 
 import evdev
 from evdev.ecodes import EV_KEY, KEY_B, KEY_A, ABS_X, BTN_A, BTN_B
+from gi.repository import GLib
 from pydbus import SystemBus
 
 from inputremapper.configs.system_mapping import system_mapping
@@ -403,15 +405,31 @@ class TestDaemon(unittest.TestCase):
         self.assertIn(group_key, daemon.injectors)
 
         # start again
+        time.sleep(0.2)
         previous_injector = daemon.injectors[group_key]
-        self.assertNotEqual(previous_injector.get_state(), InjectorState.STOPPED)
+        self.assertEqual(previous_injector.get_state(), InjectorState.RUNNING)
         daemon.start_injecting(group_key, preset_name)
         self.assertNotIn(group_key, daemon.autoload_history._autoload_history)
         self.assertTrue(daemon.autoload_history.may_autoload(group_key, preset_name))
         self.assertIn(group_key, daemon.injectors)
         time.sleep(0.2)
+        # the running injector reloaded the preset instead of being replaced
+        self.assertEqual(previous_injector, daemon.injectors[group_key])
+        self.assertEqual(daemon.injectors[group_key].get_state(), InjectorState.RUNNING)
+
+        # an injector that doesn't know the required uinput is replaced
+        pereset.add(
+            Mapping.from_combination(
+                InputCombination([InputConfig(type=EV_KEY, code=KEY_B)]),
+                "gamepad",
+                "BTN_A",
+            )
+        )
+        pereset.save()
+        previous_injector.known_uinputs = frozenset()
+        daemon.start_injecting(group_key, preset_name)
+        time.sleep(0.2)
         self.assertEqual(previous_injector.get_state(), InjectorState.STOPPED)
-        # a different injetor is now running
         self.assertNotEqual(previous_injector, daemon.injectors[group_key])
         self.assertNotEqual(
             daemon.injectors[group_key].get_state(), InjectorState.STOPPED
@@ -444,6 +462,123 @@ class TestDaemon(unittest.TestCase):
         self.assertEqual(daemon.injectors[group_key].get_state(), InjectorState.STOPPED)
         self.assertTrue(daemon.autoload_history.may_autoload(group_key, preset_name))
 
+    def test_start_many(self):
+        presets = {"Qux/Device?": "preset8", "Bar Device": "preset9"}
+        for group_key, preset_name in presets.items():
+            preset = Preset(groups.find(key=group_key).get_preset_path(preset_name))
+            preset.add(
+                Mapping.from_combination(
+                    InputCombination([InputConfig(type=EV_KEY, code=KEY_A)]),
+                    "keyboard",
+                    "a",
+                )
+            )
+            preset.save()
+
+        daemon = Daemon()
+        self.daemon = daemon
+
+        with patch.object(groups, "refresh", wraps=groups.refresh) as refresh:
+            results = daemon.start_many({**presets, "quux": "qux"})
+            # even though "quux" is unknown
+            self.assertEqual(refresh.call_count, 1)
+
+        self.assertEqual(
+            results,
+            {"Qux/Device?": True, "Bar Device": True, "quux": False},
+        )
+
+        time.sleep(0.2)
+        self.assertEqual(
+            daemon.get_states(),
+            {"Qux/Device?": "RUNNING", "Bar Device": "RUNNING"},
+        )
+
+        daemon.stop_many(list(presets.keys()))
+        time.sleep(0.2)
+        self.assertEqual(
+            daemon.get_states(),
+            {"Qux/Device?": "STOPPED", "Bar Device": "STOPPED"},
+        )
+
+    def test_start_many_failure(self):
+        presets = {"Qux/Device?": "preset8", "Bar Device": "preset9"}
+        for group_key, preset_name in presets.items():
+            preset = Preset(groups.find(key=group_key).get_preset_path(preset_name))
+            preset.add(
+                Mapping.from_combination(
+                    InputCombination([InputConfig(type=EV_KEY, code=KEY_A)]),
+                    "keyboard",
+                    "a",
+                )
+            )
+            preset.save()
+
+        daemon = Daemon()
+        self.daemon = daemon
+        inject = daemon._inject
+
+        def patched_inject(group, *args):
+            if group.key == "Qux/Device?":
+                raise OSError("foo")
+
+            return inject(group, *args)
+
+        with patch.object(daemon, "_inject", patched_inject):
+            results = daemon.start_many(presets)
+
+        # the other group is still injected
+        self.assertEqual(results, {"Qux/Device?": False, "Bar Device": True})
+
+    def test_injector_state_changed(self):
+        group_key = "Qux/Device?"
+        group = groups.find(key=group_key)
+        preset_name = "preset8"
+
+        preset = Preset(group.get_preset_path(preset_name))
+        preset.add(
+            Mapping.from_combination(
+                InputCombination([InputConfig(type=EV_KEY, code=KEY_A)]),
+                "keyboard",
+                "a",
+            )
+        )
+        preset.save()
+
+        daemon = Daemon()
+        self.daemon = daemon
+        states = []
+        daemon.InjectorStateChanged.connect(
+            lambda key, state: states.append((key, state))
+        )
+
+        def wait_for(state):
+            # the main loop of the service receives it without asking for it
+            start = time.time()
+            while states[-1] != (group_key, state) and time.time() - start < 2:
+                GLib.MainContext.default().iteration(False)
+                time.sleep(0.01)
+
+        daemon.start_injecting(group_key, preset_name)
+        self.assertEqual(states, [(group_key, "STARTING")])
+        wait_for("RUNNING")
+        self.assertEqual(states, [(group_key, "STARTING"), (group_key, "RUNNING")])
+
+        # asking for it doesn't emit it again
+        self.assertEqual(daemon.get_state(group_key), InjectorState.RUNNING)
+        self.assertEqual(len(states), 2)
+
+        with patch.object(
+            GLib, "source_remove", side_effect=GLib.source_remove
+        ) as source_remove_patch:
+            daemon.stop_injecting(group_key)
+            wait_for("STOPPED")
+
+        self.assertEqual(states[-1], (group_key, "STOPPED"))
+        self.assertEqual(len(states), 3)
+        # the pipe and the sentinel of the process are not watched anymore
+        self.assertEqual(source_remove_patch.call_count, 2)
+
     def test_autoload(self):
         preset_name = "preset7"
         group_key = "Qux/Device?"
@@ -528,6 +663,37 @@ class TestDaemon(unittest.TestCase):
         self.assertEqual(len(history), 1)
         self.assertEqual(history[group.key][1], preset_name)
 
+    def test_autoload_many(self):
+        self.daemon = Daemon()
+        history = self.daemon.autoload_history._autoload_history
+
+        presets = {"Foo Device 2": "preset7", "Bar Device": "preset8"}
+        for group_key, preset_name in presets.items():
+            preset = Preset(groups.find(key=group_key).get_preset_path(preset_name))
+            preset.add(
+                Mapping.from_combination(
+                    InputCombination([InputConfig(type=EV_KEY, code=KEY_A)]),
+                    "keyboard",
+                    "a",
+                )
+            )
+            preset.save()
+            global_config.set_autoload_preset(group_key, preset_name)
+
+        with patch.object(groups, "refresh", wraps=groups.refresh) as refresh:
+            self.daemon.autoload()
+            self.assertEqual(refresh.call_count, 1)
+
+        self.assertEqual(
+            {group_key: entry[1] for group_key, entry in history.items()},
+            presets,
+        )
+        for group_key in presets:
+            self.assertIn(
+                self.daemon.get_state(group_key),
+                (InjectorState.STARTING, InjectorState.RUNNING),
+            )
+
     def test_autoload_3(self):
         # based on a bug
         preset_name = "preset7"
@@ -24,6 +24,8 @@ from itertools import permutations
 from typing import List
 from unittest.mock import MagicMock, call
 
+from pydbus.generic import signal
+
 from inputremapper.configs.global_config import global_config
 from inputremapper.configs.mapping import UIMapping, MappingData
 from inputremapper.configs.system_mapping import system_mapping
@@ -40,6 +42,7 @@ from inputremapper.gui.messages.message_data import (
 )
 from inputremapper.gui.reader_client import ReaderClient
 from inputremapper.injection.global_uinputs import GlobalUInputs
+from inputremapper.injection.injector import InjectorState
 from tests.lib.cleanup import quick_cleanup
 from tests.lib.patches import FakeDaemonProxy
 from tests.lib.fixtures import prepare_presets
@@ -953,3 +956,36 @@ class TestDataManager(unittest.TestCase):
 
     def test_cannot_get_injector_state_without_group(self):
         self.assertRaises(DataManagementError, self.data_manager.get_state)
+
+    def test_waits_for_injector_state_changed(self):
+        class SignallingDaemonProxy(FakeDaemonProxy):
+            InjectorStateChanged = signal()
+
+        daemon = SignallingDaemonProxy()
+        data_manager = DataManager(
+            self.message_broker,
+            global_config,
+            self.reader,
+            daemon,
+            self.uinputs,
+            system_mapping,
+        )
+        data_manager.load_group("Foo Device 2")
+        callback = MagicMock()
+
+        # already stopped
+        data_manager.do_when_injector_state({InjectorState.STOPPED}, callback)
+        callback.assert_called_once()
+
+        callback.reset_mock()
+        data_manager.do_when_injector_state({InjectorState.RUNNING}, callback)
+        get_state_calls = len(daemon.calls["get_state"])
+        daemon.InjectorStateChanged("Foo Device", "RUNNING")
+        daemon.InjectorStateChanged("Foo Device 2", "STARTING")
+        callback.assert_not_called()
+
+        daemon.InjectorStateChanged("Foo Device 2", "RUNNING")
+        daemon.InjectorStateChanged("Foo Device 2", "RUNNING")
+        callback.assert_called_once()
+        # the service wasn't asked for the state while waiting
+        self.assertEqual(len(daemon.calls["get_state"]), get_state_calls)
@@ -19,7 +19,9 @@
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
 import asyncio
+import os
 import unittest
+from unittest.mock import patch
 
 import evdev
 from evdev.ecodes import (
@@ -70,6 +72,50 @@ class TestEventReader(unittest.IsolatedAsyncioTestCase):
         await asyncio.sleep(0.1)
         return context, event_reader
 
+    async def test_replug(self):
+        new_source = evdev.InputDevice(fixtures.gamepad.path)
+        replug_calls = []
+
+        async def replug_callback(device_hash):
+            replug_calls.append(device_hash)
+            return new_source
+
+        context = Context(self.preset, {}, {})
+        context.reset = unittest.mock.MagicMock()
+        event_reader = EventReader(
+            context,
+            self.gamepad_source,
+            self.stop_event,
+            replug_callback,
+        )
+        handled = []
+        event_reader.handle = lambda event: asyncio.sleep(0, handled.append(event))
+
+        stat = os.stat
+        unplugged = True
+
+        def unplug(path, *args, **kwargs):
+            nonlocal unplugged
+            if unplugged and path == self.gamepad_source.fileno():
+                unplugged = False
+                return os.stat_result((0,) * 10)
+            return stat(path, *args, **kwargs)
+
+        with patch("inputremapper.injection.event_reader.os.stat", unplug):
+            asyncio.ensure_future(event_reader.run())
+            self.gamepad_source.push_events([InputEvent.key(evdev.ecodes.BTN_A, 1)])
+            await asyncio.sleep(0.1)
+
+        self.assertEqual(replug_calls, [get_device_hash(self.gamepad_source)])
+        context.reset.assert_called_once()
+        self.assertIs(event_reader._source, new_source)
+
+        # continues to read from the new source
+        new_source.push_events([InputEvent.key(evdev.ecodes.BTN_A, 0)])
+        await asyncio.sleep(0.1)
+        self.assertEqual(handled[-1].value, 0)
+        self.stop_event.set()
+
     async def test_if_single_joystick_then(self):
         # TODO: Move this somewhere more sensible
         # Integration test style for if_single.
@@ -28,14 +28,19 @@ from unittest.mock import patch
 from evdev.ecodes import (
     EV_KEY,
     EV_ABS,
+    EV_REL,
     KEY_A,
     ABS_X,
+    BTN_LEFT,
+    REL_X,
 )
 
 from inputremapper.injection.global_uinputs import (
     global_uinputs,
     FrontendUInput,
     GlobalUInputs,
+    can_default_uinput_emit,
+    find_fitting_default_uinputs,
 )
 from inputremapper.exceptions import EventNotHandled, UinputNotAvailable
 
@@ -91,3 +96,25 @@ class TestGlobalUinputs(unittest.TestCase):
 
         uinput = frontend_uinputs.get_uinput("keyboard")
         self.assertIsInstance(uinput, FrontendUInput)
+
+
+class TestDefaultUInputs(unittest.TestCase):
+    def test_can_default_uinput_emit(self):
+        self.assertTrue(can_default_uinput_emit("keyboard", EV_KEY, KEY_A))
+        self.assertTrue(can_default_uinput_emit("keyboard + mouse", EV_KEY, KEY_A))
+        self.assertTrue(can_default_uinput_emit("gamepad", EV_ABS, ABS_X))
+        self.assertFalse(can_default_uinput_emit("mouse", EV_KEY, KEY_A))
+        self.assertFalse(can_default_uinput_emit("keyboard", EV_REL, REL_X))
+        self.assertFalse(can_default_uinput_emit("foo", EV_KEY, KEY_A))
+
+    def test_find_fitting_default_uinputs(self):
+        self.assertEqual(
+            find_fitting_default_uinputs(EV_KEY, KEY_A),
+            ["keyboard", "keyboard + mouse"],
+        )
+        self.assertEqual(
+            find_fitting_default_uinputs(EV_KEY, BTN_LEFT),
+            ["mouse", "keyboard + mouse"],
+        )
+        self.assertEqual(find_fitting_default_uinputs(EV_ABS, ABS_X), ["gamepad"])
+        self.assertEqual(find_fitting_default_uinputs(EV_KEY, 999999), [])
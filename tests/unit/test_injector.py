@@ -36,6 +36,8 @@ from tests.lib.pipes import uinput_write_history_pipe
 from tests.lib.pipes import read_write_history_pipe, push_events
 from tests.lib.fixtures import keyboard_keys
 
+import asyncio
+import dataclasses
 import unittest
 from unittest import mock
 import time
@@ -49,6 +51,7 @@ from evdev.ecodes import (
     KEY_A,
     REL_HWHEEL,
     BTN_A,
+    BTN_LEFT,
     ABS_X,
     ABS_VOLUME,
 )
@@ -57,14 +60,16 @@ from inputremapper.injection.injector import (
     Injector,
     is_in_capabilities,
     InjectorState,
+    InjectorCommand,
+    InjectorPresetMessage,
     get_udev_name,
 )
-from inputremapper.injection.numlock import is_numlock_on
 from inputremapper.configs.system_mapping import (
     system_mapping,
     DISABLE_CODE,
     DISABLE_NAME,
 )
+from inputremapper.configs.global_config import global_config
 from inputremapper.configs.preset import Preset
 from inputremapper.configs.mapping import Mapping
 from inputremapper.configs.input_config import InputCombination, InputConfig
@@ -115,10 +120,11 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
 
     def initialize_injector(self, group, preset: Preset):
         self.injector = Injector(group, preset)
+        self.injector._stop_event = asyncio.Event()
         self.injector._devices = self.injector.group.get_devices()
         self.injector._update_preset()
 
-    def test_grab(self):
+    async def test_grab(self):
         # path is from the fixtures
         path = "/dev/input/event10"
         preset = Preset()
@@ -134,14 +140,117 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         # this test needs to pass around all other constraints of
         # _grab_device
         self.injector.context = Context(preset, {}, {})
-        device = self.injector._grab_device(evdev.InputDevice(path))
+        self.injector._stop_event = asyncio.Event()
+        device = await self.injector._grab_device(evdev.InputDevice(path))
         gamepad = classify(device) == DeviceType.GAMEPAD
         self.assertFalse(gamepad)
         self.assertEqual(self.failed, 2)
         # success on the third try
         self.assertEqual(device.name, fixtures[path].name)
 
-    def test_fail_grab(self):
+        self.injector.get_state()
+        grab_result = self.injector.grab_results[path]
+        self.assertTrue(grab_result.grabbed)
+        self.assertEqual(grab_result.attempts, 3)
+        self.assertGreater(grab_result.duration, 0)
+
+    async def test_wait_for_replug(self):
+        self.make_it_fail = 0
+        preset = Preset()
+        preset.add(
+            Mapping.from_combination(
+                InputCombination([InputConfig(type=EV_KEY, code=BTN_A)]),
+                "keyboard",
+                "a",
+            )
+        )
+        self.initialize_injector(groups.find(name="gamepad"), preset)
+        self.injector._stop_event = asyncio.Event()
+        device_hash = fixtures.gamepad.get_device_hash()
+
+        async def replug():
+            await asyncio.sleep(0.2)
+            # it shows up at a new path
+            fixtures[self.new_gamepad_path] = dataclasses.replace(
+                fixtures.gamepad,
+                path=self.new_gamepad_path,
+            )
+
+        list_devices = evdev.list_devices
+
+        def patched_list_devices():
+            # the previous path is gone
+            paths = list_devices()
+            paths.remove(fixtures.gamepad.path)
+            return paths
+
+        asyncio.ensure_future(replug())
+        with mock.patch.object(evdev, "list_devices", patched_list_devices):
+            device = await self.injector._wait_for_replug(device_hash)
+
+        self.assertEqual(device.path, self.new_gamepad_path)
+        self.assertIs(self.injector._sources[device_hash], device)
+        self.assertIn(device, self.injector._devices)
+
+        # unplugging it again right away stops waiting for it
+        start = time.time()
+        self.assertIsNone(await self.injector._wait_for_replug(device_hash))
+        self.assertLess(time.time() - start, 0.1)
+
+    async def test_wait_for_replug_same_path(self):
+        self.make_it_fail = 0
+        self.initialize_injector(groups.find(name="gamepad"), Preset())
+        self.injector._stop_event = asyncio.Event()
+        device_hash = fixtures.gamepad.get_device_hash()
+        unplugged = evdev.InputDevice(fixtures.gamepad.path)
+        self.injector._sources[device_hash] = unplugged
+
+        plugged_in = False
+        list_devices = evdev.list_devices
+
+        def patched_list_devices():
+            paths = list_devices()
+            if not plugged_in:
+                paths.remove(fixtures.gamepad.path)
+
+            return paths
+
+        async def replug():
+            nonlocal plugged_in
+            await asyncio.sleep(0.2)
+            plugged_in = True
+
+        asyncio.ensure_future(replug())
+        with mock.patch.object(
+            evdev, "list_devices", patched_list_devices
+        ), mock.patch.object(evdev.InputDevice, "close", autospec=True) as close_patch:
+            device = await self.injector._wait_for_replug(device_hash)
+
+        self.assertEqual(device.path, fixtures.gamepad.path)
+        self.assertIsNot(device, unplugged)
+        self.assertIs(self.injector._sources[device_hash], device)
+
+        # the unplugged device and all other devices that were looked at
+        closed = [call[0][0] for call in close_patch.call_args_list]
+        self.assertIn(unplugged, closed)
+        self.assertNotIn(device, closed)
+
+    async def test_replug_timeout(self):
+        global_config.set(["injector", "replug_timeout"], 0.3)
+        self.initialize_injector(groups.find(name="gamepad"), Preset())
+        self.injector._stop_event = asyncio.Event()
+
+        start = time.time()
+        self.assertIsNone(await self.injector._wait_for_replug("foo"))
+        self.assertAlmostEqual(time.time() - start, 0.3, delta=0.15)
+
+        # disabled
+        global_config.set(["injector", "replug_timeout"], 0)
+        start = time.time()
+        self.assertIsNone(await self.injector._wait_for_replug("foo"))
+        self.assertLess(time.time() - start, 0.1)
+
+    async def test_fail_grab(self):
         self.make_it_fail = 999
         preset = Preset()
         preset.add(
@@ -155,11 +264,19 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         self.injector = Injector(groups.find(key="Foo Device 2"), preset)
         path = "/dev/input/event10"
         self.injector.context = Context(preset, {}, {})
-        device = self.injector._grab_device(evdev.InputDevice(path))
+        self.injector._stop_event = asyncio.Event()
+        device = await self.injector._grab_device(evdev.InputDevice(path))
         self.assertIsNone(device)
         self.assertGreaterEqual(self.failed, 1)
 
         self.assertEqual(self.injector.get_state(), InjectorState.UNKNOWN)
+        grab_result = self.injector.grab_results[path]
+        self.assertFalse(grab_result.grabbed)
+        self.assertEqual(grab_result.attempts, self.failed)
+        # gives up once the deadline is reached, retrying less often over time
+        self.assertLess(grab_result.duration, self.injector.regrab_timeout * 11)
+        self.assertLess(grab_result.attempts, 10)
+
         self.injector.start()
         self.assertEqual(self.injector.get_state(), InjectorState.STARTING)
         # since none can be grabbed, the process will terminate. But that
@@ -168,7 +285,39 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         self.assertFalse(self.injector.is_alive())
         self.assertEqual(self.injector.get_state(), InjectorState.NO_GRAB)
 
-    def test_grab_device_1(self):
+    async def test_grab_devices_concurrently(self):
+        self.initialize_injector(groups.find(key="Foo Device 2"), Preset())
+        paths = ["/dev/input/event10", "/dev/input/event11", "/dev/input/event13"]
+        devices = [evdev.InputDevice(path) for path in paths]
+        failed = {path: 0 for path in paths}
+
+        def grab_fail_four_times(device):
+            if failed[device.path] < 4:
+                failed[device.path] += 1
+                raise OSError()
+
+        evdev.InputDevice.grab = grab_fail_four_times
+        start = time.time()
+        with mock.patch.object(
+            self.injector,
+            "_find_needed_devices",
+            return_value=devices,
+        ):
+            grabbed = await self.injector._grab_devices()
+
+        self.assertEqual(len(grabbed), 3)
+        # each device waits for its own retries, but not for the other ones
+        duration = time.time() - start
+        self.assertLess(duration, self.injector.regrab_timeout * 6)
+
+        self.injector.get_state()
+        for path in paths:
+            grab_result = self.injector.grab_results[path]
+            self.assertTrue(grab_result.grabbed)
+            self.assertEqual(grab_result.attempts, 5)
+            self.assertLessEqual(grab_result.duration, duration)
+
+    async def test_grab_device_1(self):
         device_hash = fixtures.gamepad.get_device_hash()
 
         preset = Preset()
@@ -196,11 +345,11 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
             "/dev/input/event1234",
         ]
 
-        grabbed = self.injector._grab_devices()
+        grabbed = await self.injector._grab_devices()
         self.assertEqual(len(grabbed), 1)
         self.assertEqual(grabbed[device_hash].path, "/dev/input/event30")
 
-    def test_forward_gamepad_events(self):
+    async def test_forward_gamepad_events(self):
         device_hash = fixtures.gamepad.get_device_hash()
 
         # forward abs joystick events
@@ -219,13 +368,13 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         self.injector.context = Context(preset, {}, {})
 
         path = "/dev/input/event30"
-        devices = self.injector._grab_devices()
+        devices = await self.injector._grab_devices()
         self.assertEqual(len(devices), 1)
         self.assertEqual(devices[device_hash].path, path)
         gamepad = classify(devices[device_hash]) == DeviceType.GAMEPAD
         self.assertTrue(gamepad)
 
-    def test_skip_unused_device(self):
+    async def test_skip_unused_device(self):
         # skips a device because its capabilities are not used in the preset
         preset = Preset()
         preset.add(
@@ -239,11 +388,11 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         self.injector.context = Context(preset, {}, {})
 
         # grabs only one device even though the group has 4 devices
-        devices = self.injector._grab_devices()
+        devices = await self.injector._grab_devices()
         self.assertEqual(len(devices), 1)
         self.assertEqual(self.failed, 2)
 
-    def test_skip_unknown_device(self):
+    async def test_skip_unknown_device(self):
         preset = Preset()
         preset.add(
             Mapping.from_combination(
@@ -256,7 +405,7 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         # skips a device because its capabilities are not used in the preset
         self.initialize_injector(groups.find(key="Foo Device 2"), preset)
         self.injector.context = Context(preset, {}, {})
-        devices = self.injector._grab_devices()
+        devices = await self.injector._grab_devices()
 
         # skips the device alltogether, so no grab attempts fail
         self.assertEqual(self.failed, 0)
@@ -357,8 +506,6 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(ungrab_patch.call_count, 2)
 
     def test_injector(self):
-        numlock_before = is_numlock_on()
-
         # stuff the preset outputs
         system_mapping.clear()
         code_a = 100
@@ -527,10 +674,147 @@ class TestInjector(unittest.IsolatedAsyncioTestCase):
         time.sleep(0.1)
         self.assertTrue(self.injector.is_alive())
 
-        numlock_after = is_numlock_on()
-        self.assertEqual(numlock_before, numlock_after)
         self.assertEqual(self.injector.get_state(), InjectorState.RUNNING)
 
+    def test_reload_preset(self):
+        device_hash = fixtures.foo_device_2_keyboard.get_device_hash()
+
+        def create_preset(symbol):
+            preset = Preset()
+            preset.add(
+                Mapping.from_combination(
+                    InputCombination(
+                        [InputConfig(type=EV_KEY, code=10, origin_hash=device_hash)]
+                    ),
+                    "keyboard",
+                    symbol,
+                )
+            )
+            return preset
+
+        self.injector = Injector(groups.find(key="Foo Device 2"), create_preset("a"))
+        self.injector.start()
+        uinput_write_history_pipe[0].poll(timeout=1)
+        time.sleep(0.2)
+        self.assertEqual(self.injector.get_state(), InjectorState.RUNNING)
+        pid = self.injector.pid
+
+        push_events(fixtures.foo_device_2_keyboard, [InputEvent.key(10, 1)])
+        time.sleep(0.1)
+        self.assertTrue(self.injector.can_reload(create_preset("b")))
+        self.injector.reload_preset(create_preset("b"))
+        time.sleep(0.1)
+        push_events(fixtures.foo_device_2_keyboard, [InputEvent.key(10, 1)])
+        time.sleep(0.1)
+
+        history = read_write_history_pipe()
+        code_a = system_mapping.get("a")
+        code_b = system_mapping.get("b")
+        # the key that was held down while reloading got released
+        self.assertEqual(
+            history,
+            [(EV_KEY, code_a, 1), (EV_KEY, code_a, 0), (EV_KEY, code_b, 1)],
+        )
+
+        # it is still the same process, the devices stayed grabbed
+        self.assertEqual(self.injector.get_state(), InjectorState.RUNNING)
+        self.assertEqual(self.injector.pid, pid)
+        self.assertIn("b", [m.output_symbol for m in self.injector.preset])
+
+        # uinputs that were created after starting the process are not available
+        self.injector.known_uinputs = frozenset()
+        self.assertFalse(self.injector.can_reload(create_preset("b")))
+
+    async def test_reload_preset_fails(self):
+        self.make_it_fail = 0
+        keyboard = fixtures.foo_device_2_keyboard
+        mouse = fixtures.foo_device_2_mouse
+        group = groups.find(key="Foo Device 2")
+
+        preset = Preset()
+        preset.add(
+            Mapping.from_combination(
+                InputCombination(
+                    [
+                        InputConfig(
+                            type=EV_KEY, code=10, origin_hash=keyboard.get_device_hash()
+                        )
+                    ]
+                ),
+                "keyboard",
+                "a",
+            )
+        )
+        self.initialize_injector(group, preset)
+        self.injector._stop_event = asyncio.Event()
+        device = evdev.InputDevice(keyboard.path)
+        self.injector._sources[keyboard.get_device_hash()] = device
+        self.injector.context = Context(
+            preset,
+            self.injector._sources,
+            self.injector._forward_devices,
+        )
+
+        # the new preset needs the mouse as well
+        new_preset = Preset()
+        new_preset.add(
+            Mapping.from_combination(
+                InputCombination(
+                    [
+                        InputConfig(
+                            type=EV_KEY,
+                            code=BTN_LEFT,
+                            origin_hash=mouse.get_device_hash(),
+                        )
+                    ]
+                ),
+                "keyboard",
+                "b",
+            )
+        )
+        msg = InjectorPresetMessage.create(
+            InjectorCommand.RELOAD_PRESET,
+            group,
+            new_preset,
+        )
+
+        ungrabbed = []
+        with mock.patch.object(
+            evdev.InputDevice,
+            "ungrab",
+            lambda input_device: ungrabbed.append(input_device.path),
+        ), mock.patch(
+            "inputremapper.injection.injector.Context",
+            side_effect=ValueError("foo"),
+        ):
+            self.assertFalse(await self.injector._reload_preset(msg))
+
+        # the mouse is released again, the previous preset stays
+        self.assertEqual(ungrabbed, [mouse.path])
+        self.assertEqual(
+            list(self.injector._sources.values()),
+            [device],
+        )
+        self.assertEqual(self.injector._forward_devices, {})
+        self.assertEqual(self.injector._event_readers, [])
+        self.assertIs(self.injector.preset, preset)
+
+    def test_report_scheduling(self):
+        # whether real-time scheduling is permitted depends on the test environment
+        global_config.set(
+            ["injector", "scheduling", "Foo Device 2"],
+            {"policy": "fifo", "priority": 50},
+        )
+        self.injector = Injector(groups.find(key="Foo Device 2"), Preset())
+        self.assertEqual(self.injector.scheduling.policy, "fifo")
+        self.assertIsNone(self.injector.effective_scheduling)
+
+        self.injector.start()
+        time.sleep(0.5)
+        self.injector.get_state()
+        self.assertIsNotNone(self.injector.effective_scheduling)
+        self.assertEqual(self.injector.effective_scheduling.cpus, None)
+
     def test_is_in_capabilities(self):
         key = InputCombination(InputCombination.from_tuples((1, 2, 1)))
         capabilities = {1: [9, 2, 5]}
@@ -0,0 +1,137 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+from tests.lib.cleanup import quick_cleanup
+from tests.lib.fixtures import fixtures
+from tests.lib.pipes import uinput_write_history_pipe, push_events
+
+import time
+import unittest
+
+from evdev.ecodes import EV_KEY
+
+from inputremapper.configs.input_config import InputCombination, InputConfig
+from inputremapper.configs.mapping import Mapping
+from inputremapper.configs.preset import Preset
+from inputremapper.groups import groups
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.injection.injector import InjectorState
+from inputremapper.injection.injector_pool import InjectorPool
+from inputremapper.input_event import InputEvent
+
+
+class TestInjectorPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        quick_cleanup()
+
+    def setUp(self):
+        self.pool = InjectorPool(size=1)
+        self.injector = None
+
+    def tearDown(self):
+        self.pool.stop()
+        if self.injector is not None and self.injector.is_alive():
+            self.injector.stop_injecting()
+            time.sleep(0.2)
+
+        quick_cleanup()
+
+    def _create_preset(self, target_uinput="keyboard", symbol="a") -> Preset:
+        preset = Preset()
+        preset.add(
+            Mapping.from_combination(
+                InputCombination(
+                    [
+                        InputConfig(
+                            type=EV_KEY,
+                            code=10,
+                            origin_hash=fixtures.foo_device_2_keyboard.get_device_hash(),
+                        )
+                    ]
+                ),
+                target_uinput,
+                symbol,
+            )
+        )
+        return preset
+
+    def test_take(self):
+        self.pool.fill()
+        self.assertEqual(len(self.pool), 1)
+
+        group = groups.find(key="Foo Device 2")
+        self.injector = self.pool.take(group, self._create_preset())
+        self.assertIsNotNone(self.injector)
+        self.assertEqual(len(self.pool), 0)
+        self.assertEqual(self.injector.group, group)
+
+        uinput_write_history_pipe[0].poll(timeout=1)
+        time.sleep(0.2)
+        self.assertEqual(self.injector.get_state(), InjectorState.RUNNING)
+
+        push_events(fixtures.foo_device_2_keyboard, [InputEvent.key(10, 1)])
+        self.assertTrue(uinput_write_history_pipe[0].poll(timeout=1))
+        event = uinput_write_history_pipe[0].recv()
+        self.assertEqual(event.type, EV_KEY)
+        self.assertEqual(event.value, 1)
+
+        self.pool.fill()
+        self.assertEqual(len(self.pool), 1)
+
+    def test_take_empty(self):
+        group = groups.find(key="Foo Device 2")
+        self.assertIsNone(self.pool.take(group, self._create_preset()))
+
+    def test_replace_crashed(self):
+        self.pool.fill()
+        injector = self.pool._idle[0]
+        injector.kill()
+        injector.join()
+
+        group = groups.find(key="Foo Device 2")
+        self.assertIsNone(self.pool.take(group, self._create_preset()))
+        self.assertEqual(len(self.pool), 0)
+
+        self.pool.fill()
+        self.assertEqual(len(self.pool), 1)
+        self.assertTrue(self.pool._idle[0].is_alive())
+
+    def test_outdated_uinputs(self):
+        # the gamepad uinput doesn't exist yet when the idle injector is forked
+        del global_uinputs.devices["gamepad"]
+        self.pool.fill()
+        injector = self.pool._idle[0]
+        self.pool.fill()
+        self.assertIs(self.pool._idle[0], injector)
+
+        group = groups.find(key="Foo Device 2")
+        preset = self._create_preset("gamepad", "BTN_A")
+        self.assertIsNone(self.pool.take(group, preset))
+
+        global_uinputs.prepare_single("gamepad")
+        self.pool.fill()
+        self.assertIsNot(self.pool._idle[0], injector)
+        self.injector = self.pool.take(group, preset)
+        self.assertIsNotNone(self.injector)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -394,6 +394,32 @@ class TestInputCombination(unittest.TestCase):
             ),
         )
 
+    def test_get_permutation_key(self):
+        combination = InputCombination(
+            InputCombination.from_tuples((1, 3, 1), (1, 5, 1), (1, 7, 1))
+        )
+        keys = {
+            permutation.get_permutation_key()
+            for permutation in combination.get_permutations()
+        }
+        self.assertEqual(keys, {combination.get_permutation_key()})
+
+        # the last input triggers the combination, its position matters
+        other = InputCombination(
+            InputCombination.from_tuples((1, 3, 1), (1, 7, 1), (1, 5, 1))
+        )
+        self.assertNotEqual(
+            other.get_permutation_key(), combination.get_permutation_key()
+        )
+
+        short = InputCombination(InputCombination.from_tuples((1, 3, 1), (1, 5, 1)))
+        self.assertNotEqual(
+            short.get_permutation_key(),
+            InputCombination(
+                InputCombination.from_tuples((1, 5, 1), (1, 3, 1))
+            ).get_permutation_key(),
+        )
+
     def test_is_problematic(self):
         key_1 = InputCombination(
             InputCombination.from_tuples((1, KEY_LEFTSHIFT, 1), (1, 5, 1))
@@ -28,6 +28,7 @@ import select
 import time
 import os
 
+from inputremapper.input_event import InputEvent
 from inputremapper.ipc.pipe import Pipe
 from inputremapper.ipc.shared_dict import SharedDict
 from inputremapper.ipc.socket import Server, Client, Base
@@ -51,6 +52,17 @@ class TestSharedDict(unittest.TestCase):
         self.assertEqual(self.shared_dict.get("a"), 3)
         self.assertEqual(self.shared_dict["a"], 3)
 
+    def test_local_dict(self):
+        self.shared_dict["a"] = 3
+        self.shared_dict.use_local_dict()
+        self.assertIsNone(self.shared_dict["a"])
+        self.shared_dict["a"] = 4
+        self.assertEqual(self.shared_dict.get("a"), 4)
+
+        # the managing process didn't receive the new value
+        self.shared_dict._local = None
+        self.assertEqual(self.shared_dict["a"], 3)
+
 
 class TestSocket(unittest.TestCase):
     def test_socket(self):
@@ -163,6 +175,64 @@ class TestPipe(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(p2.recv(), 3)
         self.assertEqual(p2.recv(), None)
 
+    def test_send_events(self):
+        p1 = Pipe(os.path.join(tmp, "pipe"))
+        p2 = Pipe(os.path.join(tmp, "pipe"))
+
+        origin_hash = "e1f3d4c8b93d6e38e67e2b1e6e42ee29"
+        p1.send_events(
+            [
+                InputEvent(1, 2, 1, 30, 1, origin_hash=origin_hash),
+                InputEvent.rel(8, -1),
+            ]
+        )
+        p1.send("foo")
+
+        event = p2.recv()
+        self.assertIsInstance(event, InputEvent)
+        self.assertEqual((event.sec, event.usec), (1, 2))
+        self.assertEqual(event.event_tuple, (1, 30, 1))
+        self.assertEqual(event.origin_hash, origin_hash)
+
+        event = p2.recv()
+        self.assertEqual(event.event_tuple, (2, 8, -1))
+        self.assertIsNone(event.origin_hash)
+
+        self.assertEqual(p2.recv(), "foo")
+        self.assertIsNone(p2.recv())
+
+    def test_send_events_float_timestamp(self):
+        p1 = Pipe(os.path.join(tmp, "pipe"))
+        p2 = Pipe(os.path.join(tmp, "pipe"))
+
+        p1.send_events([InputEvent(1, 2.5, 1, 30, 1)])
+
+        event = p2.recv()
+        self.assertEqual((event.sec, event.usec), (1, 2))
+        self.assertEqual(event.event_tuple, (1, 30, 1))
+
+    def test_full_pipe(self):
+        p1 = Pipe(os.path.join(tmp, "pipe"))
+        p2 = Pipe(os.path.join(tmp, "pipe"))
+
+        # more than the pipe can hold at once. Sending doesn't block, and the
+        # frames don't break.
+        message = "a" * 10000
+        for _ in range(30):
+            p1.send(message)
+
+        self.assertFalse(p1.flush())
+
+        received = []
+        while len(received) < 30:
+            self.assertTrue(p2.poll())
+            received.append(p2.recv())
+            p1.flush()
+
+        self.assertEqual(received, [message] * 30)
+        self.assertTrue(p1.flush())
+        self.assertFalse(p2.poll())
+
     async def test_async_for_loop(self):
         p1 = Pipe(os.path.join(tmp, "pipe"))
         iterator = p1.__aiter__()
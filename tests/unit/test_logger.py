@@ -23,10 +23,18 @@ import os
 import shutil
 import unittest
 import logging
+import sys
+from unittest.mock import MagicMock, patch
 
 from tests.lib.tmp import tmp
 
-from inputremapper.logger import logger, update_verbosity, log_info, ColorfulFormatter
+from inputremapper.logger import (
+    logger,
+    update_verbosity,
+    log_info,
+    ColorfulFormatter,
+    get_evdev_version,
+)
 from inputremapper.configs.paths import remove
 
 
@@ -74,6 +82,23 @@ class TestLogger(unittest.TestCase):
             content = f.read().lower()
             self.assertIn("input-remapper", content)
 
+    def test_evdev_version_fallback(self):
+        # python 3.7 has no importlib.metadata
+        pkg_resources = MagicMock()
+        pkg_resources.require.return_value = [MagicMock(version="1.2.3")]
+        get_evdev_version.cache_clear()
+        with patch.dict(
+            sys.modules,
+            {
+                "importlib.metadata": None,
+                "importlib_metadata": None,
+                "pkg_resources": pkg_resources,
+            },
+        ):
+            self.assertEqual(get_evdev_version(), "1.2.3")
+
+        get_evdev_version.cache_clear()
+
     def test_makes_path(self):
         path = os.path.join(tmp, "logger-test")
         if os.path.exists(path):
@@ -20,6 +20,7 @@
 
 import unittest
 from functools import partial
+from unittest.mock import patch
 
 from evdev.ecodes import (
     EV_REL,
@@ -439,6 +440,41 @@ class TestUIMapping(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(mapping.is_valid())
         self.assertIsNone(mapping.get_error())
 
+    def test_caches_validation_error(self):
+        mapping = UIMapping()
+        mapping.input_combination = [{"type": EV_KEY, "code": KEY_1}]
+        mapping.output_symbol = "a"
+        error = mapping.get_error()
+        self.assertIs(mapping.get_error(), error)
+
+        with patch("inputremapper.configs.mapping.Mapping") as validate:
+            self.assertFalse(mapping.is_valid())
+            validate.assert_not_called()
+
+        # modifying a field validates it again
+        mapping.target_uinput = "keyboard"
+        self.assertTrue(mapping.is_valid())
+        self.assertIsNone(mapping.get_error())
+
+        # copies carry the result of the validation
+        with patch("inputremapper.configs.mapping.Mapping") as validate:
+            self.assertTrue(mapping.copy().is_valid())
+            validate.assert_not_called()
+
+        self.assertFalse(mapping.copy(update={"target_uinput": None}).is_valid())
+
+    def test_validates_again_after_the_system_mapping_changed(self):
+        mapping = UIMapping(
+            input_combination=[{"type": EV_KEY, "code": KEY_1}],
+            output_symbol="foobar",
+            target_uinput="keyboard",
+        )
+        self.assertFalse(mapping.is_valid())
+
+        system_mapping.update({"foobar": 500})
+        self.addCleanup(system_mapping.populate)
+        self.assertTrue(mapping.is_valid())
+
     def test_copy_returns_ui_mapping(self):
         """Copy should also be a UIMapping with all the invalid data."""
         mapping = UIMapping()
@@ -18,10 +18,18 @@
 # You should have received a copy of the GNU General Public License
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
+import logging
+import time
 import unittest
 from dataclasses import dataclass
 
+from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.gui.messages.message_broker import MessageBroker, MessageType, Signal
+from inputremapper.gui.messages.message_data import CombinationUpdate, StatusData
+from inputremapper.logger import logger
+
+# generous, publishing takes about 2 µs per listener
+PUBLISH_TIME_BUDGET = 0.5
 
 
 class Listener:
@@ -98,6 +106,83 @@ class TestMessageBroker(unittest.TestCase):
         self.assertEqual([1, 2, 3], first)
         self.assertEqual([4, 4, 4], calls[3:])
 
+    def test_unsubscribe_while_publishing(self):
+        message_broker = MessageBroker()
+        listener = Listener()
+
+        def unsubscribe(_):
+            message_broker.unsubscribe(listener)
+
+        message_broker.subscribe(MessageType.test1, unsubscribe)
+        message_broker.subscribe(MessageType.test1, listener)
+        message_broker.publish(Message(MessageType.test1, "a"))
+        message_broker.publish(Message(MessageType.test1, "b"))
+        self.assertLessEqual(len(listener.calls), 1)
+
+        message_broker.subscribe(MessageType.test1, listener)
+        message_broker.publish(Message(MessageType.test1, "c"))
+        self.assertEqual(listener.calls[-1], Message(MessageType.test1, "c"))
+
+    def test_get_caller(self):
+        def publish():
+            return MessageBroker.get_caller()
+
+        file, line = publish()
+        self.assertEqual(file, "test_message_broker.py")
+        self.assertGreater(line, 0)
+
+    def test_merges_pending_messages(self):
+        message_broker = MessageBroker()
+        combinations = [
+            InputCombination([InputConfig(type=1, code=code)]) for code in range(4)
+        ]
+        combination_updates = Listener()
+        status_messages = Listener()
+
+        def publish_many(_):
+            message_broker.publish(StatusData(0, "a"))
+            message_broker.publish(StatusData(0, "b"))
+            message_broker.publish(StatusData(1, "c"))
+            message_broker.publish(CombinationUpdate(combinations[0], combinations[1]))
+            message_broker.publish(CombinationUpdate(combinations[1], combinations[2]))
+            message_broker.publish(CombinationUpdate(combinations[0], combinations[3]))
+
+        message_broker.subscribe(MessageType.test1, publish_many)
+        message_broker.subscribe(MessageType.status_msg, status_messages)
+        message_broker.subscribe(MessageType.combination_update, combination_updates)
+        message_broker.publish(Message(MessageType.test1, ""))
+
+        self.assertEqual(
+            status_messages.calls,
+            [StatusData(0, "b"), StatusData(1, "c")],
+        )
+        self.assertEqual(
+            combination_updates.calls,
+            [
+                CombinationUpdate(combinations[0], combinations[2]),
+                CombinationUpdate(combinations[0], combinations[3]),
+            ],
+        )
+
+    def test_throughput(self):
+        message_broker = MessageBroker()
+        listeners = [Listener() for _ in range(10)]
+        for listener in listeners:
+            message_broker.subscribe(MessageType.test1, listener)
+
+        level = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            start = time.perf_counter()
+            for _ in range(10000):
+                message_broker.publish(Message(MessageType.test1, "foo"))
+            duration = time.perf_counter() - start
+        finally:
+            logger.setLevel(level)
+
+        self.assertEqual(len(listeners[0].calls), 10000)
+        self.assertLess(duration, PUBLISH_TIME_BUDGET)
+
 
 class TestSignal(unittest.TestCase):
     def test_eq(self):
@@ -21,6 +21,7 @@ import unittest
 import shutil
 import json
 import pkg_resources
+from unittest.mock import patch
 
 from evdev.ecodes import (
     EV_KEY,
@@ -39,7 +40,11 @@ from evdev.ecodes import (
 )
 
 from inputremapper.configs.mapping import UIMapping
-from inputremapper.configs.migrations import migrate, config_version
+from inputremapper.configs.migrations import (
+    migrate,
+    config_version,
+    MIN_PRESETS_FOR_POOL,
+)
 from inputremapper.configs.preset import Preset
 from inputremapper.configs.global_config import global_config
 from inputremapper.configs.paths import (
@@ -373,6 +378,49 @@ class TestMigrations(unittest.TestCase):
             ),
         )
 
+    def test_migrate_many_presets(self):
+        # enough presets to migrate them in parallel
+        for i in range(MIN_PRESETS_FOR_POOL + 1):
+            path = get_preset_path("Foo Device", f"test{i}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                json.dump({"mapping": {f"{EV_KEY},{i + 1}": "foo(otherwise=a)"}}, file)
+
+        migrate()
+
+        for i in range(MIN_PRESETS_FOR_POOL + 1):
+            preset = Preset(get_preset_path("Foo Device", f"test{i}"), UIMapping)
+            preset.load()
+            # all steps got applied: the key, the target and the else parameter
+            combination = InputCombination([InputConfig(type=EV_KEY, code=i + 1)])
+            self.assertEqual(
+                preset.get_mapping(combination),
+                UIMapping(
+                    input_combination=combination,
+                    target_uinput="keyboard",
+                    output_symbol="foo(else=a)\n"
+                    "# Broken mapping:\n"
+                    "# No target can handle all specified keycodes",
+                ),
+            )
+
+    def test_migrate_many_presets_sequentially(self):
+        for i in range(MIN_PRESETS_FOR_POOL + 1):
+            path = get_preset_path("Foo Device", f"test{i}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                json.dump({"mapping": {f"{EV_KEY},{i + 1}": "a"}}, file)
+
+        with patch("multiprocessing.Pool") as pool:
+            migrate(parallel=False)
+            pool.assert_not_called()
+
+        for i in range(MIN_PRESETS_FOR_POOL + 1):
+            preset = Preset(get_preset_path("Foo Device", f"test{i}"), UIMapping)
+            preset.load()
+            combination = InputCombination([InputConfig(type=EV_KEY, code=i + 1)])
+            self.assertEqual(preset.get_mapping(combination).output_symbol, "a")
+
     def test_add_version(self):
         path = os.path.join(CONFIG_PATH, "config.json")
         os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+from tests.lib.cleanup import quick_cleanup
+from tests.lib.fixtures import fixtures, Fixture
+from tests.lib.pipes import push_events, read_write_history_pipe
+
+import time
+import unittest
+from unittest import mock
+
+import evdev
+from evdev.ecodes import EV_KEY, BTN_A, KEY_A
+
+from inputremapper.configs.input_config import InputCombination, InputConfig
+from inputremapper.configs.mapping import Mapping
+from inputremapper.configs.preset import Preset
+from inputremapper.configs.system_mapping import system_mapping
+from inputremapper.groups import groups
+from inputremapper.injection.injector import Injector, InjectorState
+from inputremapper.injection.multiplexed_injector import MultiplexedInjector
+from inputremapper.input_event import InputEvent
+
+
+def create_preset(fixture: Fixture, code: int, symbol: str) -> Preset:
+    preset = Preset()
+    preset.add(
+        Mapping.from_combination(
+            InputCombination(
+                [
+                    InputConfig(
+                        type=EV_KEY,
+                        code=code,
+                        origin_hash=fixture.get_device_hash(),
+                    )
+                ]
+            ),
+            "keyboard",
+            symbol,
+        )
+    )
+    return preset
+
+
+class TestMultiplexedInjector(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        quick_cleanup()
+
+    def setUp(self):
+        self.multiplexed_injector = MultiplexedInjector()
+
+    def tearDown(self):
+        self.multiplexed_injector.stop()
+        time.sleep(0.2)
+        quick_cleanup()
+
+    def test_multiple_groups(self):
+        keyboard_group = groups.find(key="Foo Device 2")
+        gamepad_group = groups.find(name="gamepad")
+
+        keyboard_injection = self.multiplexed_injector.start_injecting(
+            keyboard_group,
+            create_preset(fixtures.foo_device_2_keyboard, KEY_A, "b"),
+        )
+        gamepad_injection = self.multiplexed_injector.start_injecting(
+            gamepad_group,
+            create_preset(fixtures.gamepad, BTN_A, "c"),
+        )
+        self.assertEqual(keyboard_injection.get_state(), InjectorState.STARTING)
+        pid = self.multiplexed_injector.pid
+
+        time.sleep(1)
+        self.assertEqual(keyboard_injection.get_state(), InjectorState.RUNNING)
+        self.assertEqual(gamepad_injection.get_state(), InjectorState.RUNNING)
+
+        push_events(fixtures.foo_device_2_keyboard, [InputEvent.key(KEY_A, 1)])
+        push_events(fixtures.gamepad, [InputEvent.key(BTN_A, 1)])
+        time.sleep(0.1)
+        history = read_write_history_pipe()
+        self.assertIn((EV_KEY, system_mapping.get("b"), 1), history)
+        self.assertIn((EV_KEY, system_mapping.get("c"), 1), history)
+
+        # stopping one group keeps the other one alive
+        keyboard_injection.stop_injecting()
+        time.sleep(0.2)
+        self.assertEqual(keyboard_injection.get_state(), InjectorState.STOPPED)
+        self.assertEqual(gamepad_injection.get_state(), InjectorState.RUNNING)
+
+        push_events(fixtures.gamepad, [InputEvent.key(BTN_A, 0)])
+        time.sleep(0.1)
+        self.assertIn(
+            (EV_KEY, system_mapping.get("c"), 0),
+            read_write_history_pipe(),
+        )
+
+        # reloading happens in the same process as well
+        self.assertTrue(
+            gamepad_injection.can_reload(create_preset(fixtures.gamepad, BTN_A, "d"))
+        )
+        gamepad_injection.reload_preset(create_preset(fixtures.gamepad, BTN_A, "d"))
+        time.sleep(0.1)
+        push_events(fixtures.gamepad, [InputEvent.key(BTN_A, 1)])
+        time.sleep(0.1)
+        self.assertIn(
+            (EV_KEY, system_mapping.get("d"), 1),
+            read_write_history_pipe(),
+        )
+
+        self.assertEqual(self.multiplexed_injector.pid, pid)
+
+    def test_stop(self):
+        injection = self.multiplexed_injector.start_injecting(
+            groups.find(key="Foo Device 2"),
+            create_preset(fixtures.foo_device_2_keyboard, KEY_A, "b"),
+        )
+        time.sleep(1)
+        self.assertEqual(injection.get_state(), InjectorState.RUNNING)
+
+        self.multiplexed_injector.stop()
+        self.multiplexed_injector.join(timeout=1)
+        self.assertFalse(self.multiplexed_injector.is_alive())
+        self.assertEqual(injection.get_state(), InjectorState.STOPPED)
+        self.assertFalse(self.multiplexed_injector.can_inject(Preset()))
+
+    def test_stop_while_grabbing(self):
+        grab = evdev.InputDevice.grab
+        busy_until = time.time() + 1
+
+        def grab_when_free(device):
+            if time.time() < busy_until:
+                raise OSError()
+
+            grab(device)
+
+        group = groups.find(key="Foo Device 2")
+        gamepad_group = groups.find(name="gamepad")
+        with mock.patch.object(evdev.InputDevice, "grab", grab_when_free):
+            with mock.patch.object(Injector, "regrab_timeout", 1):
+                gamepad_injection = self.multiplexed_injector.start_injecting(
+                    gamepad_group,
+                    create_preset(fixtures.gamepad, BTN_A, "c"),
+                )
+                self.multiplexed_injector.start_injecting(
+                    group,
+                    create_preset(fixtures.foo_device_2_keyboard, KEY_A, "b"),
+                )
+                time.sleep(0.3)
+
+                # replaces the injection that is still grabbing
+                injection = self.multiplexed_injector.start_injecting(
+                    group,
+                    create_preset(fixtures.foo_device_2_keyboard, KEY_A, "c"),
+                )
+                time.sleep(0.2)
+                self.assertTrue(self.multiplexed_injector.is_alive())
+
+                # and stops it while it is still grabbing
+                injection.stop_injecting()
+                time.sleep(0.2)
+                self.assertTrue(self.multiplexed_injector.is_alive())
+                self.assertEqual(injection.get_state(), InjectorState.STOPPED)
+
+                injection = self.multiplexed_injector.start_injecting(
+                    group,
+                    create_preset(fixtures.foo_device_2_keyboard, KEY_A, "b"),
+                )
+                time.sleep(1.5)
+
+        self.assertEqual(injection.get_state(), InjectorState.RUNNING)
+        self.assertEqual(gamepad_injection.get_state(), InjectorState.RUNNING)
+        push_events(fixtures.foo_device_2_keyboard, [InputEvent.key(KEY_A, 1)])
+        time.sleep(0.1)
+        self.assertIn(
+            (EV_KEY, system_mapping.get("b"), 1),
+            read_write_history_pipe(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
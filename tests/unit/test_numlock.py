@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+
+from tests.lib.cleanup import quick_cleanup
+from tests.lib.pipes import read_write_history_pipe
+
+import unittest
+
+from evdev.ecodes import EV_KEY, EV_LED, KEY_NUMLOCK, LED_CAPSL, LED_NUML
+
+from inputremapper.injection.global_uinputs import global_uinputs
+from inputremapper.injection.numlock import get_numlock_led, restore_numlock
+
+
+class FakeKeyboard:
+    def __init__(self, leds):
+        self._leds = leds
+
+    def capabilities(self):
+        return {EV_KEY: [KEY_NUMLOCK], EV_LED: [LED_CAPSL, LED_NUML]}
+
+    def leds(self):
+        return self._leds
+
+
+class LaggingKeyboard(FakeKeyboard):
+    """Shows the numlock of the display server only after some outdated readings."""
+
+    def __init__(self, numlock, outdated_readings):
+        super().__init__([])
+        self.numlock = numlock
+        self.presses = 0
+        self._outdated_readings = outdated_readings
+
+    def leds(self):
+        # each press of the numlock key toggles it
+        presses = read_write_history_pipe().count((EV_KEY, KEY_NUMLOCK, 1))
+        self.presses += presses
+        self.numlock = self.numlock != (presses % 2 == 1)
+
+        if self._outdated_readings > 0:
+            self._outdated_readings -= 1
+            return []
+
+        return [LED_NUML] if self.numlock else []
+
+
+class TestNumlockLed(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        quick_cleanup()
+
+    def tearDown(self):
+        quick_cleanup()
+
+    def test_get_numlock_led(self):
+        self.assertIsNone(get_numlock_led([]))
+        self.assertTrue(get_numlock_led([FakeKeyboard([LED_NUML])]))
+        self.assertFalse(get_numlock_led([FakeKeyboard([LED_CAPSL])]))
+
+    async def test_restore_numlock(self):
+        keyboard = FakeKeyboard([LED_NUML])
+
+        await restore_numlock([keyboard], True)
+        self.assertEqual(read_write_history_pipe(), [])
+
+        # grabbing turned it off
+        keyboard._leds = []
+        await restore_numlock([keyboard], True)
+        self.assertEqual(
+            read_write_history_pipe()[:2],
+            [(EV_KEY, KEY_NUMLOCK, 1), (EV_KEY, KEY_NUMLOCK, 0)],
+        )
+
+        # unknown
+        await restore_numlock([keyboard], None)
+        self.assertEqual(read_write_history_pipe(), [])
+
+    async def test_outdated_led(self):
+        keyboard = LaggingKeyboard(True, 1)
+        await restore_numlock([keyboard], True)
+        self.assertEqual(keyboard.presses, 0)
+        self.assertTrue(keyboard.numlock)
+
+    async def test_inverted_numlock(self):
+        # the numlock didn't change, but the led was outdated for so long that
+        # toggling it inverted the numlock. It is toggled back.
+        keyboard = LaggingKeyboard(True, 2)
+        await restore_numlock([keyboard], True)
+        self.assertEqual(keyboard.presses, 2)
+        self.assertTrue(keyboard.numlock)
+
+    async def test_keyboard_uinput_missing(self):
+        del global_uinputs.devices["keyboard"]
+        await restore_numlock([FakeKeyboard([])], True)
+        self.assertEqual(read_write_history_pipe(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,6 +25,7 @@ from tests.lib.tmp import tmp
 import os
 import unittest
 import tempfile
+from unittest.mock import patch
 
 from inputremapper.configs.paths import (
     touch,
@@ -32,6 +33,7 @@ from inputremapper.configs.paths import (
     get_preset_path,
     get_config_path,
     split_all,
+    write_atomically,
 )
 
 
@@ -61,6 +63,19 @@ class TestPaths(unittest.TestCase):
             self.assertTrue(os.path.exists(path_bcde))
             self.assertTrue(os.path.isdir(path_bcde))
 
+    def test_write_atomically(self):
+        with tempfile.TemporaryDirectory() as local_tmp:
+            path = os.path.join(local_tmp, "a/b")
+            with patch("os.fsync", side_effect=os.fsync) as fsync_patch:
+                write_atomically(path, "foo")
+
+            # the file and the directory that contains it
+            self.assertEqual(fsync_patch.call_count, 2)
+            with open(path) as file:
+                self.assertEqual(file.read(), "foo")
+
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["b"])
+
     def test_get_preset_path(self):
         self.assertTrue(get_preset_path().startswith(get_config_path()))
         self.assertTrue(get_preset_path().endswith("presets"))
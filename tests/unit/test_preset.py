@@ -18,6 +18,7 @@
 # You should have received a copy of the GNU General Public License
 # along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
 
+import json
 import os
 import unittest
 from unittest.mock import patch
@@ -28,6 +29,7 @@ from inputremapper.configs.mapping import Mapping
 from inputremapper.configs.mapping import UIMapping
 from inputremapper.configs.paths import get_preset_path, get_config_path, CONFIG_PATH
 from inputremapper.configs.preset import Preset
+from inputremapper.configs.system_mapping import system_mapping
 from inputremapper.configs.input_config import InputCombination, InputConfig
 from tests.lib.cleanup import quick_cleanup
 
@@ -47,20 +49,49 @@ class TestPreset(unittest.TestCase):
         permutations = combination.get_permutations()
         self.assertEqual(len(permutations), 6)
 
-        self.preset._mappings[permutations[0]] = Mapping(
-            input_combination=permutations[0],
-            target_uinput="keyboard",
-            output_symbol="a",
+        self.preset.add(
+            Mapping(
+                input_combination=permutations[0],
+                target_uinput="keyboard",
+                output_symbol="a",
+            )
         )
         self.assertFalse(self.preset._is_mapped_multiple_times(permutations[2]))
 
+        # add refuses permutations of existing combinations, bypass it
         self.preset._mappings[permutations[1]] = Mapping(
             input_combination=permutations[1],
             target_uinput="keyboard",
             output_symbol="a",
         )
+        self.preset._permutation_key_counts[permutations[1].get_permutation_key()] += 1
         self.assertTrue(self.preset._is_mapped_multiple_times(permutations[2]))
 
+        self.preset.remove(permutations[0])
+        self.assertFalse(self.preset._is_mapped_multiple_times(permutations[2]))
+
+    def test_permutation_key_counts(self):
+        one = InputCombination(InputCombination.from_tuples((1, 1, 1), (2, 2, 2)))
+        two = InputCombination(InputCombination.from_tuples((1, 3, 1), (2, 2, 2)))
+        mapping = Mapping.from_combination(one, "keyboard", "a")
+        self.preset.add(mapping)
+        self.assertEqual(
+            self.preset._permutation_key_counts[one.get_permutation_key()], 1
+        )
+
+        mapping.input_combination = two
+        self.assertEqual(
+            self.preset._permutation_key_counts[one.get_permutation_key()], 0
+        )
+        self.assertEqual(
+            self.preset._permutation_key_counts[two.get_permutation_key()], 1
+        )
+
+        self.preset.remove(two)
+        self.assertEqual(
+            self.preset._permutation_key_counts[two.get_permutation_key()], 0
+        )
+
     def test_has_unsaved_changes(self):
         self.preset.path = get_preset_path("foo", "bar2")
         self.preset.add(Mapping.from_combination())
@@ -116,6 +147,31 @@ class TestPreset(unittest.TestCase):
         self.assertFalse(self.preset.has_unsaved_changes())
         self.assertEqual(len(self.preset), 0)
 
+    def test_copies_loaded_mappings_once_modified(self):
+        self.preset.path = get_preset_path("foo", "bar2")
+        self.preset.add(Mapping.from_combination())
+        self.preset.save()
+
+        preset = Preset(get_preset_path("foo", "bar2"))
+        with patch.object(Mapping, "copy") as copy:
+            preset.load()
+            copy.assert_not_called()
+
+        mapping = preset.get_mapping(InputCombination.empty_combination())
+        mapping.gain = 0.5
+        self.assertTrue(preset.has_unsaved_changes())
+        mapping.gain = 1
+        self.assertFalse(preset.has_unsaved_changes())
+
+        mapping.gain = 0.5
+        preset.save()
+        self.assertFalse(preset.has_unsaved_changes())
+        preset.load()
+        self.assertEqual(
+            preset.get_mapping(InputCombination.empty_combination()).gain,
+            0.5,
+        )
+
     def test_save_load(self):
         one = InputConfig(type=EV_KEY, code=10)
         two = InputConfig(type=EV_KEY, code=11)
@@ -159,6 +215,61 @@ class TestPreset(unittest.TestCase):
         preset = Preset(get_config_path("missing_file.json"))
         self.assertRaises(FileNotFoundError, preset.load)
 
+    def test_skips_validation_of_own_files(self):
+        combination = InputCombination([InputConfig(type=EV_KEY, code=10)])
+        self.preset.add(Mapping.from_combination(combination, "keyboard", "1"))
+        self.preset.save()
+
+        loaded = Preset(self.preset.path)
+        with patch.object(Mapping, "__init__", side_effect=AssertionError):
+            loaded.load()
+
+        self.assertEqual(
+            loaded.get_mapping(combination),
+            Mapping.from_combination(combination, "keyboard", "1"),
+        )
+        # the mapping still validates assignments
+        with self.assertRaises(ValueError):
+            loaded.get_mapping(combination).output_symbol = "foo"
+
+        # modified by someone else, the preset is validated again
+        with open(self.preset.path, "a") as file:
+            file.write(" ")
+
+        loaded = Preset(self.preset.path)
+        with patch.object(Mapping, "__init__", side_effect=AssertionError) as patched:
+            loaded.load()
+            patched.assert_called()
+
+    def test_validates_files_with_invalid_mappings(self):
+        path = get_config_path("test.json")
+        combination = InputCombination([InputConfig(type=EV_KEY, code=10)])
+        ui_preset = Preset(path, mapping_factory=UIMapping)
+        # the output_symbol is missing
+        ui_preset.add(
+            UIMapping(input_combination=combination, target_uinput="keyboard")
+        )
+        ui_preset.save()
+
+        loaded = Preset(path, mapping_factory=UIMapping)
+        with patch.object(UIMapping, "construct_trusted", side_effect=AssertionError):
+            loaded.load()
+
+        self.assertIsNone(loaded.get_mapping(combination).output_symbol)
+
+    def test_validates_again_after_the_keyboard_layout_changed(self):
+        combination = InputCombination([InputConfig(type=EV_KEY, code=10)])
+        self.preset.add(Mapping.from_combination(combination, "keyboard", "1"))
+        self.preset.save()
+
+        # "foo" might be a valid symbol now
+        system_mapping.update({"foo": 500})
+        loaded = Preset(self.preset.path)
+        with patch.object(Mapping, "construct_trusted", side_effect=AssertionError):
+            loaded.load()
+
+        self.assertEqual(loaded.get_mapping(combination).output_symbol, "1")
+
     def test_modify_mapping(self):
         ev_1 = InputCombination([InputConfig(type=EV_KEY, code=1)])
         ev_3 = InputCombination([InputConfig(type=EV_KEY, code=2)])
@@ -217,6 +328,83 @@ class TestPreset(unittest.TestCase):
         )
         self.assertEqual(len(self.preset), 2)
 
+    def test_incremental_save(self):
+        one = Mapping.from_combination(
+            InputCombination([InputConfig(type=EV_KEY, code=10)]), "keyboard", "1"
+        )
+        two = Mapping.from_combination(
+            InputCombination([InputConfig(type=EV_KEY, code=11)]), "keyboard", "2"
+        )
+        self.preset.add(one)
+        self.preset.add(two)
+        self.assertTrue(one.is_dirty())
+        self.preset.save()
+        self.assertFalse(one.is_dirty())
+        self.assertFalse(two.is_dirty())
+
+        two.output_symbol = "3"
+        self.assertTrue(two.is_dirty())
+        self.assertTrue(self.preset.has_unsaved_changes())
+
+        # only the modified mapping is serialized again
+        serialized = []
+        original_dict = Mapping.dict
+
+        def dict_patch(mapping, *args, **kwargs):
+            serialized.append(id(mapping))
+            return original_dict(mapping, *args, **kwargs)
+
+        with patch.object(Mapping, "dict", dict_patch):
+            self.preset.save()
+
+        self.assertIn(id(two), serialized)
+        self.assertNotIn(id(one), serialized)
+
+        # as if the whole preset was serialized at once
+        with open(self.preset.path, "r") as file:
+            content = file.read()
+        self.assertEqual(content, json.dumps(json.loads(content), indent=4) + "\n")
+
+        self.assertFalse(self.preset.has_unsaved_changes())
+        loaded = Preset(self.preset.path)
+        loaded.load()
+        self.assertEqual(loaded.get_mapping(two.input_combination).output_symbol, "3")
+        self.assertEqual(loaded.get_mapping(one.input_combination).output_symbol, "1")
+
+        # modified and changed back
+        one.output_symbol = "4"
+        one.output_symbol = "1"
+        self.assertFalse(self.preset.has_unsaved_changes())
+
+    def test_atomic_save(self):
+        self.preset.add(Mapping.from_combination())
+        self.preset.save()
+        self.preset.get_mapping(InputCombination.empty_combination()).gain = 0.5
+
+        with patch("json.dumps", return_value="foo"), patch(
+            "os.replace", side_effect=OSError
+        ):
+            self.assertRaises(OSError, self.preset.save)
+
+        # the previous content is untouched, and no temporary file is left over
+        loaded = Preset(self.preset.path)
+        loaded.load()
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(os.listdir(os.path.dirname(self.preset.path)), ["bar2.json"])
+        self.assertTrue(self.preset.has_unsaved_changes())
+
+    def test_keeps_saved_mappings_after_rename(self):
+        self.preset.add(Mapping.from_combination())
+        self.preset.save()
+
+        new_path = get_preset_path("foo", "bar3")
+        os.rename(self.preset.path, new_path)
+        with patch.object(Preset, "_get_mappings_from_disc") as read_patch:
+            self.preset.path = new_path
+            read_patch.assert_not_called()
+
+        self.assertFalse(self.preset.has_unsaved_changes())
+
     def test_avoids_redundant_saves(self):
         with patch.object(self.preset, "has_unsaved_changes", lambda: False):
             self.preset.path = get_preset_path("foo", "bar2")
@@ -434,6 +622,61 @@ class TestPreset(unittest.TestCase):
         self.preset.remove(InputCombination([InputConfig.btn_left()]))
         self.assertFalse(self.preset.dangerously_mapped_btn_left())
 
+    def test_is_valid_validates_modified_mappings(self):
+        ui_preset = Preset(get_config_path("test.json"), mapping_factory=UIMapping)
+        mappings = [
+            UIMapping(
+                input_combination=InputCombination([InputConfig(type=1, code=code)]),
+                output_symbol="a",
+                target_uinput="keyboard",
+            )
+            for code in range(1, 6)
+        ]
+        for mapping in mappings:
+            ui_preset.add(mapping)
+
+        with patch("inputremapper.configs.mapping.Mapping") as validate:
+            validate.side_effect = Mapping
+            self.assertTrue(ui_preset.is_valid())
+            self.assertEqual(validate.call_count, 5)
+            self.assertTrue(ui_preset.is_valid())
+            self.assertEqual(validate.call_count, 5)
+
+        mappings[1].target_uinput = None
+        mappings[1].input_combination = [{"type": 1, "code": 10}]
+        mappings[2].target_uinput = None
+        with patch("inputremapper.configs.mapping.Mapping") as validate:
+            validate.side_effect = Mapping
+            self.assertFalse(ui_preset.is_valid())
+            self.assertEqual(validate.call_count, 2)
+
+        mappings[1].target_uinput = "keyboard"
+        self.assertFalse(ui_preset.is_valid())
+        ui_preset.remove(mappings[2].input_combination)
+        self.assertTrue(ui_preset.is_valid())
+
+        # removed mappings are not tracked anymore
+        mappings[2].output_symbol = "b"
+        self.assertTrue(ui_preset.is_valid())
+
+        ui_preset.empty()
+        ui_preset.add(UIMapping())
+        self.assertFalse(ui_preset.is_valid())
+
+    def test_is_valid_after_the_system_mapping_changed(self):
+        ui_preset = Preset(get_config_path("test.json"), mapping_factory=UIMapping)
+        ui_preset.add(
+            UIMapping(
+                input_combination=InputCombination([InputConfig(type=1, code=1)]),
+                output_symbol="foobar",
+                target_uinput="keyboard",
+            )
+        )
+        self.assertFalse(ui_preset.is_valid())
+
+        system_mapping.update({"foobar": 500})
+        self.assertTrue(ui_preset.is_valid())
+
     def test_save_load_with_invalid_mappings(self):
         ui_preset = Preset(get_config_path("test.json"), mapping_factory=UIMapping)
 
@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import unittest
+from unittest.mock import patch
+
+from inputremapper.configs.input_config import InputCombination
+from inputremapper.configs.mapping import Mapping
+from inputremapper.configs.paths import get_preset_path
+from inputremapper.configs.preset import Preset
+from inputremapper.configs.preset_cache import PresetCache
+from tests.lib.cleanup import quick_cleanup
+
+
+class TestPresetCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PresetCache()
+        self.path = get_preset_path("foo", "bar")
+        preset = Preset(self.path)
+        preset.add(
+            Mapping.from_combination(
+                InputCombination(InputCombination.from_tuples((1, 2, 1))),
+                output_symbol="a",
+            )
+        )
+        preset.save()
+
+    def tearDown(self):
+        quick_cleanup()
+
+    def _load(self, xmodmap=None) -> Preset:
+        preset = Preset(self.path)
+        if not self.cache.load(preset, xmodmap):
+            preset.load()
+            self.cache.store(preset, xmodmap)
+
+        return preset
+
+    def test_load(self):
+        self.assertFalse(self.cache.load(Preset(self.path), None))
+        self._load()
+        self.assertTrue(os.path.exists(self.cache.path))
+
+        with patch.object(Mapping, "__init__") as init_patch:
+            preset = Preset(self.path)
+            self.assertTrue(self.cache.load(preset, None))
+            # nothing got validated again
+            init_patch.assert_not_called()
+
+        mapping = preset.get_mapping(
+            InputCombination(InputCombination.from_tuples((1, 2, 1)))
+        )
+        self.assertEqual(mapping.output_symbol, "a")
+
+        # the callback of the preset is attached
+        mapping.input_combination = InputCombination.from_tuples((1, 3, 1))
+        self.assertIsNotNone(
+            preset.get_mapping(
+                InputCombination(InputCombination.from_tuples((1, 3, 1)))
+            )
+        )
+
+    def test_outdated(self):
+        self._load({"a": 10})
+        self.assertTrue(self.cache.load(Preset(self.path), {"a": 10}))
+
+        # the keyboard layout changed
+        self.assertFalse(self.cache.load(Preset(self.path), {"a": 11}))
+
+        # the file changed
+        preset = Preset(self.path)
+        preset.load()
+        preset.add(
+            Mapping.from_combination(
+                InputCombination(InputCombination.from_tuples((1, 4, 1))),
+                output_symbol="b",
+            )
+        )
+        preset.save()
+        self.assertFalse(self.cache.load(Preset(self.path), {"a": 10}))
+        self.assertEqual(len(self._load({"a": 10})), 2)
+        self.assertTrue(self.cache.load(Preset(self.path), {"a": 10}))
+
+    def test_broken_entry(self):
+        self._load()
+        for name in os.listdir(self.cache.path):
+            with open(os.path.join(self.cache.path, name), "w") as file:
+                file.write("foo")
+
+        self.assertFalse(self.cache.load(Preset(self.path), None))
+        self.assertEqual(len(self._load()), 1)
+
+    def test_store_fails(self):
+        with patch("os.replace", side_effect=OSError("foo")):
+            self._load()
+
+        # the temporary file is removed again
+        self.assertEqual(os.listdir(self.cache.path), [])
+
+    def test_prune(self):
+        self._load()
+        other_path = get_preset_path("foo", "baz")
+        preset = Preset(other_path)
+        preset.add(
+            Mapping.from_combination(
+                InputCombination(InputCombination.from_tuples((1, 3, 1))),
+                output_symbol="b",
+            )
+        )
+        preset.save()
+        self.cache.store(preset, None)
+
+        # leftover of a crash while writing
+        with open(os.path.join(self.cache.path, "tmpfoo"), "w") as file:
+            file.write("foo")
+
+        self.assertEqual(len(os.listdir(self.cache.path)), 3)
+        os.remove(other_path)
+        self.cache.prune()
+        self.assertEqual(len(os.listdir(self.cache.path)), 1)
+        self.assertTrue(self.cache.load(Preset(self.path), None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,13 +35,16 @@ from evdev.ecodes import (
     KEY_COMMA,
     BTN_TOOL_DOUBLETAP,
     KEY_A,
+    KEY_B,
     REL_WHEEL,
     REL_X,
     ABS_X,
+    ABS_Y,
     REL_HWHEEL,
     BTN_LEFT,
 )
 
+from inputremapper.configs.global_config import global_config
 from inputremapper.configs.input_config import InputCombination, InputConfig
 from inputremapper.groups import _Groups, DeviceType
 from inputremapper.gui.messages.message_broker import (
@@ -51,7 +54,11 @@ from inputremapper.gui.messages.message_broker import (
 from inputremapper.gui.messages.message_data import CombinationRecorded
 from inputremapper.gui.messages.message_types import MessageType
 from inputremapper.gui.reader_client import ReaderClient
-from inputremapper.gui.reader_service import ReaderService, ContextDummy
+from inputremapper.gui.reader_service import (
+    ReaderService,
+    ContextDummy,
+    UIEventBatch,
+)
 from inputremapper.input_event import InputEvent
 from tests.lib.fixtures import new_event
 from tests.lib.cleanup import quick_cleanup
@@ -157,6 +164,95 @@ class TestReaderAsyncio(unittest.IsolatedAsyncioTestCase):
                 self.assertEqual([call[0] for call in write_spy.call_args_list], events)
 
 
+class TestUIEventBatch(unittest.IsolatedAsyncioTestCase):
+    class Pipe:
+        def __init__(self):
+            self.batches = []
+
+        def send_events(self, events):
+            self.batches.append([event.event_tuple for event in events])
+
+    async def test_coalesces_events(self):
+        pipe = self.Pipe()
+        event_batch = UIEventBatch(pipe, 0.05)
+
+        # the first event is sent right away
+        event_batch.add(InputEvent.abs(ABS_X, 1))
+        self.assertEqual(pipe.batches, [[(EV_ABS, ABS_X, 1)]])
+
+        # the following ones are collected until the window passed
+        event_batch.add(InputEvent.abs(ABS_X, 1))
+        event_batch.add(InputEvent.abs(ABS_Y, 1))
+        event_batch.add(InputEvent.abs(ABS_X, 1))
+        self.assertEqual(len(pipe.batches), 1)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(
+            pipe.batches[1],
+            [(EV_ABS, ABS_X, 1), (EV_ABS, ABS_Y, 1)],
+        )
+
+    async def test_keeps_axis_flips(self):
+        pipe = self.Pipe()
+        event_batch = UIEventBatch(pipe, 0.05)
+        event_batch.add(InputEvent.abs(ABS_X, 1))
+        event_batch.add(InputEvent.abs(ABS_X, -1))
+        event_batch.add(InputEvent.abs(ABS_X, 1))
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(
+            pipe.batches,
+            [
+                [(EV_ABS, ABS_X, 1)],
+                [(EV_ABS, ABS_X, -1)],
+                [(EV_ABS, ABS_X, 1)],
+            ],
+        )
+
+    async def test_keeps_releases(self):
+        pipe = self.Pipe()
+        event_batch = UIEventBatch(pipe, 0.05)
+        event_batch.add(InputEvent.key(KEY_A, 1))
+        event_batch.add(InputEvent.key(KEY_B, 1))
+        event_batch.add(InputEvent.key(KEY_A, 0))
+        event_batch.add(InputEvent.key(KEY_A, 1))
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(
+            pipe.batches,
+            [
+                [(EV_KEY, KEY_A, 1)],
+                [(EV_KEY, KEY_B, 1), (EV_KEY, KEY_A, 0)],
+                [(EV_KEY, KEY_A, 1)],
+            ],
+        )
+
+    async def test_clear(self):
+        pipe = self.Pipe()
+        event_batch = UIEventBatch(pipe, 0.05)
+        event_batch.add(InputEvent.key(KEY_A, 1))
+        event_batch.add(InputEvent.key(KEY_A, 0))
+        event_batch.clear()
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(pipe.batches, [[(EV_KEY, KEY_A, 1)]])
+
+
+class TestEventBatchWindow(unittest.TestCase):
+    def tearDown(self):
+        quick_cleanup()
+
+    def test_event_batch_window(self):
+        self.assertEqual(ReaderService._get_event_batch_window(), 0.03)
+
+        global_config.set(["reader", "event_batch_window_ms"], 100)
+        self.assertEqual(ReaderService._get_event_batch_window(), 0.1)
+
+        for window_ms in [-1, "foo", None, [1]]:
+            global_config.set(["reader", "event_batch_window_ms"], window_ms)
+            self.assertEqual(ReaderService._get_event_batch_window(), 0.03)
+
+
 class TestReaderMultiprocessing(unittest.TestCase):
     def setUp(self):
         self.reader_service_process = None
@@ -0,0 +1,92 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+from tests.lib.cleanup import quick_cleanup
+
+import os
+import unittest
+from unittest import mock
+
+from inputremapper.configs.global_config import global_config
+from inputremapper.injection.scheduling import SchedulingPolicy, apply_scheduling
+
+
+class TestScheduling(unittest.TestCase):
+    def tearDown(self):
+        quick_cleanup()
+
+    def test_from_config(self):
+        self.assertEqual(SchedulingPolicy.from_config("Foo Device"), SchedulingPolicy())
+
+        global_config.set(
+            ["injector", "scheduling", "Foo Device"],
+            {"policy": "FIFO", "priority": 50, "cpus": [2, 3], "mlock": True},
+        )
+        scheduling = SchedulingPolicy.from_config("Foo Device")
+        self.assertEqual(scheduling, SchedulingPolicy("fifo", 50, (2, 3), True))
+        self.assertEqual(str(scheduling), "fifo 50, cpus 2,3, mlock")
+
+        # other groups are not affected
+        self.assertEqual(SchedulingPolicy.from_config("Bar Device"), SchedulingPolicy())
+
+        global_config.set(
+            ["injector", "scheduling", "Foo Device"],
+            {"policy": "foo", "priority": 50},
+        )
+        self.assertEqual(SchedulingPolicy.from_config("Foo Device"), SchedulingPolicy())
+
+    def test_invalid_config(self):
+        for config in [
+            {"policy": "fifo", "priority": "high"},
+            {"policy": "fifo", "priority": None},
+            {"policy": "fifo", "cpus": 2},
+            {"policy": "fifo", "cpus": ["a"]},
+        ]:
+            global_config.set(["injector", "scheduling", "Foo Device"], config)
+            self.assertEqual(
+                SchedulingPolicy.from_config("Foo Device"),
+                SchedulingPolicy(),
+            )
+
+    @mock.patch("inputremapper.injection.scheduling._mlockall", return_value=True)
+    @mock.patch("os.sched_setscheduler")
+    @mock.patch("os.sched_setaffinity")
+    def test_apply(self, setaffinity_patch, setscheduler_patch, mlockall_patch):
+        scheduling = SchedulingPolicy("rr", 10, (1,), True)
+        self.assertEqual(apply_scheduling(scheduling), scheduling)
+        setaffinity_patch.assert_called_once_with(0, (1,))
+        self.assertEqual(setscheduler_patch.call_args[0][1], os.SCHED_RR)
+        mlockall_patch.assert_called_once()
+
+    @mock.patch("inputremapper.injection.scheduling._mlockall", return_value=False)
+    @mock.patch("os.sched_setscheduler", side_effect=PermissionError)
+    @mock.patch("os.sched_setaffinity")
+    def test_missing_privileges(self, setaffinity_patch, *_):
+        # everything that is permitted is still applied
+        effective = apply_scheduling(SchedulingPolicy("fifo", 50, (1,), True))
+        self.assertEqual(effective, SchedulingPolicy(cpus=(1,)))
+        self.assertEqual(str(effective), "other, cpus 1")
+
+    def test_apply_default(self):
+        self.assertEqual(apply_scheduling(SchedulingPolicy()), SchedulingPolicy())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+# input-remapper - GUI for device specific keyboard mappings
+# Copyright (C) 2023 sezanzeb <proxima@sezanzeb.de>
+#
+# This file is part of input-remapper.
+#
+# input-remapper is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# input-remapper is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with input-remapper.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import re
+import subprocess
+import sys
+import unittest
+from typing import Dict
+
+import inputremapper
+
+# generous, importing those modules takes about 0.1 seconds
+IMPORT_TIME_BUDGET = 0.5
+
+# modules that take long to import, and that the cli doesn't need for utils
+SLOW_MODULES = ["pkg_resources", "gi", "pydantic", "pydbus"]
+
+
+def get_import_times(module: str) -> Dict[str, float]:
+    """Import the module in a new interpreter, and get the cumulative import times.
+
+    Maps module names to seconds.
+    """
+    source = os.path.dirname(os.path.dirname(inputremapper.__file__))
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join([source, env.get("PYTHONPATH", "")])
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True,
+    ).stderr.decode()
+
+    import_times = {}
+    for cumulative, name in re.findall(
+        r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)", stderr
+    ):
+        import_times[name] = int(cumulative) / 1000000
+
+    return import_times
+
+
+class TestStartup(unittest.TestCase):
+    def test_control_utils(self):
+        # input-remapper-control --list-devices and --symbol-names
+        for module in ["inputremapper.groups", "inputremapper.configs.system_mapping"]:
+            import_times = get_import_times(module)
+
+            for slow_module in SLOW_MODULES:
+                self.assertNotIn(slow_module, import_times, module)
+
+            self.assertLess(import_times[module], IMPORT_TIME_BUDGET, module)
+
+
+if __name__ == "__main__":
+    unittest.main()
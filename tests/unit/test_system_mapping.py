@@ -27,7 +27,11 @@ from unittest.mock import patch
 from evdev.ecodes import BTN_LEFT, KEY_A
 
 from inputremapper.configs.paths import CONFIG_PATH
-from inputremapper.configs.system_mapping import SystemMapping, XMODMAP_FILENAME
+from inputremapper.configs.system_mapping import (
+    SystemMapping,
+    XMODMAP_FILENAME,
+    _get_keymap_fingerprint,
+)
 from tests.lib.cleanup import quick_cleanup
 
 
@@ -57,6 +61,77 @@ class TestSystemMapping(unittest.TestCase):
             self.assertNotIn("KEY_A", content)
             self.assertNotIn("disable", content)
 
+    def test_xmodmap_snapshot(self):
+        original_check_output = subprocess.check_output
+        calls = []
+
+        def check_output(*args, **kwargs):
+            calls.append(args)
+            return original_check_output(*args, **kwargs)
+
+        fingerprint = {"display": ":0", "x_socket": [1, 2, 3]}
+        with patch.object(subprocess, "check_output", check_output), patch(
+            "inputremapper.configs.system_mapping._get_keymap_fingerprint",
+            lambda: fingerprint,
+        ):
+            system_mapping = SystemMapping()
+            system_mapping.populate()
+            self.assertGreater(len(calls), 0)
+
+            # the layout didn't change, so xmodmap is not called again
+            calls.clear()
+            system_mapping.populate()
+            self.assertEqual(len(calls), 0)
+            self.assertEqual(system_mapping.get("a"), KEY_A)
+            self.assertEqual(system_mapping.get_name(KEY_A), "a")
+
+            # the x server restarted
+            fingerprint = {"display": ":0", "x_socket": [4, 5, 6]}
+            system_mapping.populate()
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(system_mapping.get("a"), KEY_A)
+
+            # the service needs xmodmap.json, so it is written again
+            os.remove(os.path.join(CONFIG_PATH, XMODMAP_FILENAME))
+            system_mapping.populate()
+            self.assertEqual(len(calls), 2)
+            self.assertTrue(os.path.exists(os.path.join(CONFIG_PATH, XMODMAP_FILENAME)))
+
+    def test_keymap_fingerprint(self):
+        layout = b"rules: evdev\nlayout: us\n"
+
+        def check_output(*args, **kwargs):
+            return layout
+
+        with patch.object(subprocess, "check_output", check_output), patch.dict(
+            os.environ, {"DISPLAY": ":0"}
+        ), patch(
+            "inputremapper.configs.system_mapping._get_file_signature",
+            lambda path: [1, 2, 3],
+        ):
+            fingerprint = _get_keymap_fingerprint()
+            self.assertEqual(fingerprint["xkb"], layout.decode())
+            self.assertEqual(_get_keymap_fingerprint(), fingerprint)
+
+            # the layout was switched within the running session
+            layout = b"rules: evdev\nlayout: de\n"
+            self.assertNotEqual(_get_keymap_fingerprint(), fingerprint)
+
+    def test_version(self):
+        system_mapping = SystemMapping()
+        system_mapping.get("a")
+        version = system_mapping.version
+
+        system_mapping.update({"foo": 500})
+        self.assertEqual(system_mapping.version, version + 1)
+
+        # nothing changed
+        system_mapping.update({"foo": 500})
+        self.assertEqual(system_mapping.version, version + 1)
+
+        system_mapping.populate()
+        self.assertGreater(system_mapping.version, version + 1)
+
     def test_empty_xmodmap(self):
         # if xmodmap returns nothing, don't write the file
         empty_xmodmap = ""
@@ -147,6 +222,51 @@ class TestSystemMapping(unittest.TestCase):
 
         self.assertEqual(system_mapping.get("disable"), -1)
 
+    def test_list_names_by_code(self):
+        system_mapping = SystemMapping()
+        system_mapping.clear()
+        system_mapping._set("a", 30)
+        system_mapping._set("KEY_A", 30)
+        system_mapping._set("b", 48)
+        system_mapping._set("c", 46)
+
+        self.assertEqual(system_mapping.list_names(codes=[30]), ["a", "KEY_A"])
+        self.assertEqual(
+            system_mapping.list_names(codes=[48, 30, 48]), ["b", "a", "KEY_A"]
+        )
+        self.assertEqual(system_mapping.list_names(codes=[1]), [])
+
+        # the index follows changes of the mapping
+        system_mapping.update({"b": 30})
+        self.assertEqual(system_mapping.list_names(codes=[30]), ["a", "KEY_A", "b"])
+        self.assertEqual(system_mapping.list_names(codes=[48]), [])
+
+        system_mapping.clear()
+        self.assertEqual(system_mapping.list_names(codes=[30]), [])
+        self.assertIsNone(system_mapping.get("A"))
+
+    def test_get_name_xmodmap(self):
+        xmodmap = "keycode  38 = a A\nkeycode  64 = Alt_L Meta_L\nkeycode 204 = NoSymbol Alt_L\n"
+
+        class SubprocessMock:
+            def decode(self):
+                return xmodmap
+
+        def check_output(*args, **kwargs):
+            return SubprocessMock()
+
+        with patch.object(subprocess, "check_output", check_output):
+            system_mapping = SystemMapping()
+            system_mapping.populate()
+            self.assertEqual(system_mapping.get_name(KEY_A), "a")
+            self.assertEqual(system_mapping.get_name(56), "Alt_L")
+            self.assertEqual(system_mapping.get_name(BTN_LEFT), "BTN_LEFT")
+
+            # a changed keyboard layout replaces the index
+            xmodmap = "keycode  38 = q Q\n"
+            system_mapping.populate()
+            self.assertEqual(system_mapping.get_name(KEY_A), "q")
+
     def test_get_name_no_xmodmap(self):
         # if xmodmap is not installed, uses the linux constant names
         system_mapping = SystemMapping()